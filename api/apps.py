@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Connects the signals bumping the version of the autocomplete index (in every process that writes models)
+        import api.utils.autocomplete_index  # noqa: F401
+
+        if settings.SEARCH_BACKEND == 'local':
+            from api.documents.local_search import use_local_search_backend
+
+            use_local_search_backend()
@@ -0,0 +1,8 @@
+# Imported by django_elasticsearch_dsl when the app registry is ready so that all the documents are registered in every
+# process (e.g. the search index queue worker too), not just once a module using them happens to be imported
+from .asset import AssetDocument
+from .attribute import AttributeDocument
+from .organization import OrganizationDocument
+from .solution import SolutionDocument
+from .solution_question import SolutionQuestionDocument
+from .tag import TagDocument
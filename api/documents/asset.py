@@ -2,8 +2,28 @@ from django_elasticsearch_dsl.documents import Document
 from django_elasticsearch_dsl import fields, search
 from django_elasticsearch_dsl.registries import registry
 
+from django.db.models import Q
+
 from api.documents.common import html_strip
-from api.models import Asset, Tag
+from api.models import (
+    Asset,
+    AssetAttributeVote,
+    AssetPricePlan,
+    AssetQuestion,
+    AssetReview,
+    AssetSnapshot,
+    Attribute,
+    LinkedAttribute,
+    LinkedSolution,
+    LinkedSolutionTag,
+    Organization,
+    OrganizationUsingAsset,
+    Solution,
+    SolutionQuestion,
+    Tag,
+    UserAssetUsage,
+)
+from api.serializers.asset import AssetSerializer
 
 
 @registry.register_document
@@ -24,6 +44,14 @@ class AssetDocument(Document):
         search = search[0 : search.count()]
         return search
 
+    @classmethod
+    def paginated_search(cls, using=None, index=None):
+        """
+        Unlike search() this does not fetch every hit, it is meant to be sliced to the page being requested, which
+        is what api.documents.search_queryset.SearchQuerySet does.
+        """
+        return super().search(using, index)
+
     short_description = fields.TextField(
         analyzer=html_strip, fields={'raw': fields.KeywordField()}
     )
@@ -42,6 +70,17 @@ class AssetDocument(Document):
         },
     )
 
+    # The payload of an asset card on the search listing page (as AssetSerializer renders it for anonymous users), it is
+    # only stored and not indexed. Used to serve search listing pages without hitting the db when
+    # settings.ASSET_SEARCH_LIST_FROM_INDEX is enabled.
+    list_card = fields.ObjectField(enabled=False)
+    # Needed to compute the per-user fields of the list card
+    owner_id = fields.IntegerField(attr='owner_id')
+    submitted_by_id = fields.IntegerField(attr='submitted_by_id')
+
+    # Facet of the search listing page (along with tags, has_free_trial and avg_rating)
+    has_price_plans = fields.BooleanField()
+
     class Index:
         # Name of the Elasticsearch index
         name = 'asset'
@@ -50,12 +89,32 @@ class AssetDocument(Document):
 
     class Django:
         model = Asset
-        related_models = [Tag]
+        # Everything the list card embeds, see get_instances_from_related
+        related_models = [
+            Tag,
+            AssetPricePlan,
+            AssetReview,
+            AssetQuestion,
+            AssetSnapshot,
+            AssetAttributeVote,
+            Attribute,
+            LinkedAttribute,
+            Organization,
+            OrganizationUsingAsset,
+            Solution,
+            LinkedSolution,
+            LinkedSolutionTag,
+            SolutionQuestion,
+            UserAssetUsage,
+        ]
         # The fields of the model you want to be indexed in Elasticsearch,
         # other than the ones already used in the Document class
         fields = [
             'slug',
             'name',
+            'is_published',
+            'has_free_trial',
+            'avg_rating',
         ]
 
         # Ignore auto updating of Elasticsearch when a model is saved or deleted.
@@ -66,15 +125,47 @@ class AssetDocument(Document):
 
         # Paginate the django queryset used to populate the index with the specified size
         # (by default it uses the database driver's default setting)
-        # queryset_pagination = 5000
+        queryset_pagination = 500
 
     def get_queryset(self):
         return (
             super(AssetDocument, self)
             .get_queryset()
-            .prefetch_related('tags', 'attributes', 'solutions')
+            .prefetch_related(
+                'tags',
+                'attributes',
+                'solutions',
+                'customer_organizations',
+                'questions',
+                'snapshots',
+                'price_plans',
+            )
         )
 
+    def prepare_list_card(self, instance):
+        return AssetSerializer(instance).data
+
+    def prepare_has_price_plans(self, instance):
+        return bool(instance.price_plans.all())
+
     def get_instances_from_related(self, related_instance):
-        if isinstance(related_instance, Asset):
-            return related_instance.tags.all()
+        # The list card embeds the related instances (and the tags, organization and questions of the solutions), so
+        # the assets including them have to be re-indexed when they change. Price plans and reviews (which update
+        # Asset.avg_rating with QuerySet.update()) also change the facets.
+        if isinstance(related_instance, Tag):
+            return Asset.objects.filter(
+                Q(tags=related_instance)
+                | Q(solutions__tags=related_instance)
+                | Q(solutions__primary_tag=related_instance)
+            ).distinct()
+        if isinstance(related_instance, Organization):
+            return Asset.objects.filter(
+                Q(customer_organizations=related_instance)
+                | Q(solutions__organization=related_instance)
+            ).distinct()
+        if isinstance(related_instance, (Attribute, Solution)):
+            return related_instance.assets.all()
+        if isinstance(related_instance, (LinkedSolutionTag, SolutionQuestion)):
+            return Asset.objects.filter(solutions=related_instance.solution_id)
+        # The other related models belong to a single asset
+        return Asset.objects.filter(pk=related_instance.asset_id)
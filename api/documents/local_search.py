@@ -0,0 +1,378 @@
+"""
+A search backend answering the Elasticsearch requests of the app in-process, from BM25 indexes (see
+api.utils.bm25_index) of the documents built straight from the db. It is enabled with settings.SEARCH_BACKEND = 'local'
+so that search works without an Elasticsearch node (dev machines, small deployments, tests), and serves as a
+relevance/latency baseline for Elasticsearch (see the benchmark_search_backends command).
+
+Each process keeps its own indexes, which are rebuilt from the db once the models of their document (or its related
+models) are written to, through a version stamp shared in the cache like the autocomplete index. Requests writing to
+the indexes (bulk, index creation, aliases...) are acknowledged without storing anything, they only invalidate the
+indexes they write to.
+"""
+
+import fnmatch
+import json
+import re
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django_elasticsearch_dsl.registries import registry
+from elasticsearch.connection import Connection
+from elasticsearch.serializer import JSONSerializer
+from elasticsearch_dsl.connections import connections
+
+from api.utils.bm25_index import BM25Index, get_fields_from_mapping
+from api.utils.prefix_index import VersionedIndex
+
+# Answer of the info API, which elasticsearch-py checks before its first request
+LOCAL_SEARCH_INFO = {
+    'name': 'local',
+    'cluster_name': 'local',
+    'version': {'number': '7.16.2', 'build_flavor': 'default'},
+    'tagline': 'You Know, for Search',
+}
+LOCAL_SEARCH_RESPONSE_HEADERS = {
+    'content-type': 'application/json',
+    'x-elastic-product': 'Elasticsearch',
+}
+
+# Index name -> VersionedIndex of its BM25Index
+_local_search_indexes = {}
+
+
+def get_document_class(index_name: str):
+    """
+    The document class of an index name, versioned index names (see reindex_catalog) included.
+    """
+    for document_class in registry.get_documents():
+        name = document_class._index._name
+        if index_name == name or re.fullmatch(re.escape(name) + r'-\d+', index_name):
+            return document_class
+    return None
+
+
+def build_local_search_index(document_class) -> BM25Index:
+    document = document_class()
+    index_settings = document._index.to_dict().get('settings', {})
+    serializer = JSONSerializer()
+    return BM25Index(
+        (
+            (
+                document.generate_id(instance),
+                # As it would be stored in Elasticsearch
+                json.loads(serializer.dumps(document.prepare(instance))),
+            )
+            for instance in document.get_queryset().order_by('pk')
+            if document.should_index_object(instance)
+        ),
+        get_fields_from_mapping(
+            document._doc_type.mapping.to_dict()['properties'],
+            index_settings.get('analysis'),
+        ),
+    )
+
+
+def _get_versioned_index(document_class) -> VersionedIndex:
+    name = document_class._index._name
+    if name not in _local_search_indexes:
+        _local_search_indexes.setdefault(
+            name,
+            VersionedIndex(
+                'local_search:{}'.format(name),
+                partial(build_local_search_index, document_class),
+                check_interval=settings.LOCAL_SEARCH_INDEX_VERSION_CHECK_INTERVAL,
+                max_age=settings.LOCAL_SEARCH_INDEX_MAX_AGE,
+            ),
+        )
+    return _local_search_indexes[name]
+
+
+def get_local_search_index(document_class) -> BM25Index:
+    return _get_versioned_index(document_class).get()
+
+
+def invalidate_local_search_index(document_class) -> None:
+    _get_versioned_index(document_class).bump_version()
+
+
+def clear_local_search_indexes() -> None:
+    _local_search_indexes.clear()
+
+
+def _invalidate_local_search_indexes_of_instance(sender, instance, **kwargs):
+    document_classes = set(registry.get_documents([instance.__class__]))
+    document_classes.update(registry._get_related_doc(instance))
+    for document_class in document_classes:
+        invalidate_local_search_index(document_class)
+
+
+def connect_local_search_signals() -> None:
+    for signal in (post_save, post_delete, m2m_changed):
+        signal.connect(
+            _invalidate_local_search_indexes_of_instance,
+            dispatch_uid='local_search_invalidation',
+        )
+
+
+def disconnect_local_search_signals() -> None:
+    for signal in (post_save, post_delete, m2m_changed):
+        signal.disconnect(dispatch_uid='local_search_invalidation')
+
+
+def use_local_search_backend(alias: str = 'default') -> None:
+    """
+    Makes the given elasticsearch_dsl connection (used by all the documents by default) the local search backend.
+    """
+    connections.create_connection(
+        alias, hosts=['local'], connection_class=LocalSearchConnection
+    )
+    connect_local_search_signals()
+
+
+def _filter_source(source: dict, source_filter):
+    """
+    The source of a hit as returned for the `_source` parameter of a search, None if it isn't returned at all.
+    """
+    if source_filter is False:
+        return None
+    if source_filter is True or source_filter is None:
+        return source
+
+    if isinstance(source_filter, dict):
+        includes = source_filter.get('includes', source_filter.get('include', []))
+        excludes = source_filter.get('excludes', source_filter.get('exclude', []))
+    else:
+        includes, excludes = source_filter, []
+    includes = [includes] if isinstance(includes, str) else includes
+    excludes = [excludes] if isinstance(excludes, str) else excludes
+    return {
+        key: value
+        for key, value in source.items()
+        if (not includes or any(fnmatch.fnmatch(key, pattern) for pattern in includes))
+        and not any(fnmatch.fnmatch(key, pattern) for pattern in excludes)
+    }
+
+
+class LocalSearchError(Exception):
+    def __init__(self, status: int, error_type: str, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.response = {
+            'error': {'type': error_type, 'reason': reason},
+            'status': status,
+        }
+
+
+class LocalSearchConnection(Connection):
+    """
+    An elasticsearch-py connection answering requests from the local search indexes instead of sending them to a node.
+    Only the subset of the REST API used by the app is supported.
+    """
+
+    def perform_request(
+        self,
+        method,
+        url,
+        params=None,
+        body=None,
+        timeout=None,
+        ignore=(),
+        headers=None,
+    ):
+        start = time.time()
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        path = url.split('?')[0]
+        try:
+            status, response = 200, self._handle(method, path, body)
+        except LocalSearchError as e:
+            status, response = e.status, e.response
+
+        raw_data = json.dumps(response)
+        duration = time.time() - start
+        if not (200 <= status < 300) and status not in ignore:
+            self.log_request_fail(method, url, path, body, duration, status, raw_data)
+            self._raise_error(status, raw_data)
+        self.log_request_success(method, url, path, body, status, raw_data, duration)
+        return status, dict(LOCAL_SEARCH_RESPONSE_HEADERS), raw_data
+
+    def _handle(self, method: str, path: str, body: str):
+        parts = [part for part in path.split('/') if part]
+        if not parts:
+            return LOCAL_SEARCH_INFO
+
+        index_names = [] if parts[0].startswith('_') else parts[0].split(',')
+        endpoint = next((part for part in parts if part.startswith('_')), None)
+        if endpoint == '_search':
+            return self._search(index_names, json.loads(body) if body else {})
+        if endpoint == '_count':
+            return self._count(index_names, json.loads(body) if body else {})
+        if endpoint == '_msearch':
+            return self._msearch(index_names, body)
+        if endpoint == '_bulk':
+            return self._bulk(index_names, body)
+        if endpoint == '_doc' and method in ('GET', 'HEAD'):
+            return self._get(parts[0], parts[-1])
+        if endpoint is None and method in ('GET', 'HEAD'):
+            self._get_document_classes(index_names)
+            return {index_name: {} for index_name in index_names}
+        if method in ('GET', 'HEAD'):
+            # e.g. aliases (there are none) or mappings
+            raise LocalSearchError(
+                404, 'resource_not_found_exception', '{} not found'.format(path)
+            )
+
+        # Writes, the indexes are rebuilt from the db instead
+        for index_name in index_names:
+            document_class = get_document_class(index_name)
+            if document_class is not None:
+                invalidate_local_search_index(document_class)
+        return {'acknowledged': True}
+
+    @staticmethod
+    def _get_document_classes(index_names: list) -> list:
+        if not index_names or index_names == ['_all']:
+            return list(registry.get_documents())
+
+        document_classes = []
+        for index_name in index_names:
+            document_class = get_document_class(index_name)
+            if document_class is None:
+                raise LocalSearchError(
+                    404,
+                    'index_not_found_exception',
+                    'no such index [{}]'.format(index_name),
+                )
+            document_classes.append(document_class)
+        return document_classes
+
+    def _get_hits(self, index_names: list, query: dict) -> list:
+        """
+        (score, index name, BM25Index, document number) of the hits, by descending score.
+        """
+        hits = []
+        for document_class in self._get_document_classes(index_names):
+            index = get_local_search_index(document_class)
+            try:
+                results = index.search(query)
+            except (ValueError, KeyError, TypeError) as e:
+                raise LocalSearchError(400, 'parsing_exception', str(e))
+            hits.extend(
+                (score, document_class._index._name, index, doc)
+                for doc, score in results
+            )
+        # Stable, so equally scored hits stay in index order
+        hits.sort(key=lambda hit: -hit[0])
+        return hits
+
+    def _search(self, index_names: list, body: dict) -> dict:
+        start = time.monotonic()
+        hits = self._get_hits(index_names, body.get('query'))
+        offset = body.get('from', 0)
+        page = hits[offset : offset + body.get('size', 10)]
+
+        page_hits = []
+        for score, index_name, index, doc in page:
+            hit = {
+                '_index': index_name,
+                '_type': '_doc',
+                '_id': index.ids[doc],
+                '_score': score,
+            }
+            source = _filter_source(index.sources[doc], body.get('_source'))
+            if source is not None:
+                hit['_source'] = source
+            page_hits.append(hit)
+
+        response_hits = {
+            'max_score': hits[0][0] if hits else None,
+            'hits': page_hits,
+        }
+        if body.get('track_total_hits', True) is not False:
+            response_hits['total'] = {'value': len(hits), 'relation': 'eq'}
+        response = {
+            'took': int((time.monotonic() - start) * 1000),
+            'timed_out': False,
+            '_shards': {'total': 1, 'successful': 1, 'skipped': 0, 'failed': 0},
+            'hits': response_hits,
+        }
+        aggs = body.get('aggs', body.get('aggregations'))
+        if aggs:
+            response['aggregations'] = self._aggregate(index_names, aggs, hits)
+        return response
+
+    def _aggregate(self, index_names: list, aggs: dict, hits: list) -> dict:
+        document_classes = self._get_document_classes(index_names)
+        if len(document_classes) != 1:
+            raise LocalSearchError(
+                400,
+                'illegal_argument_exception',
+                'Aggregations are only supported on a single index',
+            )
+        index = get_local_search_index(document_classes[0])
+        try:
+            return index.aggregate(aggs, (doc for _, _, _, doc in hits))
+        except (ValueError, KeyError, TypeError) as e:
+            raise LocalSearchError(400, 'parsing_exception', str(e))
+
+    def _count(self, index_names: list, body: dict) -> dict:
+        return {
+            'count': len(self._get_hits(index_names, body.get('query'))),
+            '_shards': {'total': 1, 'successful': 1, 'skipped': 0, 'failed': 0},
+        }
+
+    def _msearch(self, index_names: list, body: str) -> dict:
+        lines = [json.loads(line) for line in body.splitlines() if line.strip()]
+        responses = []
+        for header, search_body in zip(lines[::2], lines[1::2]):
+            search_index_names = header.get('index') or index_names
+            if isinstance(search_index_names, str):
+                search_index_names = search_index_names.split(',')
+            try:
+                response = self._search(search_index_names, search_body)
+                response['status'] = 200
+            except LocalSearchError as e:
+                response = e.response
+            responses.append(response)
+        return {'took': 0, 'responses': responses}
+
+    def _bulk(self, index_names: list, body: str) -> dict:
+        lines = [json.loads(line) for line in body.splitlines() if line.strip()]
+        items = []
+        document_classes = set()
+        while lines:
+            ((op_type, meta),) = lines.pop(0).items()
+            if op_type != 'delete':
+                lines.pop(0)
+            index_name = meta.get('_index') or index_names[0]
+            document_class = get_document_class(index_name)
+            if document_class is not None:
+                document_classes.add(document_class)
+            items.append(
+                {
+                    op_type: {
+                        '_index': index_name,
+                        '_id': str(meta.get('_id')),
+                        'result': 'noop',
+                        'status': 200,
+                    }
+                }
+            )
+        for document_class in document_classes:
+            invalidate_local_search_index(document_class)
+        return {'took': 0, 'errors': False, 'items': items}
+
+    def _get(self, index_name: str, doc_id: str) -> dict:
+        (document_class,) = self._get_document_classes([index_name])
+        index = get_local_search_index(document_class)
+        if doc_id not in index.ids:
+            raise LocalSearchError(404, 'not_found', 'document not found')
+        return {
+            '_index': index_name,
+            '_type': '_doc',
+            '_id': doc_id,
+            'found': True,
+            '_source': index.sources[index.ids.index(doc_id)],
+        }
@@ -0,0 +1,284 @@
+from django.db.models import Case, Q, QuerySet, When
+from django.db.models.query import ModelIterable
+from elasticsearch_dsl.query import Range, Term, Terms
+
+
+class SearchQuerySet(QuerySet):
+    """
+    A QuerySet whose rows and their relevance order come from an Elasticsearch search.
+
+    As long as only filters that can be pushed down to Elasticsearch are applied (see `filter_fields`), a page of
+    results costs a single search request (from/size + track_total_hits for the count) and a single `pk IN (...)`
+    query that hydrates just that page. Anything that can only be evaluated in SQL (other filters, ordering, OR-ing
+    querysets, etc.) transparently falls back to fetching all matching ids from Elasticsearch, which is how
+    `Search.to_queryset()` behaves.
+    """
+
+    def __init__(self, model=None, query=None, using=None, hints=None):
+        super().__init__(model, query, using, hints)
+        self._es_search = None
+        # Maps a Django lookup path (without the lookup type) to the name of the Elasticsearch field it is indexed as
+        self._es_filter_fields = {}
+        self._is_sql_altered = False
+        # (offset, limit) of the page that is going to be requested, so that count() and the page can be fetched
+        # with the same search request
+        self._search_window = None
+        self._search_page = None
+        # When set, pages are served straight from these `_source` fields of the hits instead of the db
+        self._search_source_fields = None
+        # Aggregations (name -> elasticsearch_dsl aggregation) computed by the request of the page, see
+        # with_search_aggs
+        self._search_aggs = {}
+
+    @classmethod
+    def from_search(cls, es_search, queryset: QuerySet, filter_fields: dict = None):
+        """
+        :param es_search: A django_elasticsearch_dsl Search that has not been sliced yet.
+        :param queryset: The base queryset used to hydrate the search hits.
+        :param filter_fields: Django lookup path -> Elasticsearch field, for filters that can be pushed down.
+        """
+        search_queryset = cls(
+            model=queryset.model,
+            query=queryset.query.chain(),
+            using=queryset._db,
+            hints=queryset._hints,
+        )
+        search_queryset._prefetch_related_lookups = queryset._prefetch_related_lookups[
+            :
+        ]
+        search_queryset._es_search = es_search
+        search_queryset._es_filter_fields = filter_fields or {}
+        return search_queryset
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._es_search = self._es_search
+        clone._es_filter_fields = self._es_filter_fields
+        clone._is_sql_altered = self._is_sql_altered
+        clone._search_window = self._search_window
+        clone._search_source_fields = self._search_source_fields
+        clone._search_aggs = self._search_aggs
+        return clone
+
+    def for_page(self, offset: int, limit: int):
+        """
+        Hint the (offset, limit) window that will be requested so that count() and the page itself are served by
+        the same Elasticsearch request.
+        """
+        clone = self._chain()
+        clone._search_window = (offset, limit)
+        return clone
+
+    def from_search_source(self, *fields):
+        """
+        Serve pages as the `_source` (restricted to the given fields) of the hits, as dicts, without hydrating them
+        from the db. Only pages can be fetched like this, so it should only be used if is_served_by_search_page().
+        """
+        clone = self._chain()
+        clone._search_source_fields = list(fields)
+        return clone
+
+    def with_search_aggs(self, **aggs):
+        """
+        Compute these aggregations of the search hits (e.g. facet counts) with the same request as the page, see
+        get_search_aggregations().
+        """
+        clone = self._chain()
+        clone._search_aggs = {**self._search_aggs, **aggs}
+        return clone
+
+    def _add_search_aggs(self, es_search):
+        es_search = es_search._clone()
+        for name, agg in self._search_aggs.items():
+            es_search.aggs[name] = agg
+        return es_search
+
+    def get_search_aggregations(self) -> dict:
+        """
+        The results of the aggregations (see with_search_aggs) by name, as returned by Elasticsearch. They come with
+        the page if it was fetched from Elasticsearch alone, otherwise they are requested on their own.
+        """
+        if not self._search_aggs:
+            return {}
+        if self._search_page is not None:
+            response = self._search_page[2]
+        else:
+            response = (
+                self._add_search_aggs(self._es_search[0:0])
+                .extra(track_total_hits=False)
+                .execute()
+            )
+        return response.aggs.to_dict()
+
+    def _get_es_filter(self, lookup: str, value):
+        field_path, _, lookup_type = lookup.rpartition('__')
+        if lookup_type not in ('exact', 'in', 'gt', 'gte', 'lt', 'lte'):
+            field_path, lookup_type = lookup, 'exact'
+
+        es_field = self._es_filter_fields.get(field_path)
+        if es_field is None:
+            return None
+
+        if lookup_type == 'exact':
+            return Term(**{es_field: value})
+        elif lookup_type == 'in':
+            return Terms(**{es_field: list(value)})
+        return Range(**{es_field: {lookup_type: value}})
+
+    def _filter_or_exclude(self, negate, args, kwargs):
+        if self._es_search is not None and not negate and not args and kwargs:
+            es_filters = [
+                self._get_es_filter(lookup, value) for lookup, value in kwargs.items()
+            ]
+            if all(es_filter is not None for es_filter in es_filters):
+                clone = self._chain()
+                for es_filter in es_filters:
+                    clone._es_search = clone._es_search.filter(es_filter)
+                return clone
+
+        clone = super()._filter_or_exclude(negate, args, kwargs)
+        clone._is_sql_altered = True
+        return clone
+
+    def order_by(self, *field_names):
+        clone = super().order_by(*field_names)
+        if field_names:
+            clone._is_sql_altered = True
+        return clone
+
+    def distinct(self, *field_names):
+        clone = super().distinct(*field_names)
+        clone._is_sql_altered = True
+        return clone
+
+    def __and__(self, other):
+        if self._es_search is None:
+            return super().__and__(other)
+        return self._get_search_constrained_queryset() & other
+
+    def __or__(self, other):
+        # The search hits have to be resolved before combining, otherwise they would constrain the other side as well
+        if self._es_search is None:
+            return super().__or__(other)
+        return self._get_search_constrained_queryset() | other
+
+    def is_served_by_search_page(self) -> bool:
+        """
+        Whether pages of this queryset can be fetched from Elasticsearch alone, i.e. no SQL-only filtering or ordering
+        has been applied to it.
+        """
+        return (
+            self._es_search is not None
+            and not self._is_sql_altered
+            and not self.query.is_empty()
+            and not self.query.is_sliced
+            and self._iterable_class is ModelIterable
+        )
+
+    def _to_pk(self, es_id):
+        return self.model._meta.pk.to_python(es_id)
+
+    def _execute_search_window(self, offset: int, limit: int) -> tuple:
+        """
+        Returns (total hits count, response with the hits in the window) for the given window.
+        """
+        if self._search_page is None or self._search_page[0] != (offset, limit):
+            es_search = (
+                self._add_search_aggs(self._es_search[offset : offset + limit])
+                .extra(track_total_hits=True)
+                .source(self._search_source_fields or False)
+            )
+            response = es_search.execute()
+            self._search_page = ((offset, limit), response.hits.total.value, response)
+        return self._search_page[1:]
+
+    def _get_all_search_hit_ids(self) -> list:
+        es_search = self._es_search.source(False)
+        es_search = es_search[0 : es_search.count()]
+        return [self._to_pk(hit.meta.id) for hit in es_search.execute()]
+
+    def _as_model_queryset(self) -> QuerySet:
+        queryset = QuerySet(
+            model=self.model,
+            query=self.query.chain(),
+            using=self._db,
+            hints=self._hints,
+        )
+        queryset._prefetch_related_lookups = self._prefetch_related_lookups[:]
+        queryset._known_related_objects = self._known_related_objects
+        queryset._iterable_class = self._iterable_class
+        queryset._fields = self._fields
+        return queryset
+
+    def _get_search_constrained_queryset(self) -> QuerySet:
+        """
+        A plain QuerySet restricted to all search hits, ordered by relevance unless an explicit ordering was applied.
+        """
+        ids = self._get_all_search_hit_ids()
+        queryset = self._as_model_queryset()
+        queryset.query.add_q(Q(pk__in=ids))
+        if ids and not queryset.query.order_by:
+            queryset.query.add_ordering(
+                Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)])
+            )
+        return queryset
+
+    def _hydrate(self, ids: list) -> list:
+        queryset = self._as_model_queryset()
+        queryset.query.add_q(Q(pk__in=ids))
+        position = {pk: i for i, pk in enumerate(ids)}
+        return sorted(queryset, key=lambda instance: position[instance.pk])
+
+    def count(self):
+        if self._es_search is None or self._result_cache is not None:
+            return super().count()
+
+        if not self.is_served_by_search_page():
+            return self._get_search_constrained_queryset().count()
+
+        if self._search_window is not None:
+            total, _ = self._execute_search_window(*self._search_window)
+            return total
+        return self._es_search.count()
+
+    def __getitem__(self, k):
+        if (
+            self._result_cache is None
+            and isinstance(k, slice)
+            and k.step is None
+            and k.stop is not None
+            and self.is_served_by_search_page()
+        ):
+            offset = k.start or 0
+            _, response = self._execute_search_window(offset, k.stop - offset)
+            if self._search_source_fields:
+                # The raw sources, as the hits themselves are deserialized into Documents which drop empty values
+                return [hit['_source'] for hit in response.to_dict()['hits']['hits']]
+            return self._hydrate([self._to_pk(hit.meta.id) for hit in response])
+        return super().__getitem__(k)
+
+    def exists(self):
+        if self._es_search is None or self._result_cache is not None:
+            return super().exists()
+        return self._get_search_constrained_queryset().exists()
+
+    def iterator(self, chunk_size=2000):
+        if self._es_search is None:
+            return super().iterator(chunk_size)
+        return self._get_search_constrained_queryset().iterator(chunk_size)
+
+    def update(self, **kwargs):
+        if self._es_search is None:
+            return super().update(**kwargs)
+        return self._get_search_constrained_queryset().update(**kwargs)
+
+    def delete(self):
+        if self._es_search is None:
+            return super().delete()
+        return self._get_search_constrained_queryset().delete()
+
+    def _fetch_all(self):
+        if self._result_cache is None and self._es_search is not None:
+            self._result_cache = list(self._get_search_constrained_queryset())
+            self._prefetch_done = True
+        super()._fetch_all()
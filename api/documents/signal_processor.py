@@ -0,0 +1,111 @@
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+from django_elasticsearch_dsl.apps import DEDConfig
+from django_elasticsearch_dsl.registries import registry
+from django_elasticsearch_dsl.signals import BaseSignalProcessor
+
+from api.models.search_index_queue import (
+    enqueue_search_index_updates,
+    sync_search_documents,
+)
+
+
+class QueuedSignalProcessor(BaseSignalProcessor):
+    """
+    A signal processor that doesn't talk to Elasticsearch while handling writes. It only queues the instances (and the
+    instances of other models whose documents include them) whose documents need an update, which
+    process_search_index_queue then sends in bulk.
+
+    Enabled with settings.ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = 'api.documents.signal_processor.QueuedSignalProcessor'
+    """
+
+    def setup(self):
+        models.signals.post_save.connect(self.handle_save)
+        models.signals.post_delete.connect(self.handle_delete)
+        models.signals.m2m_changed.connect(self.handle_m2m_changed)
+        models.signals.pre_delete.connect(self.handle_pre_delete)
+
+    def teardown(self):
+        models.signals.post_save.disconnect(self.handle_save)
+        models.signals.post_delete.disconnect(self.handle_delete)
+        models.signals.m2m_changed.disconnect(self.handle_m2m_changed)
+        models.signals.pre_delete.disconnect(self.handle_pre_delete)
+
+    @staticmethod
+    def _is_indexed(model) -> bool:
+        return any(
+            not document.django.ignore_signals
+            for document in registry.get_documents([model])
+        )
+
+    @staticmethod
+    def _get_related_object_ids(instance) -> dict:
+        """
+        The ids of the instances of other models whose documents include `instance`, by model. Related querysets
+        (e.g. all the assets of a renamed tag) are resolved with a single query for their ids per relation, the
+        instances themselves are only loaded once their documents are built.
+        """
+        object_ids_by_model = defaultdict(set)
+        for document in registry._get_related_doc(instance):
+            try:
+                related = document().get_instances_from_related(instance)
+            except ObjectDoesNotExist:
+                related = None
+            if related is None:
+                continue
+
+            if isinstance(related, models.Model):
+                object_ids = [related.pk]
+            elif isinstance(related, models.QuerySet):
+                object_ids = related.order_by().values_list('pk', flat=True)
+            else:
+                object_ids = [related_instance.pk for related_instance in related]
+            object_ids_by_model[document.django.model].update(object_ids)
+        return object_ids_by_model
+
+    def handle_save(self, sender, instance, **kwargs):
+        if not DEDConfig.autosync_enabled():
+            return
+        object_ids_by_model = self._get_related_object_ids(instance)
+        if self._is_indexed(instance.__class__):
+            object_ids_by_model[instance.__class__].add(instance.pk)
+        enqueue_search_index_updates(object_ids_by_model)
+
+    def handle_pre_delete(self, sender, instance, **kwargs):
+        # The related instances can only be found before the instance is deleted, they are indexed once it's gone
+        if not DEDConfig.autosync_enabled():
+            return
+        enqueue_search_index_updates(self._get_related_object_ids(instance))
+
+    def handle_delete(self, sender, instance, **kwargs):
+        if not DEDConfig.autosync_enabled():
+            return
+        if self._is_indexed(instance.__class__):
+            enqueue_search_index_updates({instance.__class__: [instance.pk]})
+
+
+def update_search_documents(model, object_ids) -> None:
+    """
+    Re-indexes the given instances, for writes that don't send signals (e.g. QuerySet.update()): they are queued if
+    QueuedSignalProcessor is used, otherwise their documents are updated right away with one bulk request each.
+    """
+    if not DEDConfig.autosync_enabled():
+        return
+    if isinstance(
+        apps.get_app_config('django_elasticsearch_dsl').signal_processor,
+        QueuedSignalProcessor,
+    ):
+        enqueue_search_index_updates({model: object_ids})
+    else:
+        errors_by_object_id = sync_search_documents(model, object_ids)
+        if errors_by_object_id:
+            raise RuntimeError(
+                'Failed to update the search documents of {} {} objects: {}'.format(
+                    len(errors_by_object_id),
+                    model._meta.label_lower,
+                    list(errors_by_object_id.items())[:3],
+                )
+            )
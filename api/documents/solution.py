@@ -4,6 +4,7 @@ from django_elasticsearch_dsl.registries import registry
 
 from api.documents.common import html_strip
 from api.models import Solution, Tag
+from api.serializers.solution import SolutionSuggestionSerializer
 
 
 @registry.register_document
@@ -24,8 +25,19 @@ class SolutionDocument(Document):
         search = search[0 : search.count()]
         return search
 
+    @classmethod
+    def paginated_search(cls, using=None, index=None):
+        """
+        Unlike search() this does not fetch every hit, it is meant to be sliced to the page being requested, which
+        is what api.documents.search_queryset.SearchQuerySet does.
+        """
+        return super().search(using, index)
+
     title = fields.TextField(analyzer=html_strip, fields={'raw': fields.KeywordField()})
 
+    # Indexed so that the search filters can be applied by Elasticsearch itself (see SolutionViewSet)
+    livemode = fields.BooleanField(attr='livemode')
+
     tags = fields.NestedField(
         include_in_root=True,
         properties={
@@ -36,6 +48,9 @@ class SolutionDocument(Document):
         },
     )
 
+    # The payload returned by /autocomplete-solutions/ for this hit, only stored and not indexed
+    suggestion = fields.ObjectField(enabled=False)
+
     class Index:
         # Name of the Elasticsearch index
         name = 'solution'
@@ -47,7 +62,7 @@ class SolutionDocument(Document):
         related_models = [Tag]
         # The fields of the model you want to be indexed in Elasticsearch,
         # other than the ones already used in the Document class
-        fields = []
+        fields = ['is_searchable']
 
         # Ignore auto updating of Elasticsearch when a model is saved
         # or deleted:
@@ -58,7 +73,7 @@ class SolutionDocument(Document):
 
         # Paginate the django queryset used to populate the index with the specified size
         # (by default it uses the database driver's default setting)
-        # queryset_pagination = 5000
+        queryset_pagination = 500
 
     def get_queryset(self):
         return (
@@ -68,6 +83,10 @@ class SolutionDocument(Document):
             .select_related('stripe_product', 'stripe_primary_price')
         )
 
+    def prepare_suggestion(self, instance):
+        return SolutionSuggestionSerializer(instance).data
+
     def get_instances_from_related(self, related_instance):
-        if isinstance(related_instance, Solution):
-            return related_instance.tags.all()
+        # Tags are the only related model, their solutions have to be re-indexed when they are renamed or deleted
+        if isinstance(related_instance, Tag):
+            return related_instance.solutions.all()
@@ -2,7 +2,8 @@ from django_elasticsearch_dsl.documents import Document
 from django_elasticsearch_dsl import fields
 from django_elasticsearch_dsl.registries import registry
 
-from api.models import SolutionQuestion
+from api.models import Solution, SolutionQuestion
+from api.serializers.solution_question import SolutionQuestionSerializer
 
 
 @registry.register_document
@@ -12,6 +13,11 @@ class SolutionQuestionDocument(Document):
     """
 
     title = fields.SearchAsYouTypeField()
+    # Autocomplete only suggests the questions of one solution
+    solution_id = fields.IntegerField(attr='solution_id')
+    solution_slug = fields.KeywordField(attr='solution.slug')
+    # The payload returned by autocomplete for this hit, only stored and not indexed
+    suggestion = fields.ObjectField(enabled=False)
 
     class Index:
         # Name of the Elasticsearch index
@@ -21,6 +27,7 @@ class SolutionQuestionDocument(Document):
 
     class Django:
         model = SolutionQuestion
+        related_models = [Solution]
         # The fields of the model you want to be indexed in Elasticsearch,
         # other than the ones already used in the Document class
         fields = []
@@ -35,3 +42,17 @@ class SolutionQuestionDocument(Document):
         # Paginate the django queryset used to populate the index with the specified size
         # (by default it uses the database driver's default setting)
         # queryset_pagination = 5000
+
+    def get_queryset(self):
+        return (
+            super(SolutionQuestionDocument, self)
+            .get_queryset()
+            .select_related('solution')
+        )
+
+    def prepare_suggestion(self, instance):
+        return SolutionQuestionSerializer(instance).data
+
+    def get_instances_from_related(self, related_instance):
+        if isinstance(related_instance, Solution):
+            return related_instance.questions.all()
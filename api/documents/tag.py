@@ -3,6 +3,7 @@ from django_elasticsearch_dsl import fields
 from django_elasticsearch_dsl.registries import registry
 
 from api.models import Tag
+from api.serializers.tag import TagSerializer
 
 
 @registry.register_document
@@ -12,6 +13,8 @@ class TagDocument(Document):
     """
 
     name = fields.SearchAsYouTypeField()
+    # The payload returned by autocomplete for this hit, only stored and not indexed
+    suggestion = fields.ObjectField(enabled=False)
 
     class Index:
         # Name of the Elasticsearch index
@@ -34,4 +37,7 @@ class TagDocument(Document):
 
         # Paginate the django queryset used to populate the index with the specified size
         # (by default it uses the database driver's default setting)
-        # queryset_pagination = 5000
+        queryset_pagination = 2000
+
+    def prepare_suggestion(self, instance):
+        return TagSerializer(instance).data
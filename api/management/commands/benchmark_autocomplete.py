@@ -0,0 +1,74 @@
+"""
+Example Usage:
+
+    python manage.py benchmark_autocomplete --queries mail crm analytics --repeat 50
+"""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.documents.asset import AssetDocument
+from api.documents.tag import TagDocument
+from api.views.common import extract_results_from_matching_query
+from api.views.tag import _es_search_asset_and_tag
+
+
+def _sequential_searches(q):
+    """
+    How autocomplete_assets_and_tags used to query Elasticsearch: two searches executed one after the other, the
+    asset one preceded by a count request.
+    """
+    extract_results_from_matching_query(
+        TagDocument.search().query('match_phrase_prefix', name=q), case='tag'
+    )
+    extract_results_from_matching_query(
+        AssetDocument.search().query('match_phrase_prefix', name=q),
+        case='asset_name_and_slug',
+    )
+
+
+def _multi_search(q):
+    tags_response, assets_response = _es_search_asset_and_tag(q)
+    extract_results_from_matching_query(tags_response, case='tag')
+    extract_results_from_matching_query(assets_response, case='asset_name_and_slug')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the latency of the Elasticsearch queries of autocomplete_assets_and_tags (single _msearch) with the'
+        ' sequential searches it used to make, against the configured Elasticsearch cluster.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queries', nargs='+', default=['ma', 'mail', 'crm', 'analytics']
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        for name, run_search in (
+            ('sequential searches', _sequential_searches),
+            ('single _msearch', _multi_search),
+        ):
+            # Warm up the connection and the caches of the cluster so that both paths are compared alike
+            run_search(options['queries'][0])
+
+            timings_ms = []
+            for _ in range(options['repeat']):
+                for q in options['queries']:
+                    start = time.perf_counter()
+                    run_search(q)
+                    timings_ms.append((time.perf_counter() - start) * 1000)
+
+            timings_ms.sort()
+            self.stdout.write(
+                '{}: mean {:.2f} ms, p50 {:.2f} ms, p95 {:.2f} ms ({} requests)'.format(
+                    name,
+                    statistics.mean(timings_ms),
+                    timings_ms[len(timings_ms) // 2],
+                    timings_ms[int(len(timings_ms) * 0.95)],
+                    len(timings_ms),
+                )
+            )
@@ -0,0 +1,56 @@
+"""
+Example Usage:
+
+    python manage.py benchmark_request_signals --requests 100000
+"""
+
+import time
+import weakref
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+
+
+def _get_receiver_names(signal) -> list:
+    names = []
+    for _, receiver_ref in signal.receivers:
+        receiver = (
+            receiver_ref()
+            if isinstance(receiver_ref, weakref.ReferenceType)
+            else receiver_ref
+        )
+        if receiver is not None:
+            names.append('{}.{}'.format(receiver.__module__, receiver.__qualname__))
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the overhead that the receivers of the request lifecycle signals (request_started and '
+        'request_finished) add to every request handled by a worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        for signal_name, signal in (
+            ('request_started', request_started),
+            ('request_finished', request_finished),
+        ):
+            receiver_names = _get_receiver_names(signal)
+            start = time.perf_counter()
+            for _ in range(options['requests']):
+                signal.send(sender=WSGIHandler)
+            duration = time.perf_counter() - start
+
+            self.stdout.write(
+                '{}: {} receivers, {:.2f} µs per request'.format(
+                    signal_name,
+                    len(receiver_names),
+                    duration / options['requests'] * 1_000_000,
+                )
+            )
+            for receiver_name in receiver_names:
+                self.stdout.write('    {}'.format(receiver_name))
@@ -0,0 +1,138 @@
+"""
+Example Usage:
+
+    python manage.py benchmark_search_backends --queries mail crm "email marketing" --repeat 50
+    python manage.py benchmark_search_backends --query-log /var/log/nginx/access.log --backends elasticsearch postgres
+"""
+
+import re
+import statistics
+import time
+from urllib.parse import unquote_plus
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.documents.asset import AssetDocument
+from api.documents.local_search import (
+    get_local_search_index,
+    use_local_search_backend,
+)
+from api.views.asset import AssetViewSet
+
+LOCAL_SEARCH_ALIAS = 'local'
+BACKENDS = ['elasticsearch', 'local', 'postgres']
+
+# The search query of an /assets/?q= request in an access log line
+ASSET_SEARCH_QUERY_REGEX = re.compile(r'/assets/\?(?:[^\s"]*&)?q=([^&\s"]*)')
+
+
+def _search_asset_ids(q: str, backend: str) -> list:
+    if backend == 'postgres':
+        queryset = AssetViewSet._get_assets_db_qs_via_postgres_query(q).filter(
+            is_published=True
+        )
+        return [str(pk) for pk in queryset.values_list('pk', flat=True)[:10]]
+
+    es_search = AssetViewSet._get_assets_es_search(q).filter('term', is_published=True)
+    using = LOCAL_SEARCH_ALIAS if backend == 'local' else 'default'
+    return [hit.meta.id for hit in es_search.using(using)[:10].execute()]
+
+
+def read_query_log(path: str) -> list:
+    """
+    The distinct search queries of a query log: either an access log (the q parameter of its /assets/ requests) or a
+    file with one query per line.
+    """
+    queries = []
+    with open(path) as query_log:
+        for line in query_log:
+            match = ASSET_SEARCH_QUERY_REGEX.search(line)
+            if match:
+                query = unquote_plus(match.group(1))
+            elif ' HTTP/' in line:
+                # Other requests of an access log
+                continue
+            else:
+                query = line
+            query = query.strip()
+            if query and query not in queries:
+                queries.append(query)
+    return queries
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the asset search of /assets/?q= served by the configured Elasticsearch cluster, the local search '
+        'backend (see api.documents.local_search) and Postgres full-text search (the failover of the view): latency, '
+        'and overlap of their top 10 hits with the Elasticsearch ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queries',
+            nargs='+',
+            default=['mail', 'crm', 'analytics', 'email marketing automation'],
+        )
+        parser.add_argument(
+            '--query-log',
+            help='Benchmark the queries of this access log (or file with one query per line) instead of --queries',
+        )
+        parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        queries = options['queries']
+        if options['query_log']:
+            queries = read_query_log(options['query_log'])
+            if not queries:
+                raise CommandError(
+                    'No search queries found in {}'.format(options['query_log'])
+                )
+
+        if 'local' in options['backends']:
+            use_local_search_backend(LOCAL_SEARCH_ALIAS)
+            # Build the local index before timing it, as it would already be built in a long running process
+            get_local_search_index(AssetDocument)
+
+        top_hits = {}
+        for backend in options['backends']:
+            # Warm up the connection and the caches of the cluster so that the backends are compared alike
+            top_hits[backend] = {q: _search_asset_ids(q, backend) for q in queries}
+
+            timings_ms = []
+            for _ in range(options['repeat']):
+                for q in queries:
+                    start = time.perf_counter()
+                    _search_asset_ids(q, backend)
+                    timings_ms.append((time.perf_counter() - start) * 1000)
+
+            timings_ms.sort()
+            self.stdout.write(
+                '{}: mean {:.2f} ms, p50 {:.2f} ms, p95 {:.2f} ms ({} requests)'.format(
+                    backend,
+                    statistics.mean(timings_ms),
+                    timings_ms[len(timings_ms) // 2],
+                    timings_ms[int(len(timings_ms) * 0.95)],
+                    len(timings_ms),
+                )
+            )
+
+        if 'elasticsearch' not in top_hits:
+            return
+        for backend in [backend for backend in top_hits if backend != 'elasticsearch']:
+            overlaps = []
+            for q in queries:
+                elasticsearch_ids = top_hits['elasticsearch'][q]
+                backend_ids = top_hits[backend][q]
+                if elasticsearch_ids:
+                    overlaps.append(
+                        len(set(elasticsearch_ids) & set(backend_ids))
+                        / len(elasticsearch_ids)
+                    )
+            self.stdout.write(
+                '{}: {:.0%} of the top Elasticsearch hits in its top 10 on average ({} queries with hits)'.format(
+                    backend,
+                    statistics.mean(overlaps) if overlaps else 0,
+                    len(overlaps),
+                )
+            )
@@ -0,0 +1,95 @@
+"""
+Example Usage:
+
+    python manage.py benchmark_throttle --limits 2000 100000 --requests 1000
+"""
+
+import pickle
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from rest_framework.throttling import UserRateThrottle
+
+from api.throttling import SlidingWindowRateThrottle
+
+DURATION = 86400
+
+
+def _fill_list_history(throttle, request, count: int) -> None:
+    # The timestamps of `count` requests made earlier in the window, newest first
+    now = throttle.timer()
+    throttle.cache.set(
+        throttle.get_cache_key(request, None), [now - 1] * count, DURATION
+    )
+
+
+def _fill_window_counts(throttle, request, count: int) -> None:
+    throttle.key = throttle.get_cache_key(request, None)
+    window = int(throttle.timer() // DURATION)
+    throttle.cache.set(throttle._get_window_key(window), count, 2 * DURATION)
+
+
+def _get_stored_bytes(throttle, request) -> int:
+    key = throttle.get_cache_key(request, None)
+    window = int(throttle.timer() // DURATION)
+    values = [
+        throttle.cache.get(key),
+        throttle.cache.get('{}:{}'.format(key, window)),
+        throttle.cache.get('{}:{}'.format(key, window - 1)),
+    ]
+    return sum(len(pickle.dumps(value)) for value in values if value is not None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the per-request cost of DRF's user rate throttle (a list of the timestamps of the requests of the "
+        "window, as SubscriptionDailyRateThrottle used to keep) with SlidingWindowRateThrottle (two counts), for "
+        "users close to their daily limit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limits', type=int, nargs='+', default=[2000, 100000])
+        parser.add_argument('--requests', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        implementations = [
+            ('list', UserRateThrottle, _fill_list_history),
+            ('sliding window', SlidingWindowRateThrottle, _fill_window_counts),
+        ]
+        for limit in options['limits']:
+            requests = min(options['requests'], limit)
+            for user_id, (name, throttle_class, fill) in enumerate(implementations):
+                request = SimpleNamespace(
+                    user=SimpleNamespace(
+                        pk='benchmark-{}-{}'.format(limit, user_id),
+                        is_authenticated=True,
+                    ),
+                    META={},
+                )
+                throttle = throttle_class()
+                throttle.num_requests, throttle.duration = limit, DURATION
+                throttle.cache.delete(throttle.get_cache_key(request, None))
+                fill(throttle, request, limit - requests)
+
+                timings_us = []
+                for _ in range(requests):
+                    throttle = throttle_class()
+                    throttle.num_requests, throttle.duration = limit, DURATION
+                    start = time.perf_counter()
+                    allowed = throttle.allow_request(request, None)
+                    timings_us.append((time.perf_counter() - start) * 1_000_000)
+                    assert allowed
+
+                timings_us.sort()
+                self.stdout.write(
+                    '{}/day, {}: mean {:.1f} µs, p50 {:.1f} µs, p95 {:.1f} µs, {} bytes cached per user'.format(
+                        limit,
+                        name,
+                        statistics.mean(timings_us),
+                        timings_us[len(timings_us) // 2],
+                        timings_us[int(len(timings_us) * 0.95)],
+                        _get_stored_bytes(throttle, request),
+                    )
+                )
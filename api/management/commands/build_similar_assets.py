@@ -0,0 +1,17 @@
+"""
+Example Usage:
+
+    python manage.py build_similar_assets
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.models.similar_asset import build_similar_assets
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the precomputed similar assets of all assets (served by /assets/similar/).'
+
+    def handle(self, *args, **kwargs):
+        rows_count = build_similar_assets()
+        self.stdout.write('Stored {} similar asset rows'.format(rows_count))
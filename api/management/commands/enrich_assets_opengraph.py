@@ -0,0 +1,22 @@
+"""
+Example Usage:
+
+    python manage.py enrich_assets_opengraph
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.models.opengraph_enrichment_job import process_opengraph_enrichment_jobs
+
+
+class Command(BaseCommand):
+    help = 'Runs the queued OpenGraph enrichment jobs of assets until none are due (e.g. right after an import).'
+
+    def handle(self, *args, **kwargs):
+        jobs_count = 0
+        while True:
+            batch_jobs_count = process_opengraph_enrichment_jobs()
+            if not batch_jobs_count:
+                break
+            jobs_count += batch_jobs_count
+        self.stdout.write('Ran {} OpenGraph enrichment jobs'.format(jobs_count))
@@ -6,7 +6,9 @@ Example Usage:
 
 from django.core.management.base import BaseCommand
 
+from api.documents.signal_processor import update_search_documents
 from api.models import Tag, Asset, LinkedTag
+from api.models.linked_tag import refresh_asset_tag_ids
 
 
 def _merge_tags(t1, t2):
@@ -16,8 +18,12 @@ def _merge_tags(t1, t2):
     bad_tag = Tag.objects.get(name=t1)
     good_tag = Tag.objects.get(name=t2)
     linked_tags_qs = LinkedTag.objects.filter(tag=bad_tag)
+    asset_ids = list(linked_tags_qs.values_list('asset_id', flat=True))
     linked_tags_qs.update(tag=good_tag)
     bad_tag.delete()
+    # The bulk update doesn't send any signals
+    refresh_asset_tag_ids(asset_ids)
+    update_search_documents(Asset, asset_ids)
 
 
 class Command(BaseCommand):
@@ -0,0 +1,54 @@
+"""
+Example Usage:
+
+    python manage.py process_search_index_queue
+    python manage.py process_search_index_queue --once
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models.search_index_queue import (
+    get_search_index_queue_stats,
+    process_search_index_queue,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Sends the queued search index updates to Elasticsearch, as a standalone worker (instead of the runapscheduler '
+        'job) or just once (e.g. right after an import).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once no queued update is due instead of waiting for new ones',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Seconds to wait when no queued update is due',
+        )
+
+    def handle(self, *args, **kwargs):
+        while True:
+            objects_count = 0
+            while True:
+                batch_objects_count = process_search_index_queue()
+                if not batch_objects_count:
+                    break
+                objects_count += batch_objects_count
+
+            if objects_count or kwargs['once']:
+                self.stdout.write(
+                    'Re-indexed {} objects, queue: {}'.format(
+                        objects_count, get_search_index_queue_stats()
+                    )
+                )
+            if kwargs['once']:
+                break
+            time.sleep(kwargs['interval'])
@@ -0,0 +1,48 @@
+"""
+Example Usage:
+
+    python manage.py reconcile_counters --dry-run
+    python manage.py reconcile_counters --batch-size 500
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.utils.denormalized_counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the denormalized counters (vote and review counts, average ratings, pending bookings...) from the '
+        'rows they count, corrects the ones that drifted and reports the drift of each counter.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the drift, without correcting it',
+        )
+
+    def handle(self, *args, **options):
+        drift_stats = reconcile_counters(
+            batch_size=options['batch_size'], dry_run=options['dry_run']
+        )
+        for counter, stats in drift_stats.items():
+            self.stdout.write(
+                '{}: {} of {} rows drifted (total drift {}, max drift {})'.format(
+                    counter,
+                    stats['drifted_rows'],
+                    stats['rows'],
+                    stats['total_drift'],
+                    stats['max_drift'],
+                )
+            )
+
+        drifted_rows = sum(stats['drifted_rows'] for stats in drift_stats.values())
+        if options['dry_run']:
+            self.stdout.write('{} counter values to correct'.format(drifted_rows))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS('Corrected {} counter values'.format(drifted_rows))
+            )
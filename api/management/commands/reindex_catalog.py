@@ -0,0 +1,238 @@
+"""
+Example Usage:
+
+    python manage.py reindex_catalog
+    python manage.py reindex_catalog asset solution tag --processes 4 --threads 4 --chunk-size 500
+"""
+
+import multiprocessing
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django_elasticsearch_dsl.registries import registry
+from elasticsearch.helpers import parallel_bulk, streaming_bulk
+
+from api.models.search_index_queue import search_index_queue_lock
+
+# Number of rows loaded per query when the document doesn't set queryset_pagination
+DEFAULT_QUERYSET_PAGINATION = 1000
+
+# Document instances of the current (worker) process, by index name
+_documents = {}
+
+
+def _get_document(index_name: str):
+    if index_name not in _documents:
+        document_class = next(
+            document_class
+            for document_class in registry.get_documents()
+            if document_class._index._name == index_name
+        )
+        _documents[index_name] = document_class()
+    return _documents[index_name]
+
+
+def _stream_pk_chunks(document, chunk_size: int):
+    # A server side cursor streams the primary keys, the rows themselves are loaded (with their prefetched relations,
+    # which QuerySet.iterator() doesn't support) chunk by chunk, possibly in other processes.
+    pks = (
+        document.get_queryset()
+        .order_by('pk')
+        .values_list('pk', flat=True)
+        .iterator(chunk_size=chunk_size)
+    )
+    while True:
+        chunk = list(islice(pks, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _prepare_actions(index_name_and_pks: tuple) -> list:
+    index_name, pks = index_name_and_pks
+    document = _get_document(index_name)
+    return list(
+        document._get_actions(document.get_queryset().filter(pk__in=pks), 'index')
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds search indexes without any downtime, unlike search_index --rebuild: each index is built in a new '
+        'versioned index (e.g. asset-20220301120000) while the current one is still searched, and then the index name '
+        '(an alias) is atomically swapped to the new one. Queued search index updates are applied once it is done.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'indexes',
+            nargs='*',
+            help='Names of the indexes to rebuild, all of them by default',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count(),
+            help='Number of processes preparing the documents (1 to prepare them in this process)',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Number of concurrent bulk requests (1 to send them from this thread)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of documents per bulk request',
+        )
+        parser.add_argument(
+            '--keep-old',
+            action='store_true',
+            help='Keep the replaced indexes instead of deleting them (e.g. to swap back to them)',
+        )
+
+    def handle(self, *args, **options):
+        documents = {
+            document_class._index._name: document_class()
+            for document_class in registry.get_documents()
+        }
+        index_names = options['indexes'] or sorted(documents)
+        unknown_index_names = set(index_names) - set(documents)
+        if unknown_index_names:
+            raise CommandError(
+                'Unknown indexes: {}'.format(', '.join(sorted(unknown_index_names)))
+            )
+
+        pool = None
+        if options['processes'] > 1:
+            # The forked processes must not share the db connections of this one
+            connections.close_all()
+            pool = multiprocessing.get_context('fork').Pool(options['processes'])
+
+        try:
+            # The updates queued while the indexes are rebuilt must be applied to the new indexes, which only become
+            # the ones written to once they are swapped in.
+            with search_index_queue_lock():
+                for index_name in index_names:
+                    self._reindex(documents[index_name], pool, options)
+        finally:
+            if pool:
+                pool.terminate()
+
+    def _reindex(self, document, pool, options):
+        alias = document._index._name
+        client = document._get_connection()
+        new_index_name = '{}-{}'.format(alias, timezone.now().strftime('%Y%m%d%H%M%S'))
+        new_index = document._index.clone(name=new_index_name)
+        # Refreshing the new index while it isn't searched yet is only a waste
+        new_index.settings(refresh_interval='-1')
+        new_index.create()
+
+        start = time.monotonic()
+        try:
+            docs_count = self._build_index(document, new_index_name, pool, options)
+        except BaseException:
+            # e.g. failed documents, a lost connection or an interruption, the current index is kept
+            client.indices.delete(index=new_index_name, ignore=[404])
+            raise
+        duration = time.monotonic() - start
+
+        replaced_index_names = self._swap_alias(client, alias, new_index_name)
+        if not options['keep_old']:
+            for replaced_index_name in replaced_index_names:
+                client.indices.delete(index=replaced_index_name)
+
+        self.stdout.write(
+            '{}: indexed {} documents in {:.1f}s ({:.0f} docs/sec) into {}, replaced {}'.format(
+                alias,
+                docs_count,
+                duration,
+                docs_count / duration if duration else 0,
+                new_index_name,
+                ', '.join(replaced_index_names) or 'nothing',
+            )
+        )
+
+    @staticmethod
+    def _build_index(document, new_index_name: str, pool, options) -> int:
+        """
+        Indexes all the documents into the new index, returns their number.
+        """
+        alias = document._index._name
+        client = document._get_connection()
+        pk_chunks = (
+            (alias, pks)
+            for pks in _stream_pk_chunks(
+                document,
+                document.django.queryset_pagination or DEFAULT_QUERYSET_PAGINATION,
+            )
+        )
+        action_chunks = (
+            pool.imap_unordered(_prepare_actions, pk_chunks)
+            if pool
+            else map(_prepare_actions, pk_chunks)
+        )
+        actions = (
+            dict(action, _index=new_index_name)
+            for action_chunk in action_chunks
+            for action in action_chunk
+        )
+        docs_count = 0
+        errors = []
+        if options['threads'] > 1:
+            # The actions are then consumed (and so the rows loaded) by a thread of parallel_bulk
+            results = parallel_bulk(
+                client,
+                actions,
+                thread_count=options['threads'],
+                chunk_size=options['chunk_size'],
+                raise_on_error=False,
+            )
+        else:
+            results = streaming_bulk(
+                client, actions, chunk_size=options['chunk_size'], raise_on_error=False
+            )
+        for ok, item in results:
+            if ok:
+                docs_count += 1
+            else:
+                errors.append(item)
+
+        if errors:
+            raise CommandError(
+                'Failed to index {} {} documents, kept the current index: {}'.format(
+                    len(errors), alias, errors[:3]
+                )
+            )
+
+        client.indices.put_settings(
+            index=new_index_name, body={'index': {'refresh_interval': None}}
+        )
+        client.indices.refresh(index=new_index_name)
+        return docs_count
+
+    @staticmethod
+    def _swap_alias(client, alias: str, new_index_name: str) -> list:
+        """
+        Points the alias to the new index only, in one atomic request, and returns the names of the indexes it pointed
+        to before.
+        """
+        actions = [{'add': {'index': new_index_name, 'alias': alias}}]
+        replaced_index_names = []
+        if client.indices.exists_alias(name=alias):
+            replaced_index_names = sorted(client.indices.get_alias(name=alias))
+            actions += [
+                {'remove': {'index': index_name, 'alias': alias}}
+                for index_name in replaced_index_names
+            ]
+        elif client.indices.exists(index=alias):
+            # An index built by search_index, it has to be deleted for the alias to take its name
+            actions.append({'remove_index': {'index': alias}})
+        client.indices.update_aliases(body={'actions': actions})
+        return replaced_index_names
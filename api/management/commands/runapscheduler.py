@@ -4,12 +4,21 @@ from django.conf import settings
 
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from django.core.management.base import BaseCommand
 from django_apscheduler.jobstores import DjangoJobStore
 from django_apscheduler.models import DjangoJobExecution
 from django_apscheduler import util
 
 from api.management.commands import generate_sitemap_full
+from api.models.counter_shard import roll_up_counter_shards
+from api.models.opengraph_enrichment_job import process_opengraph_enrichment_jobs
+from api.models.search_index_queue import process_search_index_queue
+from api.models.similar_asset import (
+    build_similar_assets,
+    process_similar_assets_queue,
+)
+from api.utils.denormalized_counters import reconcile_counters
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +44,65 @@ def delete_old_job_executions(max_age=604_800):
     DjangoJobExecution.objects.delete_old_job_executions(max_age)
 
 
+@util.close_old_connections
+def rebuild_similar_assets():
+    """
+    The similar assets are updated incrementally as tags change, a nightly rebuild also catches up with the tag
+    weights that drift in between.
+    """
+    build_similar_assets()
+
+
+@util.close_old_connections
+def run_similar_assets_queue():
+    """
+    Updates the similar assets of the assets whose tags changed since the last run.
+    """
+    while process_similar_assets_queue():
+        pass
+
+
+@util.close_old_connections
+def run_opengraph_enrichment_jobs():
+    """
+    Enriches the assets saved since the last run with the OpenGraph description/image of their website.
+    """
+    process_opengraph_enrichment_jobs()
+
+
+@util.close_old_connections
+def run_search_index_queue():
+    """
+    Sends the queued search index updates to Elasticsearch.
+    """
+    while process_search_index_queue():
+        pass
+
+
+@util.close_old_connections
+def run_counter_shards_rollup():
+    """
+    Adds the pending changes of the sharded counters (e.g. upvote counts) to the counter columns.
+    """
+    roll_up_counter_shards()
+
+
+@util.close_old_connections
+def reconcile_denormalized_counters():
+    """
+    Corrects the denormalized counters that drifted from the rows they count, e.g. through bulk writes that bypass
+    the signals maintaining them.
+    """
+    for counter, stats in reconcile_counters().items():
+        if stats['drifted_rows']:
+            logger.warning(
+                "Corrected %s rows of %s (total drift %s).",
+                stats['drifted_rows'],
+                counter,
+                stats['total_drift'],
+            )
+
+
 class Command(BaseCommand):
     help = "Runs APScheduler."
 
@@ -53,6 +121,60 @@ class Command(BaseCommand):
         )
         logger.info("Added weekly job: 'delete_old_job_executions'.")
 
+        scheduler.add_job(
+            rebuild_similar_assets,
+            trigger=CronTrigger(hour="03", minute="00"),  # Every day at 3:00 a.m.
+            id="rebuild_similar_assets",
+            max_instances=1,
+            replace_existing=True,
+        )
+        logger.info("Added daily job: 'rebuild_similar_assets'.")
+
+        scheduler.add_job(
+            run_similar_assets_queue,
+            trigger=IntervalTrigger(seconds=settings.SIMILAR_ASSETS_QUEUE_INTERVAL),
+            id="run_similar_assets_queue",
+            max_instances=1,
+            replace_existing=True,
+        )
+        logger.info("Added job: 'run_similar_assets_queue'.")
+
+        scheduler.add_job(
+            reconcile_denormalized_counters,
+            trigger=CronTrigger(hour="04", minute="00"),  # Every day at 4:00 a.m.
+            id="reconcile_denormalized_counters",
+            max_instances=1,
+            replace_existing=True,
+        )
+        logger.info("Added daily job: 'reconcile_denormalized_counters'.")
+
+        scheduler.add_job(
+            run_opengraph_enrichment_jobs,
+            trigger=CronTrigger(minute="*"),  # Every minute
+            id="run_opengraph_enrichment_jobs",
+            max_instances=1,
+            replace_existing=True,
+        )
+        logger.info("Added minutely job: 'run_opengraph_enrichment_jobs'.")
+
+        scheduler.add_job(
+            run_search_index_queue,
+            trigger=IntervalTrigger(seconds=5),  # Every 5 seconds
+            id="run_search_index_queue",
+            max_instances=1,
+            replace_existing=True,
+        )
+        logger.info("Added job: 'run_search_index_queue'.")
+
+        scheduler.add_job(
+            run_counter_shards_rollup,
+            trigger=IntervalTrigger(seconds=settings.COUNTER_SHARDS_ROLLUP_INTERVAL),
+            id="run_counter_shards_rollup",
+            max_instances=1,
+            replace_existing=True,
+        )
+        logger.info("Added job: 'run_counter_shards_rollup'.")
+
         try:
             logger.info("Starting scheduler...")
             scheduler.start()
@@ -0,0 +1,17 @@
+class RateLimitHeadersMiddleware:
+    """
+    Sends the rate limit state recorded by api.throttling.SlidingWindowRateThrottle as the X-RateLimit-Limit,
+    X-RateLimit-Remaining and X-RateLimit-Reset (epoch seconds) headers of the response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        rate_limit = getattr(request, 'rate_limit', None)
+        if rate_limit is not None:
+            response['X-RateLimit-Limit'] = rate_limit['limit']
+            response['X-RateLimit-Remaining'] = rate_limit['remaining']
+            response['X-RateLimit-Reset'] = int(rate_limit['reset'])
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0136_auto_20220222_1545'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_asset_links', to='api.asset')),
+                ('similar_asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.asset')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='similarasset',
+            index=models.Index(fields=['asset', '-score'], name='api_similar_asset_i_0f5f41_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='similarasset',
+            unique_together={('asset', 'similar_asset')},
+        ),
+    ]
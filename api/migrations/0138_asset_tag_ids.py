@@ -0,0 +1,32 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:05
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0137_similar_asset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='tag_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.RunSQL(
+            sql=(
+                "UPDATE api_asset SET tag_ids = COALESCE("
+                "(SELECT array_agg(DISTINCT tag_id ORDER BY tag_id) FROM api_linkedtag"
+                " WHERE api_linkedtag.asset_id = api_asset.id), '{}')"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tag_ids'], name='api_asset_tag_ids_b34d6e_gin'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0138_asset_tag_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpenGraphEnrichmentJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('website', models.URLField(max_length=2048)),
+                ('domain', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Running', 'Running'), ('Done', 'Done'), ('Failed', 'Failed')], default='Pending', max_length=15)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='opengraph_enrichment_job', to='api.asset')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='opengraphenrichmentjob',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='api_opengra_status_d90250_idx'),
+        ),
+    ]
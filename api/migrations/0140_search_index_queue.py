@@ -0,0 +1,30 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0139_opengraph_enrichment_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexQueueItem',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.CharField(max_length=64)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 3.2.12 on 2026-10-18 14:14
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The search vectors are computed by BEFORE triggers on the searched columns, so that every write (including
+# QuerySet.update() and raw SQL) keeps them up to date. Writes to the tags they include re-compute them through a no-op
+# update of those columns.
+SEARCH_VECTOR_TRIGGERS_SQL = """
+CREATE FUNCTION api_asset_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(
+            (SELECT string_agg(replace(slug, '-', ' '), ' ') FROM api_tag WHERE id = ANY(NEW.tag_ids)), ''
+        )), 'B')
+        || setweight(to_tsvector('english', coalesce(NEW.short_description, '')), 'C')
+        || setweight(to_tsvector('english', coalesce(NEW.description, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_asset_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, short_description, description, tag_ids ON api_asset
+    FOR EACH ROW EXECUTE FUNCTION api_asset_search_vector_trigger();
+
+CREATE FUNCTION api_solution_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(
+            (
+                SELECT string_agg(replace(api_tag.slug, '-', ' '), ' ')
+                FROM api_tag JOIN api_linkedsolutiontag ON api_linkedsolutiontag.tag_id = api_tag.id
+                WHERE api_linkedsolutiontag.solution_id = NEW.id
+            ), ''
+        )), 'B')
+        || setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C')
+        || setweight(to_tsvector('english', coalesce(NEW.scope_of_work, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_solution_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, description, scope_of_work ON api_solution
+    FOR EACH ROW EXECUTE FUNCTION api_solution_search_vector_trigger();
+
+CREATE FUNCTION api_linkedsolutiontag_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE api_solution SET title = title WHERE id = OLD.solution_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE api_solution SET title = title WHERE id = NEW.solution_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_linkedsolutiontag_search_vector_update
+    AFTER INSERT OR UPDATE OR DELETE ON api_linkedsolutiontag
+    FOR EACH ROW EXECUTE FUNCTION api_linkedsolutiontag_search_vector_trigger();
+
+CREATE FUNCTION api_tag_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    -- Asset.tag_ids is maintained from LinkedTag by the app, the asset triggers only need to run again on renames
+    UPDATE api_asset SET tag_ids = tag_ids WHERE tag_ids @> ARRAY[NEW.id]::integer[];
+    UPDATE api_solution SET title = title
+    WHERE id IN (SELECT solution_id FROM api_linkedsolutiontag WHERE tag_id = NEW.id);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_tag_search_vector_update
+    AFTER UPDATE OF slug ON api_tag
+    FOR EACH ROW WHEN (OLD.slug IS DISTINCT FROM NEW.slug) EXECUTE FUNCTION api_tag_search_vector_trigger();
+"""
+
+DROP_SEARCH_VECTOR_TRIGGERS_SQL = """
+DROP TRIGGER api_tag_search_vector_update ON api_tag;
+DROP FUNCTION api_tag_search_vector_trigger();
+DROP TRIGGER api_linkedsolutiontag_search_vector_update ON api_linkedsolutiontag;
+DROP FUNCTION api_linkedsolutiontag_search_vector_trigger();
+DROP TRIGGER api_solution_search_vector_update ON api_solution;
+DROP FUNCTION api_solution_search_vector_trigger();
+DROP TRIGGER api_asset_search_vector_update ON api_asset;
+DROP FUNCTION api_asset_search_vector_trigger();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0140_search_index_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='solution',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(sql=SEARCH_VECTOR_TRIGGERS_SQL, reverse_sql=DROP_SEARCH_VECTOR_TRIGGERS_SQL),
+        # Fills the search vectors of the existing rows (before the indexes are built, which is faster)
+        migrations.RunSQL(
+            sql=(
+                "UPDATE api_asset SET name = name;"
+                "UPDATE api_solution SET title = title;"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='api_asset_search__5d0ed4_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='solution',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='api_solutio_search__4a2df9_gin'),
+        ),
+    ]
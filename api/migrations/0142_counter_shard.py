@@ -0,0 +1,27 @@
+# Generated by Django 3.2.12 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0141_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('counter', models.CharField(max_length=150)),
+                ('object_id', models.BigIntegerField()),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('delta', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='countershard',
+            constraint=models.UniqueConstraint(fields=('counter', 'object_id', 'slot'), name='counter_shard_slot'),
+        ),
+    ]
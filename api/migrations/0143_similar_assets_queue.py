@@ -0,0 +1,21 @@
+# Generated by Django 3.2.12 on 2026-10-18 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0142_counter_shard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarAssetsQueueItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asset_id', models.BigIntegerField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.12 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0143_similar_assets_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchindexqueueitem',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='searchindexqueueitem',
+            name='last_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='searchindexqueueitem',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='searchindexqueueitem',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Failed', 'Failed')], default='Pending', max_length=15),
+        ),
+    ]
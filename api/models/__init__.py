@@ -38,6 +38,11 @@ from .third_party_customer_session import ThirdPartyCustomerSession
 from .asset_price_plan_subscription import AssetPricePlanSubscription
 from .asset_subscription_usage import AssetSubscriptionUsage
 
+from .similar_asset import SimilarAsset, SimilarAssetsQueueItem
+from .opengraph_enrichment_job import OpenGraphEnrichmentJob
+from .search_index_queue import SearchIndexQueueItem
+from .counter_shard import CounterShard
+
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
@@ -1,19 +1,22 @@
 import os
-import logging
-from urllib.error import HTTPError
 
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.cache import cache
 from django.db import models
-from django.db.models.signals import pre_save
+from django.db.models import Case, F, Value, When
+from django.db.models.signals import post_delete, post_save, pre_save
 from djstripe.models import Product as StripeProduct
 from furl import furl
-from opengraph import OpenGraph
-from opengraphio import OpenGraphIO
 
 from .asset_attribute import Attribute
 from .solution import Solution
 from .tag import Tag
 from .organization import Organization
+from api.utils.counter_buffer import CounterBuffer
+from api.utils.models import ChangeTrackingMixin
 from api.utils.promo_video_conditional_updates_signal import (
     promo_video_conditional_updates,
 )
@@ -27,11 +30,14 @@ def _upload_to_for_logos(instance, filename):
     return os.path.join(path, filename_with_extension)
 
 
-class Asset(models.Model):
+class Asset(ChangeTrackingMixin, models.Model):
     """
     Asset for now represents a web asset such as a website, software, application or web offering.
     """
 
+    # Columns not written by a full save, see _do_update
+    DB_MAINTAINED_ATTNAMES = ('tag_ids', 'search_vector')
+
     slug = models.SlugField(null=True, unique=True)
     name = models.CharField(max_length=255, unique=True)
     website = models.URLField(max_length=2048, null=True, blank=True)
@@ -68,6 +74,14 @@ class Asset(models.Model):
     has_free_trial = models.BooleanField(default=False)
     trial_days = models.IntegerField(null=True, blank=True)
     tags = models.ManyToManyField(Tag, through='LinkedTag', related_name='assets')
+    # Denormalized sorted ids of the tags (kept in sync with LinkedTag), the GIN index on it serves as a tag -> assets
+    # inverted index for exact multi-tag filtering and tag facet counts
+    tag_ids = ArrayField(
+        models.IntegerField(), default=list, blank=True, editable=False
+    )
+    # Weighted full-text search document (name A, tag slugs B, short_description C, description D) maintained by
+    # triggers (see migration 0141), searched when Elasticsearch is unavailable (see api.utils.search_failover)
+    search_vector = SearchVectorField(null=True, editable=False)
     solutions = models.ManyToManyField(
         Solution, through='LinkedSolution', related_name='assets'
     )
@@ -131,6 +145,9 @@ class Asset(models.Model):
 
     @property
     def users_count(self):
+        # Querysets that are serialized in bulk annotate this, see optimize_queryset_for_serializer
+        if hasattr(self, 'annotated_users_count'):
+            return self.annotated_users_count
         return self.users.count()
 
     @property
@@ -145,39 +162,82 @@ class Asset(models.Model):
         return self.name
 
     def update_clickthrough_counter(self):
-        self.tweb_url_clickthrogh_counter += 1
-        self.save()
+        # An atomic UPDATE of just the counter, without going through save() (and the signals/reindexing it triggers)
+        Asset.objects.filter(pk=self.pk).update(
+            tweb_url_clickthrogh_counter=F('tweb_url_clickthrogh_counter') + 1
+        )
 
     def save(self, *args, **kwargs):
         if self.website:
-            if not self.description:
-                try:
-                    og_dict: dict = OpenGraph(url=self.website)
-
-                    # https://ogp.me/ OpenGraph descriptions are short one-two sentences.
-                    self.description = og_dict.get('description', '')
-                    self.og_image_url = og_dict.get('image')
-                except HTTPError as e:
-                    # Some websites have same origin policy even for accessing OGP tags so trying to parse
-                    # from their url may result in a forbidden error
-                    logging.exception(e)
-                    opengraph = OpenGraphIO(
-                        {'app_id': '8046bf50-dd39-4e7f-8988-8e8667387ff9'}
-                    )
-                    site_info = opengraph.get_site_info(passed_url=self.website)
-                    hybrid_graph_dict = site_info['hybridGraph']
-                    self.description = hybrid_graph_dict.get('description', '')
-                    self.og_image_url = hybrid_graph_dict.get('image')
-
+            # The description and og_image_url are filled in the background, see OpenGraphEnrichmentJob
             if not self.logo_url:
                 furled_url = furl(self.website)
                 self.logo_url = 'https://logo.clearbit.com/{}'.format(furled_url.netloc)
 
         super().save(*args, **kwargs)
 
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        if update_fields is None:
+            # tag_ids is maintained from LinkedTag (see refresh_asset_tag_ids) and search_vector by a trigger, so a
+            # stale in-memory value must not overwrite them. Only the UPDATE leaves them out, save() keeps its usual
+            # semantics (e.g. inserting a row that doesn't exist anymore, update_fields of the signals).
+            values = [
+                value
+                for value in values
+                if value[0].attname not in self.DB_MAINTAINED_ATTNAMES
+            ]
+        updated = super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+        if updated and update_fields is None:
+            self._unwritten_attnames = self.DB_MAINTAINED_ATTNAMES
+        return updated
+
     class Meta:
         verbose_name = 'Software'
         verbose_name_plural = 'Softwares'
+        indexes = [GinIndex(fields=['tag_ids']), GinIndex(fields=['search_vector'])]
+
+
+def _flush_clickthrough_counts(clickthrough_counts: dict) -> None:
+    """
+    Adds the buffered click-through counts (asset id -> count) to the asset counters using a single UPDATE statement.
+    """
+    Asset.objects.filter(id__in=clickthrough_counts.keys()).update(
+        tweb_url_clickthrogh_counter=F('tweb_url_clickthrogh_counter')
+        + Case(
+            *[
+                When(id=asset_id, then=Value(count))
+                for asset_id, count in clickthrough_counts.items()
+            ],
+            output_field=models.IntegerField(),
+        )
+    )
+
+
+# Click-throughs of the masked urls (see Asset.tweb_url) are counted through this buffer so that redirecting doesn't
+# write to the db, see CounterBuffer
+asset_clickthrough_counts_buffer = CounterBuffer(
+    _flush_clickthrough_counts,
+    flush_interval=settings.CLICKTHROUGH_COUNTS_FLUSH_INTERVAL,
+    max_pending=settings.CLICKTHROUGH_COUNTS_MAX_PENDING,
+)
+
+
+def get_clickthrough_target_cache_key(slug: str) -> str:
+    return 'asset_clickthrough_target:{}'.format(slug)
+
+
+def invalidate_cached_clickthrough_target(sender, instance, created=False, **kwargs):
+    slugs = {instance.slug}
+    # The previous slug of a renamed asset doesn't redirect anymore. The values from before the save, loaded by
+    # promo_video_conditional_updates (see ChangeTrackingMixin)
+    db_values = None if created else instance.get_db_values()
+    if db_values is not None:
+        slugs.add(db_values['slug'])
+    cache.delete_many([get_clickthrough_target_cache_key(slug) for slug in slugs])
 
 
 pre_save.connect(promo_video_conditional_updates, sender=Asset)
+post_save.connect(invalidate_cached_clickthrough_target, sender=Asset)
+post_delete.connect(invalidate_cached_clickthrough_target, sender=Asset)
@@ -1,13 +1,13 @@
 from django.conf import settings
 from django.db import models
-from django.db.models import UniqueConstraint, F
-from django.db.models.signals import pre_save, post_delete
-from django.dispatch import receiver
+from django.db.models import UniqueConstraint
 
 from api.models import AssetQuestion
+from api.utils.denormalized_counters import ShardedCounter, register_counters
+from api.utils.models import ChangeTrackingMixin
 
 
-class AssetQuestionVote(models.Model):
+class AssetQuestionVote(ChangeTrackingMixin, models.Model):
     """
     A vote on a specific Question/Answer on a specific asset (only one vote per user per Answer per asset).
     """
@@ -40,33 +40,9 @@ class AssetQuestionVote(models.Model):
         verbose_name_plural = 'Question Votes'
 
 
-def _change_question_upvotes_count(question_id: int, change_by: int) -> None:
-    asset_question_qs = AssetQuestion.objects.filter(id=question_id)
-    asset_question_qs.update(upvotes_count=F('upvotes_count') + change_by)
-
-
-@receiver(pre_save, sender=AssetQuestionVote)
-def update_asset_upvote_count_metric_for_new_vote(sender, instance=None, **kwargs):
-    """
-    if the is_upvote is false for the instance, upvotes_count will not change.
-    But if it is true then:
-    If the asset_upvote instance is already present in the database & instance_old.is_upvote is false or
-    instance_old does not exist then the upvotes_count of an asset will increase by 1
-    """
-    if instance.is_upvote:
-        try:
-            # Try to get an old reference to this instance.
-            instance_old = sender.objects.get(pk=instance.pk)
-            if not instance_old.is_upvote:
-                _change_question_upvotes_count(instance.question.id, 1)
-
-        except sender.DoesNotExist:
-            _change_question_upvotes_count(instance.question.id, 1)
-
-
-@receiver(post_delete, sender=AssetQuestionVote)
-def update_asset_upvote_count_metric_when_vote_is_deleted(
-    sender, instance=None, **kwargs
-):
-    if instance.is_upvote:
-        _change_question_upvotes_count(instance.question.id, -1)
+register_counters(
+    AssetQuestionVote,
+    ShardedCounter(
+        AssetQuestion, 'upvotes_count', 'question_id', filter={'is_upvote': True}
+    ),
+)
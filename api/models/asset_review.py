@@ -1,15 +1,15 @@
 from django.conf import settings
 from django.db import models
-from django.db.models import UniqueConstraint, F
-from django.db.models.signals import post_save, post_delete, pre_save
-from django.dispatch import receiver
-from django.core.signals import request_finished
+from django.db.models import UniqueConstraint
+from django.db.models.signals import pre_save
 from api.utils.video_url_conditional_updates_signal import video_url_conditional_updates
 
 from api.models import Asset
+from api.utils.denormalized_counters import AverageCounter, register_counters
+from api.utils.models import ChangeTrackingMixin
 
 
-class AssetReview(models.Model):
+class AssetReview(ChangeTrackingMixin, models.Model):
     RATING_RANGE = range(1, 11)  # 1 to 10 (11 excluded)
     RATING_CHOICES = tuple(zip(RATING_RANGE, map(str, RATING_RANGE)))
 
@@ -41,60 +41,9 @@ class AssetReview(models.Model):
         verbose_name_plural = 'Software Reviews'
 
 
-@receiver(pre_save, sender=AssetReview)
-def avg_rating_and_count_update_for_new_review(sender, instance=None, **kwargs):
-    """
-    When new review is added, the average rating of the asset is recalculated & 'avg_rating' and 'reviews_count'
-    for the asset is updated
-    """
-
-    if type(sender) != type(AssetReview):
-        return
-
-    try:
-        # Update operation (an existing review is being updated case)
-        # Try to get an old reference to this instance.
-        instance_old = sender.objects.get(pk=instance.pk)
-        if instance_old.rating != instance.rating:
-            Asset.objects.filter(id=instance.asset_id).update(
-                avg_rating=(
-                    F('avg_rating') * F('reviews_count')
-                    - instance_old.rating
-                    + instance.rating
-                )
-                / (F('reviews_count')),
-                reviews_count=F('reviews_count'),
-            )
-
-    except sender.DoesNotExist:
-        # New review is being added
-        Asset.objects.filter(id=instance.asset_id).update(
-            avg_rating=(F('avg_rating') * F('reviews_count') + instance.rating)
-            / (F('reviews_count') + 1),
-            reviews_count=F('reviews_count') + 1,
-        )
-
-
-@receiver(post_delete, sender=AssetReview)
-def avg_rating_and_count_update_on_delete(sender, instance=None, **kwargs):
-    asset_qs = Asset.objects.filter(id=instance.asset_id)
-    if asset_qs[0].reviews_count == 1:
-        asset_qs.update(
-            avg_rating=0,
-            reviews_count=0,
-        )
-    else:
-        asset_qs.update(
-            avg_rating=(F('avg_rating') * F('reviews_count') - instance.rating)
-            / (F('reviews_count') - 1),
-            reviews_count=F('reviews_count') - 1,
-        )
-
+register_counters(
+    AssetReview,
+    AverageCounter(Asset, 'avg_rating', 'reviews_count', 'rating', 'asset_id'),
+)
 
 pre_save.connect(video_url_conditional_updates, sender=AssetReview)
-
-# https://code.djangoproject.com/wiki/Signals#Helppost_saveseemstobeemittedtwiceforeachsave
-request_finished.connect(
-    avg_rating_and_count_update_for_new_review,
-    dispatch_uid="avg_rating_and_count_update_for_new_review",
-)
@@ -0,0 +1,129 @@
+import random
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import connection, models, transaction
+from django.db.models import Case, F, Sum, Value, When
+
+
+class CounterShard(models.Model):
+    """
+    A slot of the pending changes of a sharded counter (see api.utils.denormalized_counters.ShardedCounter) of a row.
+
+    Changes are added to one of the settings.COUNTER_SHARDS slots of the row at random, so that concurrent writers
+    (e.g. everyone voting on the same asset during a launch) don't all queue on the lock of the counting row.
+    roll_up_counter_shards periodically adds the slots to the counter columns.
+    """
+
+    # app_label.model_name.field of the counter, e.g. api.asset.upvotes_count
+    counter = models.CharField(max_length=150)
+    object_id = models.BigIntegerField()
+    slot = models.PositiveSmallIntegerField()
+    delta = models.IntegerField(default=0)
+
+    def __str__(self):
+        return '{}:{}:{}'.format(self.counter, self.object_id, self.slot)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['counter', 'object_id', 'slot'], name='counter_shard_slot'
+            )
+        ]
+
+
+def add_to_counter_shard(counter: str, object_id: int, delta: int, slots: int) -> None:
+    """
+    Adds `delta` to a random slot (out of `slots`) of the counter of the row.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {table} (counter, object_id, slot, delta) VALUES (%s, %s, %s, %s) '
+            'ON CONFLICT (counter, object_id, slot) DO UPDATE SET delta = {table}.delta + EXCLUDED.delta'.format(
+                table=CounterShard._meta.db_table
+            ),
+            [counter, object_id, random.randrange(slots), delta],
+        )
+
+
+def _split_counter(counter: str) -> tuple:
+    model_label, field = counter.rsplit('.', 1)
+    return apps.get_model(model_label), field
+
+
+def roll_up_counter_shards() -> int:
+    """
+    Adds the slots of the sharded counters to the counter columns and deletes them, with one UPDATE per counter.
+    Returns the number of rows whose counters changed.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Changes added concurrently either wait for the deletion (and then insert new slots) or are deleted
+            cursor.execute(
+                'DELETE FROM {} RETURNING counter, object_id, delta'.format(
+                    CounterShard._meta.db_table
+                )
+            )
+            shards = cursor.fetchall()
+
+        # counter -> object id -> delta
+        deltas = defaultdict(lambda: defaultdict(int))
+        for counter, object_id, delta in shards:
+            deltas[counter][object_id] += delta
+
+        rolled_up_rows = 0
+        for counter, object_deltas in deltas.items():
+            object_deltas = {
+                object_id: delta for object_id, delta in object_deltas.items() if delta
+            }
+            if not object_deltas:
+                continue
+            model, field = _split_counter(counter)
+            model._default_manager.filter(pk__in=object_deltas.keys()).update(
+                **{
+                    field: F(field)
+                    + Case(
+                        *[
+                            When(pk=object_id, then=Value(delta))
+                            for object_id, delta in object_deltas.items()
+                        ],
+                        output_field=models.IntegerField(),
+                    )
+                }
+            )
+            rolled_up_rows += len(object_deltas)
+    return rolled_up_rows
+
+
+def get_unrolled_counts(counter: str, object_ids=None) -> dict:
+    """
+    The changes of the counter of the given rows (all of them by default) that aren't rolled up yet (object id ->
+    delta).
+    """
+    shards = CounterShard.objects.filter(counter=counter)
+    if object_ids is not None:
+        shards = shards.filter(object_id__in=object_ids)
+    return dict(
+        shards.values('object_id')
+        .annotate(delta=Sum('delta'))
+        .values_list('object_id', 'delta')
+    )
+
+
+def add_unrolled_counts(instances: list, field: str) -> None:
+    """
+    Makes the `field` counter of the instances (of the same model) exact by adding its changes that aren't rolled up
+    yet, with a single query.
+    """
+    if not instances:
+        return
+    unrolled_counts = get_unrolled_counts(
+        '{}.{}'.format(instances[0]._meta.label_lower, field),
+        [instance.pk for instance in instances],
+    )
+    for instance in instances:
+        setattr(
+            instance,
+            field,
+            getattr(instance, field) + unrolled_counts.get(instance.pk, 0),
+        )
@@ -1,4 +1,10 @@
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.db.models import Count, F, Func, OuterRef, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 
 from api.models import Tag, Asset
 
@@ -10,3 +16,60 @@ class LinkedTag(models.Model):
 
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE)
+
+
+def refresh_asset_tag_ids(asset_ids) -> None:
+    """
+    Recomputes Asset.tag_ids (the tag inverted index) of the given assets from their LinkedTag rows.
+    """
+    asset_tag_ids = (
+        LinkedTag.objects.filter(asset_id=OuterRef('pk'))
+        .values('asset_id')
+        .annotate(tag_ids=ArrayAgg('tag_id', distinct=True, ordering='tag_id'))
+        .values('tag_ids')
+    )
+    Asset.objects.filter(id__in=asset_ids).update(
+        tag_ids=Coalesce(
+            Subquery(asset_tag_ids),
+            Value([]),
+            output_field=ArrayField(models.IntegerField()),
+        )
+    )
+
+
+def get_tag_facet_counts(assets: QuerySet) -> dict:
+    """
+    Returns tag id -> number of the given assets that have the tag, using Asset.tag_ids.
+    """
+    return dict(
+        Asset.objects.filter(id__in=assets.values('id'))
+        .annotate(tag_id=Func(F('tag_ids'), function='unnest'))
+        .values('tag_id')
+        .annotate(assets_count=Count('id'))
+        .values_list('tag_id', 'assets_count')
+    )
+
+
+@receiver(m2m_changed, sender=LinkedTag)
+def refresh_asset_tag_ids_on_asset_tags_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == 'pre_clear' and reverse:
+        # The assets of the tag are only known before they are cleared
+        instance._tag_ids_cleared_asset_ids = list(
+            instance.assets.values_list('id', flat=True)
+        )
+    elif action in ('post_add', 'post_remove'):
+        refresh_asset_tag_ids(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        refresh_asset_tag_ids(
+            getattr(instance, '_tag_ids_cleared_asset_ids', [])
+            if reverse
+            else [instance.pk]
+        )
+
+
+@receiver(post_save, sender=LinkedTag)
+@receiver(post_delete, sender=LinkedTag)
+def refresh_asset_tag_ids_on_linked_tag_change(sender, instance, **kwargs):
+    refresh_asset_tag_ids([instance.asset_id])
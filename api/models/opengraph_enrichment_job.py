@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.models import Asset
+from api.utils.opengraph import fetch_opengraph_data, get_url_domain, normalize_url
+
+
+class OpenGraphEnrichmentJob(models.Model):
+    """
+    A pending (or finished) enrichment of an asset with the OpenGraph description and image of its website.
+
+    Saving an asset never fetches anything itself, it only queues a job (see enqueue_opengraph_enrichment) that is
+    picked up by process_opengraph_enrichment_jobs, which is run by the scheduler and by
+    `manage.py enrich_assets_opengraph`. Failed jobs are retried with an exponential backoff.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'Pending'
+        RUNNING = 'Running'
+        DONE = 'Done'
+        FAILED = 'Failed'
+
+    asset = models.OneToOneField(
+        Asset, on_delete=models.CASCADE, related_name='opengraph_enrichment_job'
+    )
+    # The website of the asset when the job was queued, results are only applied if it hasn't changed since
+    website = models.URLField(max_length=2048)
+    domain = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=15, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return '{} ({})'.format(self.website, self.status)
+
+
+def get_opengraph_cache_key(website: str) -> str:
+    # Per page, several assets may be hosted on the same domain (e.g. github.com/<user>/<repo>). Hashed since urls
+    # can be longer than the memcached keys and contain characters they can't.
+    return 'opengraph:{}'.format(
+        hashlib.sha256(normalize_url(website).encode()).hexdigest()
+    )
+
+
+def _claim_due_jobs(limit: int) -> list:
+    now = timezone.now()
+    with transaction.atomic():
+        # Rows locked by another worker are skipped, so several workers never run the same job
+        jobs = list(
+            OpenGraphEnrichmentJob.objects.filter(
+                Q(
+                    status=OpenGraphEnrichmentJob.Status.PENDING,
+                    next_attempt_at__lte=now,
+                )
+                # Jobs of a worker that died while running them
+                | Q(
+                    status=OpenGraphEnrichmentJob.Status.RUNNING,
+                    updated__lt=now
+                    - timedelta(seconds=settings.OPENGRAPH_ENRICHMENT_JOB_TIMEOUT),
+                )
+            )
+            .order_by('next_attempt_at')
+            .select_for_update(skip_locked=True)[:limit]
+        )
+        OpenGraphEnrichmentJob.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=OpenGraphEnrichmentJob.Status.RUNNING, updated=now
+        )
+    return jobs
+
+
+def _get_opengraph_data(job: OpenGraphEnrichmentJob, domain_semaphores: dict) -> dict:
+    cache_key = get_opengraph_cache_key(job.website)
+    opengraph_data = cache.get(cache_key)
+    if opengraph_data is None:
+        with domain_semaphores[job.domain]:
+            # Another job of the same page may have fetched it while this one was waiting
+            opengraph_data = cache.get(cache_key)
+            if opengraph_data is None:
+                opengraph_data = fetch_opengraph_data(job.website)
+                cache.set(
+                    cache_key,
+                    opengraph_data,
+                    settings.OPENGRAPH_RESULT_CACHE_TIMEOUT,
+                )
+    return opengraph_data
+
+
+def _finish_job(job: OpenGraphEnrichmentJob, **fields) -> None:
+    # The job is only updated if it hasn't been queued again (for a new website) in the meantime
+    OpenGraphEnrichmentJob.objects.filter(
+        pk=job.pk, status=OpenGraphEnrichmentJob.Status.RUNNING, website=job.website
+    ).update(updated=timezone.now(), **fields)
+
+
+def _run_job(job: OpenGraphEnrichmentJob, domain_semaphores: dict) -> None:
+    try:
+        opengraph_data = _get_opengraph_data(job, domain_semaphores)
+        asset = Asset.objects.get(pk=job.asset_id)
+        if asset.website == job.website and not asset.description:
+            asset.description = opengraph_data['description']
+            asset.og_image_url = opengraph_data['image']
+            asset.save(update_fields=['description', 'og_image_url'])
+        _finish_job(job, status=OpenGraphEnrichmentJob.Status.DONE, last_error='')
+    except Exception as e:
+        logging.exception(e)
+        attempts = job.attempts + 1
+        if attempts >= settings.OPENGRAPH_ENRICHMENT_MAX_ATTEMPTS:
+            _finish_job(
+                job,
+                status=OpenGraphEnrichmentJob.Status.FAILED,
+                attempts=attempts,
+                last_error=repr(e),
+            )
+        else:
+            _finish_job(
+                job,
+                status=OpenGraphEnrichmentJob.Status.PENDING,
+                attempts=attempts,
+                next_attempt_at=timezone.now()
+                + timedelta(
+                    seconds=settings.OPENGRAPH_ENRICHMENT_RETRY_BACKOFF
+                    * 2 ** (attempts - 1)
+                ),
+                last_error=repr(e),
+            )
+
+
+def _run_job_in_pool_thread(job: OpenGraphEnrichmentJob, domain_semaphores: dict):
+    try:
+        _run_job(job, domain_semaphores)
+    finally:
+        # Each thread of the pool has its own db connection
+        connections.close_all()
+
+
+def process_opengraph_enrichment_jobs(limit: int = 100) -> int:
+    """
+    Runs (at most `limit`) due enrichment jobs on a pool of OPENGRAPH_ENRICHMENT_WORKERS threads (or on the calling
+    thread if it is 1), with at most OPENGRAPH_ENRICHMENT_MAX_PER_DOMAIN requests to the same domain at a time.
+    Returns the number of jobs run.
+    """
+    jobs = _claim_due_jobs(limit)
+    domain_semaphores = {
+        job.domain: threading.BoundedSemaphore(
+            settings.OPENGRAPH_ENRICHMENT_MAX_PER_DOMAIN
+        )
+        for job in jobs
+    }
+    if settings.OPENGRAPH_ENRICHMENT_WORKERS <= 1:
+        for job in jobs:
+            _run_job(job, domain_semaphores)
+        return len(jobs)
+
+    with ThreadPoolExecutor(
+        max_workers=settings.OPENGRAPH_ENRICHMENT_WORKERS,
+        thread_name_prefix='opengraph-enrichment',
+    ) as executor:
+        list(
+            executor.map(
+                lambda job: _run_job_in_pool_thread(job, domain_semaphores), jobs
+            )
+        )
+    return len(jobs)
+
+
+@receiver(post_save, sender=Asset)
+def enqueue_opengraph_enrichment(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    if raw or not instance.website or instance.description:
+        return
+    if update_fields is not None and not {'website', 'description'} & set(
+        update_fields
+    ):
+        return
+
+    if OpenGraphEnrichmentJob.objects.filter(
+        asset=instance, website=instance.website
+    ).exists():
+        # Already queued (or done) for this website
+        return
+
+    OpenGraphEnrichmentJob.objects.update_or_create(
+        asset=instance,
+        defaults={
+            'website': instance.website,
+            'domain': get_url_domain(instance.website),
+            'status': OpenGraphEnrichmentJob.Status.PENDING,
+            'attempts': 0,
+            'next_attempt_at': timezone.now(),
+            'last_error': '',
+        },
+    )
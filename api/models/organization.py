@@ -1,8 +1,10 @@
 from django.db import models
 from django.db.models import UniqueConstraint
 
+from api.utils.models import ChangeTrackingMixin
 
-class Organization(models.Model):
+
+class Organization(ChangeTrackingMixin, models.Model):
     """
     A Organization could be the owner of multiple assets (only one organization per asset).
     """
@@ -0,0 +1,273 @@
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+from django_elasticsearch_dsl.registries import registry
+
+
+# Key of the Postgres advisory lock held while the queue is being processed
+SEARCH_INDEX_QUEUE_LOCK_ID = 1_815_209_021
+
+
+class SearchIndexQueueItem(models.Model):
+    """
+    A model instance whose Elasticsearch documents need to be brought up to date, queued by
+    api.documents.signal_processor.QueuedSignalProcessor in the same transaction as the write itself.
+
+    The queue is append-only, process_search_index_queue coalesces all the items queued for the same instance into a
+    single update that reflects its latest state (or deletes its documents if it doesn't exist anymore). The updates
+    that fail are retried with an exponential backoff, and given up on (Failed, reported by get_search_index_queue_stats)
+    after SEARCH_INDEX_QUEUE_MAX_ATTEMPTS attempts, until the instance is written to again.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'Pending'
+        FAILED = 'Failed'
+
+    # app_label.model_name of the instance
+    model = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=64)
+    created = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(
+        max_length=15, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return '{}:{}'.format(self.model, self.object_id)
+
+
+def enqueue_search_index_updates(object_ids_by_model: dict) -> None:
+    """
+    Queues the instances with the given ids (an iterable of them per model class) in a single insert.
+    """
+    SearchIndexQueueItem.objects.bulk_create(
+        [
+            SearchIndexQueueItem(
+                model=model._meta.label_lower, object_id=str(object_id)
+            )
+            for model, object_ids in object_ids_by_model.items()
+            for object_id in object_ids
+        ],
+        batch_size=1000,
+    )
+
+
+def _get_bulk_errors(errors: list) -> list:
+    # Deleting documents that were never indexed (or are already deleted) is fine
+    return [
+        error
+        for error in errors
+        if not ('delete' in error and error['delete'].get('status') == 404)
+    ]
+
+
+def _get_failed_object_id(error: dict) -> str:
+    # An item of the bulk response, e.g. {'index': {'_id': '42', 'status': 400, 'error': {...}}}
+    return str(next(iter(error.values()))['_id'])
+
+
+def sync_search_documents(model, object_ids) -> dict:
+    """
+    Indexes the current state of the given instances in all the documents of their model, in one bulk request per
+    document, and deletes the documents of the ones that don't exist anymore. Returns the errors of the instances that
+    failed to be prepared or updated in a document (by object id), the documents of the others are up to date.
+    """
+    object_ids = {str(object_id) for object_id in object_ids}
+    errors_by_object_id = {}
+    for document_class in registry.get_documents([model]):
+        if document_class.django.ignore_signals:
+            continue
+
+        document = document_class()
+        instances = list(
+            document.get_queryset().filter(
+                pk__in=[model._meta.pk.to_python(object_id) for object_id in object_ids]
+            )
+        )
+        deleted_object_ids = object_ids - {str(instance.pk) for instance in instances}
+        actions = []
+        for instance in instances:
+            try:
+                actions.extend(document._get_actions([instance], 'index'))
+            except Exception as e:
+                errors_by_object_id[str(instance.pk)] = repr(e)
+        actions += [
+            {'_op_type': 'delete', '_index': document._index._name, '_id': object_id}
+            for object_id in deleted_object_ids
+        ]
+
+        _, errors = document.bulk(
+            actions, raise_on_error=False, refresh=document.django.auto_refresh
+        )
+        for error in _get_bulk_errors(errors):
+            errors_by_object_id[_get_failed_object_id(error)] = repr(error)
+    return errors_by_object_id
+
+
+@contextmanager
+def search_index_queue_lock(wait: bool = True):
+    """
+    Holds the lock (a session level Postgres advisory lock) that makes the queue processed by one worker at a time, and
+    lets reindex_catalog pause the processing while it rebuilds the indexes. Yields whether the lock was acquired,
+    which is always the case if `wait` is True.
+    """
+    with connection.cursor() as cursor:
+        if wait:
+            cursor.execute('SELECT pg_advisory_lock(%s)', [SEARCH_INDEX_QUEUE_LOCK_ID])
+            acquired = True
+        else:
+            cursor.execute(
+                'SELECT pg_try_advisory_lock(%s)', [SEARCH_INDEX_QUEUE_LOCK_ID]
+            )
+            acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT pg_advisory_unlock(%s)', [SEARCH_INDEX_QUEUE_LOCK_ID]
+                )
+
+
+def process_search_index_queue(batch_size: int = None) -> int:
+    """
+    Brings the documents of (at most `batch_size`) queued instances up to date. An instance is only processed once it
+    hasn't been queued again for SEARCH_INDEX_QUEUE_DEBOUNCE seconds, or it has been waiting for
+    SEARCH_INDEX_QUEUE_MAX_DELAY seconds, so that bursts of writes to the same instance result in a single update.
+    Returns the number of instances processed, nothing is processed while another worker or reindex_catalog holds the
+    queue lock.
+    """
+    with search_index_queue_lock(wait=False) as acquired:
+        if not acquired:
+            return 0
+        return _process_search_index_queue(
+            batch_size or settings.SEARCH_INDEX_QUEUE_BATCH_SIZE
+        )
+
+
+def _record_failed_attempt(items, attempts: int, error: str) -> None:
+    if attempts >= settings.SEARCH_INDEX_QUEUE_MAX_ATTEMPTS:
+        items.update(
+            status=SearchIndexQueueItem.Status.FAILED,
+            attempts=attempts,
+            last_error=error,
+        )
+    else:
+        items.update(
+            attempts=attempts,
+            next_attempt_at=timezone.now()
+            + timedelta(
+                seconds=settings.SEARCH_INDEX_QUEUE_RETRY_BACKOFF * 2 ** (attempts - 1)
+            ),
+            last_error=error,
+        )
+
+
+def _process_search_index_queue(batch_size: int) -> int:
+    last_item_id = SearchIndexQueueItem.objects.aggregate(Max('id'))['id__max']
+    if last_item_id is None:
+        return 0
+
+    # Items queued while processing have a greater id, they are kept and processed again
+    queued_items = SearchIndexQueueItem.objects.filter(id__lte=last_item_id)
+    pending_items = queued_items.filter(status=SearchIndexQueueItem.Status.PENDING)
+    now = timezone.now()
+    due_objects = (
+        pending_items.values('model', 'object_id')
+        .annotate(
+            first_queued=Min('created'),
+            last_queued=Max('created'),
+            previous_attempts=Max('attempts'),
+            retry_at=Max('next_attempt_at'),
+        )
+        .filter(
+            Q(
+                last_queued__lte=now
+                - timedelta(seconds=settings.SEARCH_INDEX_QUEUE_DEBOUNCE)
+            )
+            | Q(
+                first_queued__lte=now
+                - timedelta(seconds=settings.SEARCH_INDEX_QUEUE_MAX_DELAY)
+            )
+        )
+        # The ones that failed wait for their backoff, without holding up the others
+        .filter(Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+        .order_by('first_queued')[:batch_size]
+    )
+    # model -> object id -> attempts so far
+    objects_attempts_by_model = defaultdict(dict)
+    for due_object in due_objects:
+        objects_attempts_by_model[due_object['model']][
+            due_object['object_id']
+        ] = due_object['previous_attempts']
+
+    processed_count = 0
+    for model_label, objects_attempts in objects_attempts_by_model.items():
+        object_ids = set(objects_attempts)
+        try:
+            errors_by_object_id = sync_search_documents(
+                apps.get_model(model_label), object_ids
+            )
+        except Exception as e:
+            # e.g. Elasticsearch can't be reached
+            logging.exception(e)
+            errors_by_object_id = {object_id: repr(e) for object_id in object_ids}
+        if errors_by_object_id:
+            logging.error(
+                'Failed to update the search documents of %s %s objects: %s',
+                len(errors_by_object_id),
+                model_label,
+                list(errors_by_object_id.items())[:3],
+            )
+
+        # Including the items given up on before, the documents are up to date now
+        updated_object_ids = object_ids - errors_by_object_id.keys()
+        queued_items.filter(
+            model=model_label, object_id__in=updated_object_ids
+        ).delete()
+        for object_id, error in errors_by_object_id.items():
+            _record_failed_attempt(
+                pending_items.filter(model=model_label, object_id=object_id),
+                objects_attempts.get(object_id, 0) + 1,
+                error,
+            )
+        processed_count += len(updated_object_ids)
+    return processed_count
+
+
+def get_search_index_queue_stats() -> dict:
+    """
+    How far behind the search indexes are: the number of queued updates and of distinct instances they are for, for
+    how many seconds the oldest one has been waiting, and the number of instances whose updates were given up on.
+    """
+    pending_items = SearchIndexQueueItem.objects.filter(
+        status=SearchIndexQueueItem.Status.PENDING
+    )
+    stats = pending_items.aggregate(
+        pending_updates=Count('id'), oldest_queued=Min('created')
+    )
+    stats['pending_objects'] = (
+        pending_items.values('model', 'object_id').distinct().count()
+    )
+    stats['failed_objects'] = (
+        SearchIndexQueueItem.objects.filter(status=SearchIndexQueueItem.Status.FAILED)
+        .values('model', 'object_id')
+        .distinct()
+        .count()
+    )
+    oldest_queued = stats.pop('oldest_queued')
+    stats['lag_seconds'] = (
+        (timezone.now() - oldest_queued).total_seconds() if oldest_queued else 0
+    )
+    stats['is_backlogged'] = stats['lag_seconds'] > settings.SEARCH_INDEX_QUEUE_MAX_LAG
+    return stats
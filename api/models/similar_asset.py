@@ -0,0 +1,263 @@
+import heapq
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, Max, Min
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.models import Asset, LinkedTag
+
+
+class SimilarAsset(models.Model):
+    """
+    The precomputed top SIMILAR_ASSETS_COUNT most similar assets of an asset, served by /assets/similar/.
+    Similarity is the Jaccard similarity of the tags of two assets where each tag is weighted by its IDF, so that
+    sharing a rare tag counts more than sharing a very common one.
+
+    The whole table is rebuilt by `manage.py build_similar_assets` and kept up to date in between as the tags of
+    assets change: the changed assets are queued (see SimilarAssetsQueueItem) and their similar assets updated by
+    process_similar_assets_queue.
+    """
+
+    asset = models.ForeignKey(
+        Asset, related_name='similar_asset_links', on_delete=models.CASCADE
+    )
+    similar_asset = models.ForeignKey(Asset, related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('asset', 'similar_asset')
+        indexes = [models.Index(fields=['asset', '-score'])]
+
+
+class SimilarAssetsQueueItem(models.Model):
+    """
+    An asset whose tags have changed, queued by the tag change receivers (in the same transaction as the change) so
+    that editing tags doesn't pay for updating the similar assets of all the assets sharing them.
+    process_similar_assets_queue updates the similar assets of all the assets queued since the last run at once.
+    """
+
+    asset_id = models.BigIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return str(self.asset_id)
+
+
+def _get_assets_tag_ids(linked_tags_qs) -> dict:
+    assets_tag_ids = defaultdict(set)
+    for asset_id, tag_id in linked_tags_qs.values_list('asset_id', 'tag_id'):
+        assets_tag_ids[asset_id].add(tag_id)
+    return assets_tag_ids
+
+
+def _get_tag_weight(assets_count: int, tag_assets_count: int) -> float:
+    return math.log(1 + assets_count / tag_assets_count)
+
+
+def _get_similarity(tag_ids: set, other_tag_ids: set, tag_weights: dict) -> float:
+    shared_weight = sum(tag_weights[tag_id] for tag_id in tag_ids & other_tag_ids)
+    if not shared_weight:
+        return 0.0
+    return shared_weight / sum(
+        tag_weights[tag_id] for tag_id in tag_ids | other_tag_ids
+    )
+
+
+def _get_top_similar(scores: dict) -> list:
+    """
+    (similar asset id, score) of the best scores, ties are broken by the asset id so that the result is stable.
+    """
+    return heapq.nlargest(
+        settings.SIMILAR_ASSETS_COUNT,
+        ((asset_id, score) for asset_id, score in scores.items() if score > 0),
+        key=lambda item: (item[1], -item[0]),
+    )
+
+
+def _replace_similar_assets(similar_assets_by_asset_id: dict) -> None:
+    rows = [
+        SimilarAsset(asset_id=asset_id, similar_asset_id=similar_asset_id, score=score)
+        for asset_id, similar_assets in similar_assets_by_asset_id.items()
+        for similar_asset_id, score in similar_assets
+    ]
+    with transaction.atomic():
+        SimilarAsset.objects.filter(
+            asset_id__in=similar_assets_by_asset_id.keys()
+        ).delete()
+        SimilarAsset.objects.bulk_create(rows, batch_size=1000)
+
+
+def build_similar_assets() -> int:
+    """
+    Recomputes the similar assets of all assets, returns the number of rows in the table.
+    """
+    # The assets queued so far are up to date once the table is rebuilt
+    last_queued_item_id = SimilarAssetsQueueItem.objects.aggregate(Max('id'))['id__max']
+    assets_tag_ids = _get_assets_tag_ids(LinkedTag.objects.all())
+    tags_asset_ids = defaultdict(set)
+    for asset_id, tag_ids in assets_tag_ids.items():
+        for tag_id in tag_ids:
+            tags_asset_ids[tag_id].add(asset_id)
+
+    assets_count = Asset.objects.count()
+    tag_weights = {
+        tag_id: _get_tag_weight(assets_count, len(asset_ids))
+        for tag_id, asset_ids in tags_asset_ids.items()
+    }
+
+    similar_assets_by_asset_id = {}
+    for asset_id, tag_ids in assets_tag_ids.items():
+        # Only assets sharing at least one tag can be similar
+        candidate_ids = set().union(*(tags_asset_ids[tag_id] for tag_id in tag_ids))
+        candidate_ids.discard(asset_id)
+        similar_assets_by_asset_id[asset_id] = _get_top_similar(
+            {
+                candidate_id: _get_similarity(
+                    tag_ids, assets_tag_ids[candidate_id], tag_weights
+                )
+                for candidate_id in candidate_ids
+            }
+        )
+
+    with transaction.atomic():
+        SimilarAsset.objects.all().delete()
+        _replace_similar_assets(similar_assets_by_asset_id)
+        if last_queued_item_id is not None:
+            SimilarAssetsQueueItem.objects.filter(id__lte=last_queued_item_id).delete()
+    return SimilarAsset.objects.count()
+
+
+def update_similar_assets(asset_ids) -> None:
+    """
+    Updates the table after the tags of the given assets have changed: their own similar assets are recomputed and
+    their scores are updated in the lists of the assets that share (or used to share) tags with them. The weights of
+    the tags drift a little for the other pairs until the table is rebuilt.
+    """
+    asset_ids = set(asset_ids)
+    if not asset_ids:
+        return
+
+    changed_assets_tag_ids = _get_assets_tag_ids(
+        LinkedTag.objects.filter(asset_id__in=asset_ids)
+    )
+    changed_tag_ids = set().union(*changed_assets_tag_ids.values())
+    neighbour_ids = set(
+        LinkedTag.objects.filter(tag_id__in=changed_tag_ids).values_list(
+            'asset_id', flat=True
+        )
+    ) | set(
+        SimilarAsset.objects.filter(similar_asset_id__in=asset_ids).values_list(
+            'asset_id', flat=True
+        )
+    )
+    neighbour_ids -= asset_ids
+
+    assets_tag_ids = _get_assets_tag_ids(
+        LinkedTag.objects.filter(asset_id__in=neighbour_ids)
+    )
+    assets_tag_ids.update(changed_assets_tag_ids)
+    assets_count = Asset.objects.count()
+    tag_weights = {
+        tag_id: _get_tag_weight(assets_count, tag_assets_count)
+        for tag_id, tag_assets_count in LinkedTag.objects.filter(
+            tag_id__in=set().union(*assets_tag_ids.values())
+        )
+        .values('tag_id')
+        .annotate(tag_assets_count=Count('asset_id'))
+        .values_list('tag_id', 'tag_assets_count')
+    }
+
+    def get_similarity(asset_id, other_asset_id):
+        return _get_similarity(
+            assets_tag_ids.get(asset_id, set()),
+            assets_tag_ids.get(other_asset_id, set()),
+            tag_weights,
+        )
+
+    similar_assets_by_asset_id = {
+        asset_id: _get_top_similar(
+            {
+                other_asset_id: get_similarity(asset_id, other_asset_id)
+                for other_asset_id in (neighbour_ids | asset_ids) - {asset_id}
+            }
+        )
+        for asset_id in asset_ids
+    }
+
+    neighbours_scores = defaultdict(dict)
+    for asset_id, similar_asset_id, score in SimilarAsset.objects.filter(
+        asset_id__in=neighbour_ids
+    ).values_list('asset_id', 'similar_asset_id', 'score'):
+        neighbours_scores[asset_id][similar_asset_id] = score
+    for neighbour_id in neighbour_ids:
+        for asset_id in asset_ids:
+            neighbours_scores[neighbour_id][asset_id] = get_similarity(
+                neighbour_id, asset_id
+            )
+        similar_assets_by_asset_id[neighbour_id] = _get_top_similar(
+            neighbours_scores[neighbour_id]
+        )
+
+    _replace_similar_assets(similar_assets_by_asset_id)
+
+
+def enqueue_similar_assets_updates(asset_ids) -> None:
+    """
+    Queues the assets whose tags have changed, in a single insert.
+    """
+    SimilarAssetsQueueItem.objects.bulk_create(
+        [SimilarAssetsQueueItem(asset_id=asset_id) for asset_id in set(asset_ids)]
+    )
+
+
+def process_similar_assets_queue(batch_size: int = None) -> int:
+    """
+    Updates the similar assets of (at most `batch_size`) queued assets with a single update_similar_assets, returns
+    the number of assets processed.
+    """
+    batch_size = batch_size or settings.SIMILAR_ASSETS_QUEUE_BATCH_SIZE
+    last_item_id = SimilarAssetsQueueItem.objects.aggregate(Max('id'))['id__max']
+    if last_item_id is None:
+        return 0
+
+    # Items queued while processing have a greater id, they are kept and processed again
+    queued_items = SimilarAssetsQueueItem.objects.filter(id__lte=last_item_id)
+    asset_ids = list(
+        queued_items.values('asset_id')
+        .annotate(first_queued=Min('id'))
+        .order_by('first_queued')
+        .values_list('asset_id', flat=True)[:batch_size]
+    )
+    with transaction.atomic():
+        update_similar_assets(asset_ids)
+        queued_items.filter(asset_id__in=asset_ids).delete()
+    return len(asset_ids)
+
+
+@receiver(m2m_changed, sender=Asset.tags.through)
+def queue_similar_assets_update_on_asset_tags_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == 'pre_clear' and reverse:
+        # The assets of the tag are only known before they are cleared
+        instance._similar_assets_cleared_asset_ids = list(
+            instance.assets.values_list('id', flat=True)
+        )
+    elif action in ('post_add', 'post_remove'):
+        enqueue_similar_assets_updates(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        enqueue_similar_assets_updates(
+            getattr(instance, '_similar_assets_cleared_asset_ids', [])
+            if reverse
+            else [instance.pk]
+        )
+
+
+@receiver(post_save, sender=LinkedTag)
+@receiver(post_delete, sender=LinkedTag)
+def queue_similar_assets_update_on_linked_tag_change(sender, instance, **kwargs):
+    enqueue_similar_assets_updates([instance.asset_id])
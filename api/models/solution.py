@@ -1,5 +1,7 @@
 import os
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from djstripe.models import Product as StripeProduct
 from djstripe.models import Price as StripePrice
@@ -10,6 +12,7 @@ from api.models.organization import Organization
 from api.models.tag import Tag
 from api.management.commands import generate_sitemap_solution_detail
 from api.management.commands import generate_sitemap_index
+from api.utils.models import ChangeTrackingMixin
 from api.utils.promo_video_conditional_updates_signal import (
     promo_video_conditional_updates,
 )
@@ -24,7 +27,7 @@ def _upload_to_for_cover_images(instance, filename):
     return os.path.join(path, filename_with_extension)
 
 
-class Solution(models.Model):
+class Solution(ChangeTrackingMixin, models.Model):
     """
     A solution can be an integration support/solution, usage support, or some other form solution/support
     related to one or more web service(s), which is provided by a specific organization or a user.
@@ -58,6 +61,9 @@ class Solution(models.Model):
 
     @property
     def capacity_used(self) -> int:
+        # Querysets that are serialized in bulk annotate this, see optimize_queryset_for_serializer
+        if hasattr(self, 'annotated_capacity_used'):
+            return self.annotated_capacity_used
         solution_booking = apps.get_model('api', 'SolutionBooking')
         return self.bookings.filter(
             ~Q(status=solution_booking.Status.COMPLETED), is_payment_completed=True
@@ -187,12 +193,17 @@ class Solution(models.Model):
     created = models.DateTimeField(null=True, blank=True, auto_now_add=True)
     updated = models.DateTimeField(null=True, blank=True, auto_now=True)
 
+    # Weighted full-text search document (title A, tag slugs B, description C, scope_of_work D) maintained by
+    # triggers (see migration 0141), searched when Elasticsearch is unavailable (see api.utils.search_failover)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     def __str__(self):
         return self.title
 
     class Meta:
         verbose_name = 'Solution'
         verbose_name_plural = 'Solutions'
+        indexes = [GinIndex(fields=['search_vector'])]
 
 
 def solution_detail_sitemap_generator():
@@ -2,17 +2,17 @@ from django.conf import settings
 from django.db import models
 from django.core.mail import send_mail
 
-from django.db.models import F
 import datetime
 from api.utils.convert_str_to_date import get_now_converted_google_date
 from api.models import Solution
-from django.db.models.signals import pre_save, post_save, post_delete
+from api.utils.denormalized_counters import Counter, register_counters
+from api.utils.models import ChangeTrackingMixin
+from django.db.models.signals import pre_save
 from django.dispatch import receiver
-from django.core.signals import request_finished
 from djstripe.models import Subscription as StripeSubscription
 
 
-class SolutionBooking(models.Model):
+class SolutionBooking(ChangeTrackingMixin, models.Model):
     """
     Used to represent individual Solution orders/bookings.
     """
@@ -107,34 +107,6 @@ class SolutionBooking(models.Model):
         verbose_name_plural = 'Bookings'
 
 
-@receiver(pre_save, sender=SolutionBooking)
-def count_update_for_new_or_complete_booking(sender, instance=None, **kwargs):
-    """
-    When new review is added, the `bookings_pending_fulfillment_count` is update with instance status.
-    """
-
-    if type(sender) != type(SolutionBooking):
-        return
-
-    try:
-        # Update operation (an existing review is being updated case)
-        old_instance = sender.objects.get(pk=instance.pk)
-        if old_instance:
-            if instance.status == sender.Status.COMPLETED:
-                Solution.objects.filter(id=instance.solution.id).update(
-                    bookings_pending_fulfillment_count=F(
-                        'bookings_pending_fulfillment_count'
-                    )
-                    - 1,
-                )
-    except sender.DoesNotExist:
-        # New solution booking is being added
-        Solution.objects.filter(id=instance.solution.id).update(
-            bookings_pending_fulfillment_count=F('bookings_pending_fulfillment_count')
-            + 1,
-        )
-
-
 @receiver(pre_save, sender=SolutionBooking)
 def set_created_at_field_when_solution_status_from_pending_to_others(
     sender, instance=None, **kwargs
@@ -146,90 +118,25 @@ def set_created_at_field_when_solution_status_from_pending_to_others(
     if type(sender) != type(SolutionBooking):
         return
 
-    contract_instance = instance
-    try:
-        old_contract_instance = sender.objects.get(pk=contract_instance.pk)
-        if old_contract_instance.status == sender.Status.PENDING:
-            if instance.status != sender.Status.PENDING:
-                instance.started_at = get_now_converted_google_date()
-    except sender.DoesNotExist:
+    db_values = instance.get_db_values()
+    if db_values is None:
         if instance.status != sender.Status.PENDING:
             instance.started_at = datetime.datetime.now().date()
+    elif 'status' in instance.changed_fields:
+        if db_values['status'] == sender.Status.PENDING:
+            instance.started_at = get_now_converted_google_date()
 
 
-@receiver(post_delete, sender=SolutionBooking)
-def decrease_bookings_pending_fulfillment_count_field_of_solution(
-    sender, instance=None, **kwargs
-):
-    contract_instance = instance
-    if contract_instance.status != sender.Status.COMPLETED:
-        Solution.objects.filter(id=contract_instance.solution.id).update(
-            bookings_pending_fulfillment_count=F('bookings_pending_fulfillment_count')
-            - 1,
-        )
-
-
-def update_solution_aggregate_rating(solution_booking: SolutionBooking, delta=1):
-    """
-    Decreasing solution's status count of solution booking instance
-    """
-    solution_id = solution_booking.solution_id
-    if solution_booking.rating == -1:
-        Solution.objects.filter(id=solution_id).update(sad_count=F('sad_count') + delta)
-    elif solution_booking.rating == 0:
-        Solution.objects.filter(id=solution_id).update(
-            neutral_count=F('neutral_count') + delta
-        )
-    elif solution_booking.rating == 1:
-        Solution.objects.filter(id=solution_id).update(
-            happy_count=F('happy_count') + delta
-        )
-
-
-@receiver(pre_save, sender=SolutionBooking)
-def status_count_update_for_solution_booking(sender, instance=None, **kwargs):
-    """
-    When a new solution booking is added, the status count of solution is recalculated and updated.
-    """
-    if type(sender) != type(SolutionBooking):
-        return
-    solution_booking_instance = instance
-    try:
-        old_solution_booking_instance = sender.objects.get(
-            id=solution_booking_instance.id
-        )
-        if old_solution_booking_instance:
-            # When a old solution booking is being updated.
-            if solution_booking_instance.rating != old_solution_booking_instance.rating:
-                """
-                If new solution booking rating is different from old one,
-                then old status type count should be decreased
-                and new status type count should be increased in solution.
-                """
-                update_solution_aggregate_rating(old_solution_booking_instance, -1)
-                update_solution_aggregate_rating(solution_booking_instance, 1)
-
-    except sender.DoesNotExist:
-        # New solution booking is being added
-        update_solution_aggregate_rating(solution_booking_instance, 1)
-
-
-@receiver(post_delete, sender=SolutionBooking)
-def decrease_status_type_count_of_solution(sender, instance=None, **kwargs):
-    if type(sender) != type(SolutionBooking):
-        return
-    solution_booking_instance = instance
-    update_solution_aggregate_rating(solution_booking_instance, -1)
-
-
-# https://code.djangoproject.com/wiki/Signals#Helppost_saveseemstobeemittedtwiceforeachsave
-request_finished.connect(
-    status_count_update_for_solution_booking,
-    dispatch_uid="status_count_update_for_solution_booking",
-)
-
-# https://code.djangoproject.com/wiki/Signals#Helppost_saveseemstobeemittedtwiceforeachsave
-request_finished.connect(
-    count_update_for_new_or_complete_booking,
-    dispatch_uid="count_update_for_new_or_complete_booking",
+register_counters(
+    SolutionBooking,
+    # The solution is null for the bookings of deleted solutions, which aren't counted
+    Counter(
+        Solution,
+        'bookings_pending_fulfillment_count',
+        'solution_id',
+        exclude={'status': SolutionBooking.Status.COMPLETED},
+    ),
+    Counter(Solution, 'sad_count', 'solution_id', filter={'rating': -1}),
+    Counter(Solution, 'neutral_count', 'solution_id', filter={'rating': 0}),
+    Counter(Solution, 'happy_count', 'solution_id', filter={'rating': 1}),
 )
@@ -1,5 +1,8 @@
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from api.models import Solution
 
@@ -33,3 +36,35 @@ class SolutionQuestion(models.Model):
 
     def __str__(self):
         return "{}: {}".format(self.solution.title, self.title)
+
+
+def get_solution_questions_cache_key(solution_slug: str) -> str:
+    return 'solution_questions:{}'.format(solution_slug)
+
+
+@receiver(post_save, sender=SolutionQuestion)
+@receiver(post_delete, sender=SolutionQuestion)
+def invalidate_cached_solution_questions(sender, instance, **kwargs):
+    # The solution itself may be the one being deleted
+    solution_slug = (
+        Solution.objects.filter(pk=instance.solution_id)
+        .values_list('slug', flat=True)
+        .first()
+    )
+    if solution_slug:
+        cache.delete(get_solution_questions_cache_key(solution_slug))
+
+
+@receiver(post_save, sender=Solution)
+@receiver(post_delete, sender=Solution)
+def invalidate_cached_solution_questions_on_solution_change(
+    sender, instance, created=False, **kwargs
+):
+    # An empty list may have been cached for a slug that is only now given to a solution
+    slugs = {instance.slug}
+    # The previous slug of a renamed solution doesn't have questions anymore. The values from before the save, loaded
+    # by promo_video_conditional_updates (see ChangeTrackingMixin)
+    db_values = None if created else instance.get_db_values()
+    if db_values is not None:
+        slugs.add(db_values['slug'])
+    cache.delete_many([get_solution_questions_cache_key(slug) for slug in slugs])
@@ -1,14 +1,13 @@
 from django.conf import settings
 from django.db import models
-from django.db.models import UniqueConstraint, F
-from django.db.models.signals import pre_save, post_delete
-from django.dispatch import receiver
-from django.core.signals import request_finished
+from django.db.models import UniqueConstraint
 
 from api.models import Solution
+from api.utils.denormalized_counters import Counter, register_counters
+from api.utils.models import ChangeTrackingMixin
 
 
-class SolutionReview(models.Model):
+class SolutionReview(ChangeTrackingMixin, models.Model):
     class Type(models.TextChoices):
         SAD = 'S'
         NEUTRAL = 'N'
@@ -41,78 +40,21 @@ class SolutionReview(models.Model):
         verbose_name_plural = 'Solution Reviews'
 
 
-def decrease_status_count_of_solution(solution_review):
-    """
-    Decreasing solution's status count of solution revivew instance
-    """
-    solution_id = solution_review.solution_id
-    if solution_review.type == SolutionReview.Type.SAD:
-        Solution.objects.filter(id=solution_id).update(sad_count=F('sad_count') - 1)
-    elif solution_review.type == SolutionReview.Type.NEUTRAL:
-        Solution.objects.filter(id=solution_id).update(
-            neutral_count=F('neutral_count') - 1
-        )
-    elif solution_review.type == SolutionReview.Type.HAPPY:
-        Solution.objects.filter(id=solution_id).update(happy_count=F('happy_count') - 1)
-
-
-def increase_status_count_of_solution(solution_review):
-    """
-    Increasing solution's status count of solution revivew instance
-    """
-    solution_id = solution_review.solution_id
-    if solution_review.type == SolutionReview.Type.SAD:
-        Solution.objects.filter(id=solution_id).update(sad_count=F('sad_count') + 1)
-    elif solution_review.type == SolutionReview.Type.NEUTRAL:
-        Solution.objects.filter(id=solution_id).update(
-            neutral_count=F('neutral_count') + 1
-        )
-    elif solution_review.type == SolutionReview.Type.HAPPY:
-        Solution.objects.filter(id=solution_id).update(happy_count=F('happy_count') + 1)
-
-
-@receiver(pre_save, sender=SolutionReview)
-def status_count_update_for_solution_review(sender, instance=None, **kwargs):
-    """
-    When a new solution review is added, the status count of solution is recalculated and updated.
-    """
-    if type(sender) != type(SolutionReview):
-        return
-    solution_review_instance = instance
-    try:
-        old_solution_review_instance = sender.objects.get(
-            solution=solution_review_instance.solution,
-            user=solution_review_instance.user,
-        )
-        if old_solution_review_instance:
-            # When a old solution review is being updated.
-            if solution_review_instance.type != old_solution_review_instance.type:
-                """
-                If new solution review type is different from old one,
-                then old status type count should be decreased
-                and new status type count should be increased in solution.
-                """
-                decrease_status_count_of_solution(old_solution_review_instance)
-                increase_status_count_of_solution(solution_review_instance)
-        else:
-            # When a new solution review is being added, status type count in solution is increased.
-            increase_status_count_of_solution(solution_review_instance)
-
-    except sender.DoesNotExist:
-        # New solution review is being added
-        increase_status_count_of_solution(solution_review_instance)
-
-
-@receiver(post_delete, sender=SolutionReview)
-def decrease_status_type_count_of_solution(sender, instance=None, **kwargs):
-    if type(sender) != type(SolutionReview):
-        return
-    solution_review_instance = instance
-    decrease_status_count_of_solution(solution_review_instance)
-
-
-# https://code.djangoproject.com/wiki/Signals#Helppost_saveseemstobeemittedtwiceforeachsave
-request_finished.connect(
-    status_count_update_for_solution_review,
-    dispatch_uid="status_count_update_for_solution_review",
+register_counters(
+    SolutionReview,
+    Counter(
+        Solution, 'sad_count', 'solution_id', filter={'type': SolutionReview.Type.SAD}
+    ),
+    Counter(
+        Solution,
+        'neutral_count',
+        'solution_id',
+        filter={'type': SolutionReview.Type.NEUTRAL},
+    ),
+    Counter(
+        Solution,
+        'happy_count',
+        'solution_id',
+        filter={'type': SolutionReview.Type.HAPPY},
+    ),
 )
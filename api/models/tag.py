@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Case, F, Value, When
 from django.core.exceptions import ValidationError
 
+from api.utils.counter_buffer import CounterBuffer
+from api.utils.models import ChangeTrackingMixin
+
 
 def validate_positive_number(value):
     if value >= 0:
@@ -11,7 +16,7 @@ def validate_positive_number(value):
         )
 
 
-class Tag(models.Model):
+class Tag(ChangeTrackingMixin, models.Model):
     slug = models.SlugField(null=True)
     name = models.CharField(max_length=255, unique=True)
     counter = models.BigIntegerField(default=0, validators=[validate_positive_number])
@@ -20,3 +25,28 @@ class Tag(models.Model):
 
     def __str__(self):
         return self.name
+
+
+def _flush_tag_search_counts(search_counts: dict) -> None:
+    """
+    Adds the buffered search counts (tag slug -> count) to the tag counters using a single UPDATE statement.
+    """
+    Tag.objects.filter(slug__in=search_counts.keys()).update(
+        counter=F('counter')
+        + Case(
+            *[
+                When(slug=slug, then=Value(count))
+                for slug, count in search_counts.items()
+            ],
+            output_field=models.BigIntegerField(),
+        )
+    )
+
+
+# The counters of the tags used in search queries are bumped through this buffer so that searching doesn't write to
+# the db, see CounterBuffer
+tag_search_counts_buffer = CounterBuffer(
+    _flush_tag_search_counts,
+    flush_interval=settings.TAG_SEARCH_COUNTS_FLUSH_INTERVAL,
+    max_pending=settings.TAG_SEARCH_COUNTS_MAX_PENDING,
+)
@@ -1,3 +1,4 @@
+from django.db import models
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
@@ -9,11 +10,13 @@ from api.models import (
     LinkedAttribute,
     Organization,
     Tag,
+    UserAssetUsage,
 )
 from api.models.asset_snapshot import AssetSnapshot
 from api.serializers.asset_attribute import (
     AssetAttributeSerializer,
     AuthenticatedAssetAttributeSerializer,
+    get_asset_attribute_votes_context,
 )
 from api.serializers.asset_question import AssetQuestionSerializer
 from api.serializers.asset_snapshot import AssetSnapshotSerializer
@@ -21,6 +24,31 @@ from api.serializers.solution import SolutionSerializer
 from api.serializers.organization import OrganizationSerializer
 from api.serializers.price_plan import PricePlanSerializer
 from api.serializers.tag import TagSerializer
+from api.serializers.viewer_state import (
+    ViewerState,
+    ViewerStateListSerializer,
+    ViewerStateSerializerMixin,
+)
+
+
+def _get_request_user(context: dict):
+    request = context.get('request')
+    return request.user if request is not None else None
+
+
+class AssetListSerializer(ViewerStateListSerializer):
+    """
+    Computes the attribute votes of all the assets being serialized at once, see get_asset_attribute_votes_context.
+    """
+
+    def to_representation(self, data):
+        assets = list(data.all() if isinstance(data, models.Manager) else data)
+        self.context.update(
+            get_asset_attribute_votes_context(
+                [asset.id for asset in assets], _get_request_user(self.context)
+            )
+        )
+        return super().to_representation(assets)
 
 
 class AssetSerializer(ModelSerializer):
@@ -80,11 +108,34 @@ class AssetSerializer(ModelSerializer):
         ]
         lookup_field = 'slug'
         extra_kwargs = {'url': {'lookup_field': 'slug'}}
+        list_serializer_class = AssetListSerializer
+        # See optimize_queryset_for_serializer
+        prefetch_related = ['attributes']
+        annotate_counts = {'annotated_users_count': 'users'}
 
     def _get_attributes(self, instance):
         request = self.context.get('request')
-        serialize_context = {'request': request, 'asset_id': instance.id}
-        if request.user.is_anonymous:
+        if 'asset_attribute_upvotes_counts' in self.context:
+            # Computed for the whole list by AssetListSerializer
+            votes_context = {
+                key: self.context[key]
+                for key in (
+                    'asset_attribute_upvotes_counts',
+                    'my_asset_attribute_vote_ids',
+                )
+                if key in self.context
+            }
+        else:
+            votes_context = get_asset_attribute_votes_context(
+                [instance.id], _get_request_user(self.context)
+            )
+        serialize_context = {
+            'request': request,
+            'asset_id': instance.id,
+            **votes_context,
+        }
+        # There is no request when the list card is prepared for the search index (see AssetDocument.list_card)
+        if request is None or request.user.is_anonymous:
             serializer = AssetAttributeSerializer(
                 instance.attributes, many=True, context=serialize_context
             )
@@ -95,7 +146,7 @@ class AssetSerializer(ModelSerializer):
         return serializer.data
 
 
-class AuthenticatedAssetSerializer(AssetSerializer):
+class AuthenticatedAssetSerializer(ViewerStateSerializerMixin, AssetSerializer):
     used_by_me = serializers.SerializerMethodField(
         method_name="_get_asset_usage_status_in_request"
     )
@@ -185,27 +236,11 @@ class AuthenticatedAssetSerializer(AssetSerializer):
         asset.tags.add(*tags_to_add)
 
     def _get_asset_usage_status_in_request(self, instance):
-        logged_in_user = self.context['request'].user
-
-        if not logged_in_user:
-            return False
-
-        if not instance.users.filter(pk=logged_in_user.id):
-            return False
-
-        return True
+        return self.get_viewer_state('usage', instance) is not None
 
     def _get_my_asset_vote(self, instance):
-        logged_in_user = self.context['request'].user
-
-        if not logged_in_user:
-            return None
-
-        try:
-            asset_vote = AssetVote.objects.get(user=logged_in_user, asset=instance)
-            return asset_vote.id
-        except AssetVote.DoesNotExist:
-            return None
+        asset_vote = self.get_viewer_state('vote', instance)
+        return asset_vote.id if asset_vote else None
 
     def _get_is_owned(self, instance):
         logged_in_user = self.context['request'].user
@@ -213,7 +248,7 @@ class AuthenticatedAssetSerializer(AssetSerializer):
         if not logged_in_user:
             return False
 
-        return instance.owner == logged_in_user
+        return instance.owner_id == logged_in_user.id
 
     def _get_edit_allowed(self, instance):
         logged_in_user = self.context['request'].user
@@ -221,10 +256,10 @@ class AuthenticatedAssetSerializer(AssetSerializer):
         if not logged_in_user:
             return False
 
-        if instance.owner == logged_in_user:
+        if instance.owner_id == logged_in_user.id:
             return True
 
-        if instance.submitted_by == logged_in_user and instance.owner is None:
+        if instance.submitted_by_id == logged_in_user.id and instance.owner_id is None:
             return True
 
         return False
@@ -283,3 +318,45 @@ class AuthenticatedAssetSerializer(AssetSerializer):
             'is_owned',
             'edit_allowed',
         ]
+        viewer_states = {
+            'usage': ViewerState(UserAssetUsage, 'asset'),
+            'vote': ViewerState(AssetVote, 'asset'),
+        }
+
+
+def get_asset_list_cards_for_user(search_hits: list, user) -> list:
+    """
+    Takes asset search index hits (with `list_card`, `owner_id` and `submitted_by_id` in their source) and returns
+    their list cards. For logged in users the fields AuthenticatedAssetSerializer adds are filled in, using one query
+    per relation for the whole page.
+    """
+    list_cards = [hit['list_card'] for hit in search_hits]
+    if user.is_anonymous:
+        return list_cards
+
+    asset_ids = [list_card['id'] for list_card in list_cards]
+    viewer_states = AuthenticatedAssetSerializer.Meta.viewer_states
+    used_asset_ids = set(viewer_states['usage'].load(asset_ids, user))
+    asset_vote_ids = {
+        asset_id: asset_vote.id
+        for asset_id, asset_vote in viewer_states['vote'].load(asset_ids, user).items()
+    }
+    asset_attribute_vote_ids = get_asset_attribute_votes_context(asset_ids, user)[
+        'my_asset_attribute_vote_ids'
+    ]
+
+    for hit, list_card in zip(search_hits, list_cards):
+        asset_id = list_card['id']
+        owner_id = hit.get('owner_id')
+        list_card['used_by_me'] = asset_id in used_asset_ids
+        list_card['my_asset_vote'] = asset_vote_ids.get(asset_id)
+        list_card['is_owned'] = owner_id == user.id
+        list_card['edit_allowed'] = owner_id == user.id or (
+            owner_id is None and hit.get('submitted_by_id') == user.id
+        )
+        for attribute in list_card['attributes']:
+            attribute['my_asset_attribute_vote'] = asset_attribute_vote_ids.get(
+                (asset_id, attribute['id'])
+            )
+
+    return list_cards
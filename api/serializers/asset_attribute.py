@@ -1,9 +1,37 @@
+from django.db.models import Count
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
 from api.models import Attribute, Asset, AssetAttributeVote
 
 
+def get_asset_attribute_votes_context(asset_ids: list, user=None) -> dict:
+    """
+    Serializer context for rendering the attributes of the given assets without querying per attribute:
+    the upvotes counts as (asset_id, attribute_id) -> count and, if a logged in user is given, the ids of their votes
+    as (asset_id, attribute_id) -> vote id.
+    """
+    upvotes_counts = {
+        (asset_id, attribute_id): upvotes_count
+        for asset_id, attribute_id, upvotes_count in AssetAttributeVote.objects.filter(
+            is_upvote=True, asset_id__in=asset_ids
+        )
+        .values('asset_id', 'attribute_id')
+        .annotate(upvotes_count=Count('id'))
+        .values_list('asset_id', 'attribute_id', 'upvotes_count')
+    }
+    context = {'asset_attribute_upvotes_counts': upvotes_counts}
+
+    if user is not None and not user.is_anonymous:
+        context['my_asset_attribute_vote_ids'] = {
+            (asset_id, attribute_id): vote_id
+            for asset_id, attribute_id, vote_id in AssetAttributeVote.objects.filter(
+                user=user, asset_id__in=asset_ids
+            ).values_list('asset_id', 'attribute_id', 'id')
+        }
+    return context
+
+
 class AssetAttributeSerializer(ModelSerializer):
     # Upvotes count for asset in content
     upvotes_count = serializers.SerializerMethodField(
@@ -15,13 +43,17 @@ class AssetAttributeSerializer(ModelSerializer):
         fields = ['id', 'name', 'is_con', 'upvotes_count']
 
     def get_upvote_counts_for_asset_in_context(self, instance):
+        upvotes_counts = self.context.get('asset_attribute_upvotes_counts')
+        if upvotes_counts is not None and self.context.get('asset_id'):
+            return upvotes_counts.get((self.context['asset_id'], instance.id), 0)
+
         request = self.context.get('request')
         asset_id = (
             self.context.get('asset_id')
             if self.context.get('asset_id')
             else request.data.get('asset')
         )
-        asset_slug = request.query_params.get('asset__slug', '')
+        asset_slug = request.query_params.get('asset__slug', '') if request else ''
         asset_slug = asset_slug.strip()
 
         asset = None
@@ -51,6 +83,10 @@ class AuthenticatedAssetAttributeSerializer(AssetAttributeSerializer):
         fields = AssetAttributeSerializer.Meta.fields + ['my_asset_attribute_vote']
 
     def _get_my_asset_attribute_vote(self, instance):
+        vote_ids = self.context.get('my_asset_attribute_vote_ids')
+        if vote_ids is not None and self.context.get('asset_id'):
+            return vote_ids.get((self.context['asset_id'], instance.id))
+
         logged_in_user = self.context['request'].user
         asset_id = (
             self.context.get('asset_id')
@@ -1,3 +1,4 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
@@ -12,6 +13,12 @@ from api.serializers.organization import OrganizationSerializer
 from api.serializers.solution_booking import SolutionBookingSerializer
 from api.serializers.tag import TagSerializer
 from api.serializers.solution_question import SolutionQuestionSerializer
+from api.serializers.viewer_state import (
+    ViewerState,
+    ViewerStateListSerializer,
+    ViewerStateSerializerMixin,
+)
+from api.utils.serializer_query_optimizer import optimize_queryset_for_serializer
 
 
 class UserContactSerializerForSolution(ModelSerializer):
@@ -91,6 +98,18 @@ class SolutionSerializer(ModelSerializer):
             'stripe_primary_price_unit_amount',
             'capacity_used',
         ]
+        list_serializer_class = ViewerStateListSerializer
+        # See optimize_queryset_for_serializer
+        select_related = ['stripe_primary_price']
+        annotate_counts = {
+            'annotated_bookings_count': 'bookings',
+            'annotated_capacity_used': Count(
+                'bookings',
+                filter=~Q(bookings__status=SolutionBooking.Status.COMPLETED)
+                & Q(bookings__is_payment_completed=True),
+                distinct=True,
+            ),
+        }
 
     def _get_booked_users_count(self, instance):
         """
@@ -98,6 +117,8 @@ class SolutionSerializer(ModelSerializer):
         Maybe renamne this later if appropriate.
         """
         solution_instance = instance
+        if hasattr(solution_instance, 'annotated_bookings_count'):
+            return solution_instance.annotated_bookings_count
         return solution_instance.bookings.count()
 
     def _get_solution_review_avg_rating(self, instance):
@@ -110,7 +131,17 @@ class SolutionSerializer(ModelSerializer):
         return happy_count - sad_count
 
 
-class AuthenticatedSolutionSerializer(SolutionSerializer):
+class SolutionSuggestionSerializer(ModelSerializer):
+    """
+    The lightweight payload of a solution suggested by /autocomplete-solutions/, it is stored in the solution index.
+    """
+
+    class Meta:
+        model = Solution
+        fields = ['id', 'slug', 'title', 'type']
+
+
+class AuthenticatedSolutionSerializer(ViewerStateSerializerMixin, SolutionSerializer):
     my_solution_vote = serializers.SerializerMethodField(
         method_name="_get_my_solution_vote"
     )
@@ -124,58 +155,25 @@ class AuthenticatedSolutionSerializer(SolutionSerializer):
     last_solution_booking = serializers.SerializerMethodField()
 
     def get_last_solution_booking(self, obj):
-        try:
-            queryset = SolutionBooking.objects.filter(
-                booked_by_id=self.context['request'].user.pk,
-                solution_id=obj.id,
-            ).order_by('-updated')[:1]
-            return SolutionBookingSerializer(queryset, many=True).data
-        except ():
-            return None
+        solution_booking = self.get_viewer_state('last_booking', obj)
+        return SolutionBookingSerializer(
+            [solution_booking] if solution_booking else [], many=True
+        ).data
 
     def _get_my_solution_vote(self, instance):
-        logged_in_user = self.context['request'].user
-        if not logged_in_user:
-            return None
-
-        try:
-            solution_vote = SolutionVote.objects.get(
-                user=logged_in_user, solution=instance
-            )
-            return solution_vote.id
-        except SolutionVote.DoesNotExist:
-            return None
+        solution_vote = self.get_viewer_state('vote', instance)
+        return solution_vote.id if solution_vote else None
 
     def _get_my_solution_bookmark(self, instance):
-        logged_in_user = self.context['request'].user
-
-        if not logged_in_user:
-            return None
-
-        try:
-            solution_bookmark = SolutionBookmark.objects.get(
-                user=logged_in_user, solution=instance
-            )
-            return solution_bookmark.id
-        except SolutionBookmark.DoesNotExist:
-            return None
+        solution_bookmark = self.get_viewer_state('bookmark', instance)
+        return solution_bookmark.id if solution_bookmark else None
 
     def _get_my_solution_review(self, instance):
         """
         Return solution review type of authenticated user
         """
-        logged_in_user = self.context['request'].user
-
-        if not logged_in_user:
-            return None
-
-        try:
-            solution_review = SolutionReview.objects.get(
-                user=logged_in_user, solution=instance
-            )
-            return solution_review.type
-        except SolutionReview.DoesNotExist:
-            return None
+        solution_review = self.get_viewer_state('review', instance)
+        return solution_review.type if solution_review else None
 
     class Meta(SolutionSerializer.Meta):
         fields = SolutionSerializer.Meta.fields + [
@@ -184,9 +182,25 @@ class AuthenticatedSolutionSerializer(SolutionSerializer):
             'last_solution_booking',
             'my_solution_review',
         ]
-
-
-class AuthenticatedSolutionForBookmarkSerializer(ModelSerializer):
+        viewer_states = {
+            'vote': ViewerState(SolutionVote, 'solution'),
+            'bookmark': ViewerState(SolutionBookmark, 'solution'),
+            'review': ViewerState(SolutionReview, 'solution'),
+            'last_booking': ViewerState(
+                SolutionBooking,
+                'solution',
+                user_field='booked_by',
+                latest_by='updated',
+                queryset=optimize_queryset_for_serializer(
+                    SolutionBooking.objects.all(), SolutionBookingSerializer
+                ),
+            ),
+        }
+
+
+class AuthenticatedSolutionForBookmarkSerializer(
+    ViewerStateSerializerMixin, ModelSerializer
+):
     organization = OrganizationSerializer(read_only=True)
     tags = TagSerializer(read_only=True, many=True)
     upvotes_count = serializers.IntegerField(read_only=True)
@@ -195,18 +209,8 @@ class AuthenticatedSolutionForBookmarkSerializer(ModelSerializer):
     )
 
     def _get_my_solution_vote(self, instance):
-        logged_in_user = self.context['request'].user
-
-        if not logged_in_user:
-            return None
-
-        try:
-            solution_vote = SolutionVote.objects.get(
-                user=logged_in_user, solution=instance
-            )
-            return solution_vote.id
-        except SolutionVote.DoesNotExist:
-            return None
+        solution_vote = self.get_viewer_state('vote', instance)
+        return solution_vote.id if solution_vote else None
 
     class Meta:
         model = Solution
@@ -219,3 +223,5 @@ class AuthenticatedSolutionForBookmarkSerializer(ModelSerializer):
             'title',
             'my_solution_vote',
         ]
+        list_serializer_class = ViewerStateListSerializer
+        viewer_states = {'vote': ViewerState(SolutionVote, 'solution')}
@@ -166,6 +166,8 @@ class SolutionBookingSerializer(ModelSerializer):
             'price_at_booking',
             'metered_booking_info',
         ]
+        # Used by metered_booking_info, see optimize_queryset_for_serializer
+        select_related = ['solution', 'stripe_subscription']
         read_only_fields = [
             'solution',
             'booked_by',
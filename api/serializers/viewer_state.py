@@ -0,0 +1,100 @@
+"""
+Loads the "my ..." fields of the logged in user (their vote, bookmark, review, etc.) for all the objects on a page at
+once instead of querying them per serialized object.
+"""
+
+from typing import Optional
+
+from django.db import models
+from rest_framework.serializers import ListSerializer
+
+
+class ViewerState:
+    """
+    A relation between the logged in user and the serialized objects, e.g. their vote on an asset. If latest_by is
+    given only the latest row (by that field) per object is kept.
+    """
+
+    def __init__(
+        self,
+        model,
+        object_field: str,
+        user_field: str = 'user',
+        latest_by: Optional[str] = None,
+        queryset: Optional[models.QuerySet] = None,
+    ):
+        self.model = model
+        self.object_field = object_field
+        self.user_field = user_field
+        self.latest_by = latest_by
+        self.queryset = queryset
+
+    def load(self, object_ids: list, user) -> dict:
+        """
+        Returns object id -> row of the relation between the user and that object (objects without one are left out).
+        """
+        object_id_field = '{}_id'.format(self.object_field)
+        queryset = self.queryset if self.queryset is not None else self.model.objects
+        queryset = queryset.filter(
+            **{self.user_field: user, '{}__in'.format(object_id_field): object_ids}
+        )
+        if self.latest_by:
+            # DISTINCT ON keeps the first row per object, i.e. the latest one
+            queryset = queryset.order_by(
+                object_id_field, '-{}'.format(self.latest_by)
+            ).distinct(object_id_field)
+        return {getattr(row, object_id_field): row for row in queryset}
+
+
+class ViewerStateSerializerMixin:
+    """
+    Resolves the `Meta.viewer_states` ({name: ViewerState}) of the logged in user for the serialized objects, with
+    one query per viewer state for a whole list (see ViewerStateListSerializer). Serializer methods read them using
+    get_viewer_state().
+    """
+
+    def _get_loaded_viewer_states(self) -> dict:
+        # Kept in the context so that it is shared by the list serializer and its child
+        return self.context.setdefault('viewer_states', {})
+
+    def load_viewer_states(self, instances: list) -> None:
+        request = self.context.get('request')
+        user = request.user if request is not None else None
+        loaded_viewer_states = self._get_loaded_viewer_states()
+
+        for name, viewer_state in self.Meta.viewer_states.items():
+            states = loaded_viewer_states.setdefault((self.Meta.model, name), {})
+            object_ids = [
+                instance.pk for instance in instances if instance.pk not in states
+            ]
+            if not object_ids:
+                continue
+
+            rows = (
+                viewer_state.load(object_ids, user)
+                if user is not None and user.is_authenticated
+                else {}
+            )
+            for object_id in object_ids:
+                states[object_id] = rows.get(object_id)
+
+    def get_viewer_state(self, name: str, instance):
+        """
+        Returns the row of the given viewer state between the logged in user and the instance, or None.
+        """
+        states = self._get_loaded_viewer_states().get((self.Meta.model, name), {})
+        if instance.pk not in states:
+            self.load_viewer_states([instance])
+        return self._get_loaded_viewer_states()[(self.Meta.model, name)][instance.pk]
+
+
+class ViewerStateListSerializer(ListSerializer):
+    """
+    Loads the viewer states of all the objects being serialized before serializing them one by one.
+    """
+
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, models.Manager) else data)
+        if isinstance(self.child, ViewerStateSerializerMixin):
+            self.child.load_viewer_states(instances)
+        return super().to_representation(instances)
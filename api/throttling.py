@@ -1,3 +1,5 @@
+import math
+
 from rest_framework.throttling import UserRateThrottle
 
 from api.models import User
@@ -5,7 +7,94 @@ from api.models import User
 #  from sentry_sdk import capture_message
 
 
-class SubscriptionDailyRateThrottle(UserRateThrottle):
+class SlidingWindowRateThrottle(UserRateThrottle):
+    """
+    A user rate throttle that keeps two integers per user in the cache instead of the timestamp of every request in
+    the window (which DRF's throttles read, trim and write back on every request).
+
+    The requests are counted per fixed window of `duration` seconds, and the requests of the last `duration` seconds
+    are estimated as the count of the current window plus the count of the previous window weighted by how much of it
+    the sliding window still covers. The counts are changed with atomic cache increments, so that the requests of
+    concurrent workers are all counted. This requires the default cache to be shared by the workers (Memcached, see
+    CACHES in settings): with a per-process cache each worker counts (and reports in X-RateLimit-Remaining) only the
+    requests it served, which lets a user make up to `num_requests` requests per worker.
+
+    The limit, remaining requests and reset time are kept on the request for RateLimitHeadersMiddleware to send as
+    X-RateLimit-* headers.
+    """
+
+    def _get_window_key(self, window: int) -> str:
+        return '{}:{}'.format(self.key, window)
+
+    def _get_previous_window_weight(self) -> float:
+        return 1 - (self.now % self.duration) / self.duration
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current_key = self._get_window_key(window)
+        self.previous_count = self.cache.get(self._get_window_key(window - 1), 0)
+
+        try:
+            self.current_count = self.cache.incr(current_key)
+        except ValueError:
+            # The first request of the window, the count is kept until the end of the next one
+            self.cache.add(current_key, 0, 2 * self.duration)
+            self.current_count = self.cache.incr(current_key)
+
+        previous_window_weight = self._get_previous_window_weight()
+        allowed = (
+            self.previous_count * previous_window_weight + self.current_count
+            <= self.num_requests
+        )
+        if not allowed:
+            # Only allowed requests count towards the limit
+            self.current_count = self.cache.decr(current_key)
+
+        remaining = self.num_requests - math.ceil(
+            self.previous_count * previous_window_weight + self.current_count
+        )
+        # On the HttpRequest, which the middlewares get
+        getattr(request, '_request', request).rate_limit = {
+            'limit': self.num_requests,
+            'remaining': max(remaining, 0),
+            'reset': (window + 1) * self.duration,
+        }
+        return allowed
+
+    def wait(self):
+        """
+        The seconds until a request would be allowed again.
+        """
+        elapsed = self.now % self.duration
+        if self.current_count < self.num_requests:
+            # Until enough of the previous window slides out
+            if not self.previous_count:
+                return None
+            weight = (self.num_requests - self.current_count - 1) / self.previous_count
+            return max(self.duration * (1 - weight) - elapsed, 0)
+
+        # Until the end of the window, and then until enough of it slides out
+        weight = (self.num_requests - 1) / self.current_count
+        return self.duration - elapsed + self.duration * (1 - weight)
+
+
+class UserDailyRateThrottle(SlidingWindowRateThrottle):
+    """
+    The default limit of every user (and of the anonymous users by ip), in place of DRF's UserRateThrottle.
+    """
+
+    scope = "user"
+
+
+class SubscriptionDailyRateThrottle(SlidingWindowRateThrottle):
     """
     To impose a different throttle rate for different users.
     """
@@ -18,11 +107,7 @@ class SubscriptionDailyRateThrottle(UserRateThrottle):
 
     def allow_request(self, request, view):
         """
-        Override rest_framework.throttling.SimpleRateThrottle.allow_request
-        Check to see if the request should be throttled.
-
-        On success calls `throttle_success`.
-        On failure calls `throttle_failure`.
+        Check to see if the request should be throttled, against the daily limit of the user's subscription.
         """
         if request.user.is_staff:
             # No throttling
@@ -38,27 +123,12 @@ class SubscriptionDailyRateThrottle(UserRateThrottle):
                 # No limit == unlimited plan
                 return True
 
-        # Original logic from the parent method...
-        if self.rate is None:
-            return True
-
-        self.key = self.get_cache_key(request, view)
-        if self.key is None:
-            return True
-
-        self.history = self.cache.get(self.key, [])
-        self.now = self.timer()
-
-        # Drop any requests from the history which have now passed the
-        # throttle duration
-        while self.history and self.history[-1] <= self.now - self.duration:
-            self.history.pop()
-        if len(self.history) >= self.num_requests:
-            # capture_message(
-            #     'Rate Limit Error for user: {}, request path: {}!'.format(
-            #         request.user, request.path
-            #     ),
-            #     level="error",
-            # )
-            return self.throttle_failure()
-        return self.throttle_success()
+        allowed = super().allow_request(request, view)
+        # if not allowed:
+        #     capture_message(
+        #         'Rate Limit Error for user: {}, request path: {}!'.format(
+        #             request.user, request.path
+        #         ),
+        #         level="error",
+        #     )
+        return allowed
@@ -0,0 +1,94 @@
+"""
+In-process prefix indexes of the tag, asset and organization names used for autocomplete suggestions, so that most
+keystrokes are answered without a network hop. Elasticsearch remains the fallback for queries the indexes have no
+suggestions for.
+"""
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+from api.models import Asset, Organization, Tag
+from api.serializers.organization import OrganizationSerializer
+from api.serializers.tag import TagSerializer
+from api.utils.prefix_index import PrefixIndex, VersionedIndex
+
+
+class AutocompleteIndex:
+    def __init__(
+        self, tags: PrefixIndex, assets: PrefixIndex, organizations: PrefixIndex
+    ):
+        # Values: tag and organization suggestions (as their autocomplete endpoints return them) and
+        # (asset name, asset slug) tuples
+        self.tags = tags
+        self.assets = assets
+        self.organizations = organizations
+
+
+def build_autocomplete_index() -> AutocompleteIndex:
+    tags = list(
+        Tag.objects.order_by('name').only('name', 'slug', 'description', 'counter')
+    )
+    organizations = list(
+        Organization.objects.order_by('name').only('name', 'website', 'logo_url')
+    )
+    return AutocompleteIndex(
+        tags=PrefixIndex(
+            ([tag.name], suggestion, tag.counter)
+            for tag, suggestion in zip(tags, TagSerializer(tags, many=True).data)
+        ),
+        assets=PrefixIndex(
+            ([name, slug], (name, slug), upvotes_count)
+            for name, slug, upvotes_count in Asset.objects.order_by('name').values_list(
+                'name', 'slug', 'upvotes_count'
+            )
+        ),
+        organizations=PrefixIndex(
+            ([organization.name], suggestion, 0)
+            for organization, suggestion in zip(
+                organizations, OrganizationSerializer(organizations, many=True).data
+            )
+        ),
+    )
+
+
+autocomplete_index = VersionedIndex(
+    'autocomplete',
+    build_autocomplete_index,
+    check_interval=settings.AUTOCOMPLETE_INDEX_VERSION_CHECK_INTERVAL,
+    max_age=settings.AUTOCOMPLETE_INDEX_MAX_AGE,
+)
+
+
+def get_autocomplete_index():
+    """
+    The autocomplete index of this process, or None if suggestions should come from Elasticsearch only.
+    """
+    if not settings.AUTOCOMPLETE_FROM_PREFIX_INDEX:
+        return None
+    return autocomplete_index.get(
+        in_background=settings.AUTOCOMPLETE_INDEX_REBUILD_IN_BACKGROUND
+    )
+
+
+# The fields of each model that the index is built from (see build_autocomplete_index and the serializers)
+_INDEXED_FIELDS = {
+    Tag: {'name', 'slug', 'description', 'counter'},
+    Asset: {'name', 'slug', 'upvotes_count'},
+    Organization: {'name', 'website', 'logo_url'},
+}
+
+
+def bump_autocomplete_index_version_on_save(
+    sender, instance, created=False, raw=False, update_fields=None, **kwargs
+):
+    indexed_fields = _INDEXED_FIELDS[sender]
+    if update_fields is not None and not indexed_fields & set(update_fields):
+        return
+    # The db values are still the ones from before the save (see ChangeTrackingMixin)
+    if created or raw or indexed_fields & instance.changed_fields:
+        autocomplete_index.bump_version()
+
+
+for model in _INDEXED_FIELDS:
+    post_save.connect(bump_autocomplete_index_version_on_save, sender=model)
+    post_delete.connect(autocomplete_index.bump_version, sender=model)
@@ -0,0 +1,625 @@
+"""
+A pure-Python full-text index scoring documents with BM25 (the similarity Elasticsearch uses by default), evaluating
+the subset of the Elasticsearch query DSL used by the app: bool, match_all, match, multi_match (best_fields and
+most_fields, with field boosts and minimum_should_match), match_phrase_prefix, term, terms, range and nested, and the
+terms and range aggregations.
+
+Analysis follows the index settings: html_strip char filter, standard tokenizer and lowercase/stop/stemmer token
+filters. The stemmer is a light English suffix stripper, not Snowball, so a few words stem differently than in
+Elasticsearch.
+"""
+
+import html
+import math
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Iterable
+
+# Lucene's default English stop words (the `stop` token filter)
+ENGLISH_STOP_WORDS = frozenset(
+    (
+        'a an and are as at be but by for if in into is it no not of on or such that the their then there these they '
+        'this to was will with'
+    ).split()
+)
+
+# Positions left between the values of a multi-valued field so that phrases don't match across values
+POSITION_INCREMENT_GAP = 100
+
+
+def _strip_html(text: str) -> str:
+    return html.unescape(re.sub(r'<[^>]*>', ' ', text))
+
+
+def stem_english(token: str) -> str:
+    """
+    Strips common English inflections (plurals, -ing, -ed, -ly), like a light version of the Snowball stemmer.
+    """
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    for suffix, replacement, min_stem_length in (
+        ('sses', 'ss', 2),
+        ('ies', 'i', 2),
+        ('ingly', '', 3),
+        ('edly', '', 3),
+        ('ing', '', 3),
+        ('ed', '', 3),
+        ('ly', '', 3),
+        ('s', '', 3),
+    ):
+        if token.endswith(suffix):
+            stem = token[: -len(suffix)]
+            if suffix == 's' and stem.endswith(('s', 'u')):
+                return token
+            if len(stem) >= min_stem_length and re.search('[aeiouy]', stem):
+                return stem + replacement
+            return token
+    return token
+
+
+class Analyzer:
+    """
+    Turns text into (position, token) pairs the way an Elasticsearch analyzer with the given char filters and token
+    filters (after the standard tokenizer) does. Stop words leave a gap in the positions, like in Elasticsearch.
+    """
+
+    def __init__(self, char_filters: Iterable[str] = (), filters: Iterable[str] = ()):
+        self.char_filters = list(char_filters)
+        self.filters = list(filters)
+
+    def analyze(self, text) -> list:
+        text = str(text)
+        if 'html_strip' in self.char_filters:
+            text = _strip_html(text)
+
+        tokens = []
+        for position, token in enumerate(re.findall(r'\w+', text)):
+            for token_filter in self.filters:
+                if token_filter == 'lowercase':
+                    token = token.lower()
+                elif token_filter == 'stop' and token.lower() in ENGLISH_STOP_WORDS:
+                    token = None
+                    break
+                elif token_filter in ('snowball', 'stemmer', 'porter_stem'):
+                    token = stem_english(token)
+            if token is not None:
+                tokens.append((position, token))
+        return tokens
+
+    def get_tokens(self, text) -> list:
+        return [token for _, token in self.analyze(text)]
+
+
+STANDARD_ANALYZER = Analyzer(filters=['lowercase'])
+
+
+def get_analyzer(name: str, analysis: dict = None) -> Analyzer:
+    """
+    The analyzer of the given name, either a custom one defined in the `analysis` index settings or a built-in one
+    (which are all approximated by the standard analyzer, except `english`).
+    """
+    definition = ((analysis or {}).get('analyzer') or {}).get(name)
+    if definition:
+        return Analyzer(definition.get('char_filter', []), definition.get('filter', []))
+    if name == 'english':
+        return Analyzer(filters=['lowercase', 'stop', 'snowball'])
+    return STANDARD_ANALYZER
+
+
+def get_fields_from_mapping(mapping: dict, analysis: dict = None) -> dict:
+    """
+    Field path (e.g. 'tags.slug', 'name.raw') -> (source path, type, Analyzer or None) of the searchable fields of an
+    index mapping (a `properties` dict), sub-fields included. Objects that aren't enabled are left out.
+    """
+    fields = {}
+
+    def add_properties(properties: dict, prefix: str):
+        for name, definition in properties.items():
+            path = prefix + name
+            if 'properties' in definition:
+                add_properties(definition['properties'], path + '.')
+                continue
+            field_type = definition.get('type', 'object')
+            if field_type == 'object' or definition.get('enabled') is False:
+                continue
+            fields[path] = _get_field(path, definition, analysis)
+            for sub_name, sub_definition in definition.get('fields', {}).items():
+                fields['{}.{}'.format(path, sub_name)] = _get_field(
+                    path, sub_definition, analysis
+                )
+
+    add_properties(mapping, '')
+    return fields
+
+
+def _get_field(source_path: str, definition: dict, analysis: dict) -> tuple:
+    field_type = definition.get('type')
+    if field_type in ('text', 'search_as_you_type'):
+        return (
+            source_path,
+            'text',
+            get_analyzer(definition.get('analyzer', 'standard'), analysis),
+        )
+    return source_path, field_type, None
+
+
+def get_source_values(source, path: str) -> list:
+    """
+    The non null values at the given dotted path of a document, objects in arrays included (like Elasticsearch
+    flattens them).
+    """
+    values = [source]
+    for key in path.split('.'):
+        next_values = []
+        for value in values:
+            if isinstance(value, list):
+                value = [item for item in value if isinstance(item, dict)]
+            else:
+                value = [value] if isinstance(value, dict) else []
+            for item in value:
+                item_value = item.get(key)
+                if isinstance(item_value, list):
+                    next_values.extend(item_value)
+                elif item_value is not None:
+                    next_values.append(item_value)
+        values = next_values
+    return [value for value in values if value is not None]
+
+
+def get_minimum_should_match(spec, clauses_count: int) -> int:
+    """
+    The number of optional clauses that have to match for the given minimum_should_match spec, e.g. 2, '-1', '75%',
+    '-25%' or combinations like '3<75%' (all of them are required up to 3 clauses, 75% of them when there are more).
+    """
+    if spec is None:
+        return 1
+    spec = str(spec).strip()
+    if '<' in spec:
+        required = clauses_count
+        for combination in spec.split():
+            threshold, _, combination_spec = combination.partition('<')
+            if clauses_count > int(threshold):
+                required = get_minimum_should_match(combination_spec, clauses_count)
+        return required
+
+    if spec.endswith('%'):
+        percentage = int(spec[:-1])
+        required = int(clauses_count * abs(percentage) / 100)
+        if percentage < 0:
+            required = clauses_count - required
+    else:
+        required = int(spec)
+        if required < 0:
+            required = clauses_count + required
+    return max(0, min(required, clauses_count))
+
+
+def _parse_field(field: str) -> tuple:
+    name, _, boost = field.partition('^')
+    return name, float(boost) if boost else 1.0
+
+
+class BM25Index:
+    """
+    An immutable index of documents, searched with Elasticsearch query DSL dicts.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, documents: Iterable[tuple], fields: dict):
+        """
+        :param documents: (id, source) pairs, in the order that breaks ties between equally scored hits.
+        :param fields: See get_fields_from_mapping.
+        """
+        self.fields = fields
+        self.ids = []
+        self.sources = []
+        # field path -> token -> document number -> positions of the token
+        self._postings = defaultdict(lambda: defaultdict(dict))
+        # field path -> document number -> number of tokens
+        self._lengths = defaultdict(dict)
+        # field path -> document number -> values (for the fields that are not analyzed)
+        self._values = defaultdict(dict)
+        self._sorted_tokens = {}
+
+        for doc, (doc_id, source) in enumerate(documents):
+            self.ids.append(str(doc_id))
+            self.sources.append(source)
+            for path, (source_path, field_type, analyzer) in fields.items():
+                values = get_source_values(source, source_path)
+                if not values:
+                    continue
+                if analyzer is None:
+                    self._values[path][doc] = values
+                    continue
+
+                offset = 0
+                length = 0
+                for value in values:
+                    tokens = analyzer.analyze(value)
+                    for position, token in tokens:
+                        self._postings[path][token].setdefault(doc, []).append(
+                            offset + position
+                        )
+                    length += len(tokens)
+                    offset += (
+                        tokens[-1][0] + 1 if tokens else 0
+                    ) + POSITION_INCREMENT_GAP
+                self._lengths[path][doc] = length
+
+        self._average_lengths = {
+            path: sum(lengths.values()) / len(lengths)
+            for path, lengths in self._lengths.items()
+            if lengths
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query: dict = None) -> list:
+        """
+        (document number, score) pairs of the documents matching the query, by descending score.
+        """
+        scores = self._evaluate(query or {'match_all': {}})
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def aggregate(self, aggs: dict, docs: Iterable[int]) -> dict:
+        """
+        The results of (terms and range) aggregations of the given documents by name, as Elasticsearch returns them.
+        """
+        docs = list(docs)
+        results = {}
+        for name, agg in aggs.items():
+            if 'aggs' in agg or 'aggregations' in agg:
+                raise ValueError('Sub-aggregations are not supported')
+            ((agg_type, params),) = (
+                (key, value) for key, value in agg.items() if key != 'meta'
+            )
+            aggregate = getattr(self, '_aggregate_{}'.format(agg_type), None)
+            if aggregate is None:
+                raise ValueError('Unsupported aggregation: {}'.format(agg_type))
+            results[name] = aggregate(params, docs)
+        return results
+
+    def _get_doc_values(self, path: str, doc: int) -> list:
+        _, _, analyzer = self._get_field(path)
+        if analyzer is not None:
+            raise ValueError('Text fields can not be aggregated: {}'.format(path))
+        return self._values[path].get(doc, [])
+
+    def _aggregate_terms(self, params: dict, docs: list) -> dict:
+        counts = Counter()
+        for doc in docs:
+            counts.update(set(self._get_doc_values(params['field'], doc)))
+        # By descending count, then key, like Elasticsearch
+        sorted_counts = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        size = params.get('size', 10)
+
+        buckets = []
+        for key, doc_count in sorted_counts[:size]:
+            if isinstance(key, bool):
+                bucket = {'key': int(key), 'key_as_string': str(key).lower()}
+            else:
+                bucket = {'key': key}
+            bucket['doc_count'] = doc_count
+            buckets.append(bucket)
+        return {
+            'doc_count_error_upper_bound': 0,
+            'sum_other_doc_count': sum(count for _, count in sorted_counts[size:]),
+            'buckets': buckets,
+        }
+
+    def _aggregate_range(self, params: dict, docs: list) -> dict:
+        buckets = []
+        for bucket_range in params['ranges']:
+            start, end = bucket_range.get('from'), bucket_range.get('to')
+            bucket = {
+                'key': '{}-{}'.format(
+                    '*' if start is None else float(start),
+                    '*' if end is None else float(end),
+                )
+            }
+            if start is not None:
+                bucket['from'] = float(start)
+            if end is not None:
+                bucket['to'] = float(end)
+            bucket['doc_count'] = sum(
+                any(
+                    (start is None or float(value) >= start)
+                    and (end is None or float(value) < end)
+                    for value in self._get_doc_values(params['field'], doc)
+                )
+                for doc in docs
+            )
+            buckets.append(bucket)
+        return {'buckets': buckets}
+
+    def _evaluate(self, query: dict) -> dict:
+        ((query_type, params),) = query.items()
+        evaluate = getattr(self, '_evaluate_{}'.format(query_type), None)
+        if evaluate is None:
+            raise ValueError('Unsupported query: {}'.format(query_type))
+        return evaluate(params)
+
+    def _get_bm25(self, path: str, token: str, doc: int) -> float:
+        postings = self._postings[path].get(token, {})
+        if doc not in postings:
+            return 0.0
+        docs_count = len(self._lengths[path])
+        idf = math.log(1 + (docs_count - len(postings) + 0.5) / (len(postings) + 0.5))
+        tf = len(postings[doc])
+        length_norm = self._lengths[path][doc] / self._average_lengths[path]
+        return idf * tf / (tf + self.K1 * (1 - self.B + self.B * length_norm))
+
+    def _get_field(self, path: str) -> tuple:
+        field = self.fields.get(path)
+        if field is None:
+            # Unmapped fields match nothing, like in Elasticsearch
+            return path, None, None
+        return field
+
+    def _match_value(self, path: str, value, boost: float = 1.0) -> dict:
+        """
+        Documents having the exact (non analyzed) value, scored with a constant score.
+        """
+        _, _, analyzer = self._get_field(path)
+        if analyzer is not None:
+            return {doc: boost for doc in self._postings[path].get(str(value), {})}
+        return {
+            doc: boost
+            for doc, values in self._values[path].items()
+            if any(_values_equal(field_value, value) for field_value in values)
+        }
+
+    def _match_field(
+        self, path: str, query, minimum_should_match=None, operator='or', boost=1.0
+    ) -> dict:
+        _, _, analyzer = self._get_field(path)
+        if analyzer is None:
+            return self._match_value(path, query, boost)
+
+        tokens = list(dict.fromkeys(analyzer.get_tokens(query)))
+        if not tokens:
+            return {}
+        if operator.lower() == 'and':
+            required = len(tokens)
+        else:
+            required = max(
+                1, get_minimum_should_match(minimum_should_match, len(tokens))
+            )
+
+        matched_counts = defaultdict(int)
+        scores = defaultdict(float)
+        for token in tokens:
+            for doc in self._postings[path].get(token, {}):
+                matched_counts[doc] += 1
+                scores[doc] += self._get_bm25(path, token, doc)
+        return {
+            doc: score * boost
+            for doc, score in scores.items()
+            if matched_counts[doc] >= required
+        }
+
+    def _match_phrase_prefix_field(
+        self, path: str, query, max_expansions=50, boost=1.0
+    ) -> dict:
+        _, _, analyzer = self._get_field(path)
+        if analyzer is None:
+            prefix = str(query)
+            return {
+                doc: boost
+                for doc, values in self._values[path].items()
+                if any(str(value).startswith(prefix) for value in values)
+            }
+
+        tokens = analyzer.analyze(query)
+        if not tokens:
+            return {}
+        first_position = tokens[0][0]
+        phrase = [(position - first_position, token) for position, token in tokens]
+        last_offset, prefix = phrase[-1]
+
+        if path not in self._sorted_tokens:
+            self._sorted_tokens[path] = sorted(self._postings[path])
+        sorted_tokens = self._sorted_tokens[path]
+        start = bisect_left(sorted_tokens, prefix)
+        expansions = []
+        for token in sorted_tokens[start : start + max_expansions]:
+            if not token.startswith(prefix):
+                break
+            expansions.append(token)
+
+        scores = {}
+        postings = self._postings[path]
+        for expansion in expansions:
+            for doc, expansion_positions in postings[expansion].items():
+                if any(
+                    all(
+                        doc in postings.get(token, {})
+                        and position - last_offset + offset in postings[token][doc]
+                        for offset, token in phrase[:-1]
+                    )
+                    for position in expansion_positions
+                ):
+                    score = self._get_bm25(path, expansion, doc) + sum(
+                        self._get_bm25(path, token, doc) for _, token in phrase[:-1]
+                    )
+                    scores[doc] = max(scores.get(doc, 0.0), score * boost)
+        return scores
+
+    @staticmethod
+    def _get_field_params(params: dict, default_key: str = 'query') -> tuple:
+        # {field: value} or {field: {default_key: value, **options}}
+        ((path, value),) = (
+            (key, value) for key, value in params.items() if key != 'boost'
+        )
+        if isinstance(value, dict):
+            value = dict(value)
+            return path, value.pop(default_key), value
+        return path, value, {}
+
+    def _evaluate_match_all(self, params: dict) -> dict:
+        return {doc: params.get('boost', 1.0) for doc in range(len(self.ids))}
+
+    def _evaluate_match(self, params: dict) -> dict:
+        path, query, options = self._get_field_params(params)
+        return self._match_field(
+            path,
+            query,
+            minimum_should_match=options.get('minimum_should_match'),
+            operator=options.get('operator', 'or'),
+            boost=options.get('boost', 1.0),
+        )
+
+    def _evaluate_match_phrase_prefix(self, params: dict) -> dict:
+        path, query, options = self._get_field_params(params)
+        return self._match_phrase_prefix_field(
+            path,
+            query,
+            max_expansions=options.get('max_expansions', 50),
+            boost=options.get('boost', 1.0),
+        )
+
+    def _evaluate_multi_match(self, params: dict) -> dict:
+        query_type = params.get('type', 'best_fields')
+        field_scores = []
+        for field in params.get('fields') or list(self.fields):
+            path, boost = _parse_field(field)
+            if query_type == 'phrase_prefix':
+                scores = self._match_phrase_prefix_field(
+                    path,
+                    params['query'],
+                    max_expansions=params.get('max_expansions', 50),
+                    boost=boost,
+                )
+            else:
+                scores = self._match_field(
+                    path,
+                    params['query'],
+                    minimum_should_match=params.get('minimum_should_match'),
+                    operator=params.get('operator', 'or'),
+                    boost=boost,
+                )
+            field_scores.append(scores)
+
+        combined = defaultdict(list)
+        for scores in field_scores:
+            for doc, score in scores.items():
+                combined[doc].append(score)
+
+        tie_breaker = (
+            1.0 if query_type == 'most_fields' else params.get('tie_breaker', 0.0)
+        )
+        query_boost = params.get('boost', 1.0)
+        return {
+            doc: (max(scores) + tie_breaker * (sum(scores) - max(scores))) * query_boost
+            for doc, scores in combined.items()
+        }
+
+    def _evaluate_term(self, params: dict) -> dict:
+        path, value, options = self._get_field_params(params, 'value')
+        return self._match_value(path, value, options.get('boost', 1.0))
+
+    def _evaluate_terms(self, params: dict) -> dict:
+        path, values, _ = self._get_field_params(params)
+        scores = {}
+        for value in values:
+            scores.update(self._match_value(path, value, params.get('boost', 1.0)))
+        return scores
+
+    def _evaluate_range(self, params: dict) -> dict:
+        ((path, bounds),) = params.items()
+        boost = bounds.get('boost', 1.0)
+        checks = {
+            'gt': lambda value, bound: value > bound,
+            'gte': lambda value, bound: value >= bound,
+            'lt': lambda value, bound: value < bound,
+            'lte': lambda value, bound: value <= bound,
+        }
+        bounds = {
+            operator: bound for operator, bound in bounds.items() if operator in checks
+        }
+        return {
+            doc: boost
+            for doc, values in self._values[path].items()
+            if any(
+                all(
+                    _compare(checks[operator], value, bound)
+                    for operator, bound in bounds.items()
+                )
+                for value in values
+            )
+        }
+
+    def _evaluate_nested(self, params: dict) -> dict:
+        # Nested objects are indexed flattened (like with include_in_root)
+        return self._evaluate(params['query'])
+
+    def _evaluate_bool(self, params: dict) -> dict:
+        def as_list(clauses):
+            return clauses if isinstance(clauses, list) else [clauses]
+
+        must = [self._evaluate(clause) for clause in as_list(params.get('must', []))]
+        filters = [
+            self._evaluate(clause) for clause in as_list(params.get('filter', []))
+        ]
+        should = [
+            self._evaluate(clause) for clause in as_list(params.get('should', []))
+        ]
+        must_not = [
+            self._evaluate(clause) for clause in as_list(params.get('must_not', []))
+        ]
+
+        if must or filters:
+            docs = set.intersection(*[set(scores) for scores in must + filters])
+            required_should = get_minimum_should_match(
+                params.get('minimum_should_match', 0), len(should)
+            )
+        else:
+            docs = set(range(len(self.ids)))
+            required_should = (
+                max(
+                    1,
+                    get_minimum_should_match(
+                        params.get('minimum_should_match'), len(should)
+                    ),
+                )
+                if should
+                else 0
+            )
+        for scores in must_not:
+            docs -= set(scores)
+
+        boost = params.get('boost', 1.0)
+        results = {}
+        for doc in docs:
+            matched_should = [scores[doc] for scores in should if doc in scores]
+            if len(matched_should) < required_should:
+                continue
+            results[doc] = (
+                sum(scores[doc] for scores in must) + sum(matched_should)
+            ) * boost
+        return results
+
+
+def _values_equal(field_value, value) -> bool:
+    if isinstance(field_value, bool) or isinstance(value, bool):
+        return str(field_value).lower() == str(value).lower()
+    if isinstance(field_value, (int, float)) and not isinstance(value, (int, float)):
+        try:
+            return field_value == float(value)
+        except (TypeError, ValueError):
+            return False
+    return field_value == value
+
+
+def _compare(check, value, bound) -> bool:
+    try:
+        return check(value, bound)
+    except TypeError:
+        try:
+            return check(float(value), float(bound))
+        except (TypeError, ValueError):
+            return check(str(value), str(bound))
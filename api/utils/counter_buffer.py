@@ -0,0 +1,93 @@
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Callable, Optional
+
+from django.db import connections
+
+
+class CounterBuffer:
+    """
+    An in-process (so per gunicorn worker) write-behind buffer for counters. Increments are coalesced per key in
+    memory and handed over to `flush_counts` (as a {key: count} dict) in one go, so that hot counters don't turn every
+    request into a write on the same rows.
+
+    Buffered counts are flushed by a background thread every `flush_interval` seconds, as soon as `max_pending`
+    increments are buffered and when the process exits gracefully. If the interval is None there is no background
+    thread and counts are flushed inline once `max_pending` is reached.
+    """
+
+    def __init__(
+        self,
+        flush_counts: Callable[[dict], None],
+        flush_interval: Optional[float] = 10,
+        max_pending: int = 1000,
+    ):
+        self._flush_counts = flush_counts
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._counts = Counter()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        # Threads don't survive a fork, so each (forked) worker process starts its own flusher thread
+        self._flusher_pid = None
+        atexit.register(self.flush)
+
+    def add(self, key, count: int = 1) -> None:
+        with self._lock:
+            self._counts[key] += count
+            self._pending += count
+            is_full = self._pending >= self._max_pending
+
+        if self._flush_interval is None:
+            if is_full:
+                self.flush()
+            return
+
+        self._ensure_flusher_thread()
+        if is_full:
+            self._flush_requested.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            counts, self._counts, self._pending = self._counts, Counter(), 0
+
+        if not counts:
+            return
+
+        try:
+            self._flush_counts(dict(counts))
+        except Exception as e:
+            logging.exception(e)
+            # Keep the counts around so that they can be flushed the next time
+            with self._lock:
+                self._counts.update(counts)
+                self._pending += sum(counts.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts, self._pending = Counter(), 0
+
+    def _ensure_flusher_thread(self) -> None:
+        if self._flusher_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+
+        threading.Thread(
+            target=self._run_flusher, name='counter-buffer-flusher', daemon=True
+        ).start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            self._flush_requested.wait(self._flush_interval)
+            self._flush_requested.clear()
+            self.flush()
+            # Don't keep the db connection of this thread open in between flushes
+            connections.close_all()
@@ -0,0 +1,370 @@
+"""
+Denormalized counters: columns of a model aggregating the rows of another (counted) model that point to it, e.g.
+Asset.upvotes_count is the number of AssetVote rows of the asset that are upvotes.
+
+The counters of a counted model are declared once with register_counters(). They are maintained from the saves and
+deletes of the counted model: the changes of all its counters on a row are applied by a single atomic UPDATE of that
+row (`SET upvotes_count = upvotes_count + 1, ...`), or added to slots that are rolled up later for a ShardedCounter.
+Writes that don't send signals (bulk_create(), QuerySet.update() and QuerySet.delete() of rows without signal
+receivers) aren't counted, reconcile_counters corrects the counters they leave behind.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    QuerySet,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from api.utils.models import ChangeTrackingMixin
+
+# Counted model -> its counters
+_counters = defaultdict(list)
+
+
+class Counter:
+    """
+    `field` of `model` is the number of rows of the counted model whose `foreign_key` (e.g. 'asset_id') points to it
+    and that have the values of `filter` and not the ones of `exclude` ({field name: value} dicts).
+    """
+
+    def __init__(self, model, field: str, foreign_key: str, filter=None, exclude=None):
+        self.model = model
+        self.field = field
+        self.foreign_key = foreign_key
+        self.filter = filter or {}
+        self.exclude = exclude or {}
+
+    @property
+    def counted_fields(self) -> set:
+        """
+        The fields of the counted model the counter depends on.
+        """
+        return {self.foreign_key, *self.filter, *self.exclude}
+
+    def is_counted(self, values: dict) -> bool:
+        return all(values[name] == value for name, value in self.filter.items()) and (
+            not any(values[name] == value for name, value in self.exclude.items())
+        )
+
+    def get_contribution(self, values: dict) -> tuple:
+        """
+        The (count, sum) that a row of the counted model, given as its counted_fields values, adds to the counter.
+        """
+        return (1, 0) if self.is_counted(values) else (0, 0)
+
+    def get_update(self, count_delta: int, sum_delta) -> dict:
+        """
+        The update() arguments applying the given changes to the counter.
+        """
+        return {self.field: F(self.field) + count_delta}
+
+    @property
+    def fields(self) -> tuple:
+        """
+        The fields of `model` the counter maintains.
+        """
+        return (self.field,)
+
+    def _get_counted_queryset(self, counted_model) -> QuerySet:
+        queryset = counted_model._default_manager.filter(**self.filter).exclude(
+            **{self.foreign_key: None}
+        )
+        for name, value in self.exclude.items():
+            queryset = queryset.exclude(**{name: value})
+        return queryset.order_by().values(self.foreign_key)
+
+    def compute(self, counted_model) -> dict:
+        """
+        The values of the counter computed from the rows of the counted model with a single grouped query (pk of the
+        counting row -> {field: value}), leaving out the rows that nothing is counted for.
+        """
+        return {
+            pk: {self.field: count}
+            for pk, count in self._get_counted_queryset(counted_model)
+            .annotate(count=Count('pk'))
+            .values_list(self.foreign_key, 'count')
+        }
+
+
+class AverageCounter(Counter):
+    """
+    `field` of `model` is the average `value_field` of the rows of the counted model that point to it (see Counter),
+    whose number is `count_field`.
+    """
+
+    def __init__(
+        self,
+        model,
+        field: str,
+        count_field: str,
+        value_field: str,
+        foreign_key: str,
+        filter=None,
+        exclude=None,
+    ):
+        super().__init__(model, field, foreign_key, filter, exclude)
+        self.count_field = count_field
+        self.value_field = value_field
+
+    @property
+    def counted_fields(self) -> set:
+        return super().counted_fields | {self.value_field}
+
+    def get_contribution(self, values: dict) -> tuple:
+        if not self.is_counted(values):
+            return 0, 0
+        return 1, values[self.value_field]
+
+    @property
+    def fields(self) -> tuple:
+        return (self.field, self.count_field)
+
+    def compute(self, counted_model) -> dict:
+        # Rounded like the stored averages
+        average = Cast(
+            Avg(self.value_field), output_field=self.model._meta.get_field(self.field)
+        )
+        return {
+            pk: {self.count_field: count, self.field: value}
+            for pk, count, value in self._get_counted_queryset(counted_model)
+            .annotate(count=Count('pk'), average=average)
+            .values_list(self.foreign_key, 'count', 'average')
+        }
+
+    def get_update(self, count_delta: int, sum_delta) -> dict:
+        output_field = self.model._meta.get_field(self.field)
+        # Expressions of an UPDATE all see the values of the row from before the update
+        return {
+            self.count_field: F(self.count_field) + count_delta,
+            self.field: Case(
+                When(**{self.count_field: -count_delta}, then=Value(0)),
+                default=ExpressionWrapper(
+                    (F(self.field) * F(self.count_field) + sum_delta)
+                    / (F(self.count_field) + count_delta),
+                    output_field=output_field,
+                ),
+                output_field=output_field,
+            ),
+        }
+
+
+class ShardedCounter(Counter):
+    """
+    A Counter for rows that many requests count on concurrently (e.g. the upvotes of an asset during its launch): its
+    changes are added to a random slot of the row in the CounterShard table instead of to the row itself, and rolled
+    up into `field` every settings.COUNTER_SHARDS_ROLLUP_INTERVAL seconds (see api.models.counter_shard). Reads that
+    must be exact add the changes that aren't rolled up yet, see add_unrolled_counts.
+    """
+
+    @property
+    def label(self) -> str:
+        return '{}.{}'.format(self.model._meta.label_lower, self.field)
+
+    def add_to_shard(self, pk, count_delta: int) -> None:
+        # Imported here as the counted models declare their counters while api.models is being imported
+        from api.models.counter_shard import add_to_counter_shard
+
+        add_to_counter_shard(self.label, pk, count_delta, settings.COUNTER_SHARDS)
+
+    def compute(self, counted_model) -> dict:
+        from api.models.counter_shard import get_unrolled_counts
+
+        values = super().compute(counted_model)
+        # The stored values don't include the changes that aren't rolled up yet
+        for pk, delta in get_unrolled_counts(self.label).items():
+            values.setdefault(pk, {self.field: 0})[self.field] -= delta
+        return values
+
+
+def _get_counted_fields(model) -> list:
+    return sorted(
+        set().union(*(counter.counted_fields for counter in _counters[model]))
+    )
+
+
+def _get_values(instance) -> dict:
+    # Deferred fields aren't saved, their values are the db ones (rather than one query each to load them)
+    deferred_fields = instance.get_deferred_fields()
+    db_values = instance.get_db_values() if deferred_fields else None
+    return {
+        name: db_values[name] if name in deferred_fields else getattr(instance, name)
+        for name in _get_counted_fields(type(instance))
+    }
+
+
+def update_counters(model, old_values: dict = None, new_values: dict = None) -> None:
+    """
+    Applies the change of a row of the counted model from `old_values` to `new_values` (the values of its counted
+    fields, None if it didn't exist or doesn't anymore) to its counters, with one UPDATE per counting row (and one
+    upsert per sharded counter).
+    """
+    # (counting model, pk) -> counter -> [count delta, sum delta]
+    deltas = defaultdict(dict)
+    for counter in _counters[model]:
+        for values, sign in ((old_values, -1), (new_values, 1)):
+            if values is None or values[counter.foreign_key] is None:
+                continue
+            count, total = counter.get_contribution(values)
+            delta = deltas[(counter.model, values[counter.foreign_key])].setdefault(
+                counter, [0, 0]
+            )
+            delta[0] += sign * count
+            delta[1] += sign * total
+
+    for (counting_model, pk), counter_deltas in deltas.items():
+        updates = {}
+        for counter, (count_delta, sum_delta) in counter_deltas.items():
+            if not (count_delta or sum_delta):
+                continue
+            if isinstance(counter, ShardedCounter):
+                counter.add_to_shard(pk, count_delta)
+            else:
+                updates.update(counter.get_update(count_delta, sum_delta))
+        if updates:
+            counting_model._default_manager.filter(pk=pk).update(**updates)
+
+
+def _load_old_values(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # Loads the db values that the instance didn't capture while the row still has them, see ChangeTrackingMixin
+        instance.get_db_values()
+
+
+def _count_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Loaded fixtures come with their counters
+        return
+    # The values from before the save, see ChangeTrackingMixin
+    old_values = None if created else instance.get_db_values()
+    update_counters(sender, old_values, _get_values(instance))
+
+
+def _count_delete(sender, instance, **kwargs):
+    update_counters(sender, _get_values(instance), None)
+
+
+def register_counters(model, *counters: Counter) -> None:
+    """
+    Declares the counters of the rows of `model` (a ChangeTrackingMixin model), which are then maintained from its
+    saves and deletes.
+    """
+    if not issubclass(model, ChangeTrackingMixin):
+        raise TypeError(
+            '{} must use ChangeTrackingMixin to have counters'.format(model.__name__)
+        )
+    if model not in _counters:
+        dispatch_uid = 'denormalized_counters_{}'.format(model._meta.label_lower)
+        pre_save.connect(_load_old_values, sender=model, dispatch_uid=dispatch_uid)
+        pre_delete.connect(_load_old_values, sender=model, dispatch_uid=dispatch_uid)
+        post_save.connect(_count_save, sender=model, dispatch_uid=dispatch_uid)
+        post_delete.connect(_count_delete, sender=model, dispatch_uid=dispatch_uid)
+    _counters[model].extend(counters)
+
+
+@contextmanager
+def _consistent_snapshot():
+    # The counters and the rows they count are read as of the same point in time, unless a transaction is already open
+    is_outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if is_outermost:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY'
+                )
+        yield
+
+
+def _get_counter_drifts() -> tuple:
+    """
+    The differences between the computed and the stored values of the counters: (counting model -> pk -> field ->
+    drift, counter label -> drift statistics).
+    """
+    # Counting model -> pk -> field -> computed value
+    computed_values = defaultdict(lambda: defaultdict(dict))
+    counting_fields = defaultdict(list)
+    for counted_model, counters in _counters.items():
+        for counter in counters:
+            counting_fields[counter.model].extend(
+                field
+                for field in counter.fields
+                if field not in counting_fields[counter.model]
+            )
+            for pk, values in counter.compute(counted_model).items():
+                row_values = computed_values[counter.model][pk]
+                for field, value in values.items():
+                    # The counters of the same field from several counted models add up (e.g. Solution.happy_count)
+                    row_values[field] = row_values.get(field, 0) + value
+
+    drifts = defaultdict(dict)
+    drift_stats = {}
+    for model, fields in counting_fields.items():
+        field_stats = {
+            field: {'rows': 0, 'drifted_rows': 0, 'total_drift': 0, 'max_drift': 0}
+            for field in fields
+        }
+        for pk, *stored_values in (
+            model._default_manager.order_by().values_list('pk', *fields).iterator()
+        ):
+            row_values = computed_values[model].get(pk, {})
+            for field, stored_value in zip(fields, stored_values):
+                stats = field_stats[field]
+                stats['rows'] += 1
+                drift = row_values.get(field, 0) - stored_value
+                if drift:
+                    drifts[model].setdefault(pk, {})[field] = drift
+                    stats['drifted_rows'] += 1
+                    stats['total_drift'] += abs(drift)
+                    stats['max_drift'] = max(stats['max_drift'], abs(drift))
+        for field, stats in field_stats.items():
+            drift_stats['{}.{}'.format(model._meta.label_lower, field)] = stats
+    return drifts, drift_stats
+
+
+def _correct_counters(model, row_drifts: dict, batch_size: int) -> None:
+    fields = sorted(
+        {field for field_drifts in row_drifts.values() for field in field_drifts}
+    )
+    corrections = []
+    for pk, field_drifts in row_drifts.items():
+        correction = model(pk=pk)
+        for field in fields:
+            # Increments rather than the computed values, so that the changes counted since they were read are kept
+            setattr(correction, field, F(field) + field_drifts.get(field, 0))
+        corrections.append(correction)
+    model._default_manager.bulk_update(corrections, fields, batch_size=batch_size)
+
+
+def reconcile_counters(batch_size: int = 1000, dry_run: bool = False) -> dict:
+    """
+    Recomputes all the counters from the rows they count and corrects the stored values that drifted (e.g. through
+    writes that don't send signals, or rounding of the averages): one grouped query per counter and one read of the
+    stored values per counting model, from the same snapshot, then bulk updates of `batch_size` corrected rows.
+
+    Returns the drift statistics per counter ('app_label.model_name.field' -> {'rows', 'drifted_rows', 'total_drift',
+    'max_drift'}).
+    """
+    from django_elasticsearch_dsl.registries import registry
+
+    from api.documents.signal_processor import update_search_documents
+
+    with _consistent_snapshot():
+        drifts, drift_stats = _get_counter_drifts()
+
+    if not dry_run:
+        for model, row_drifts in drifts.items():
+            _correct_counters(model, row_drifts, batch_size)
+            if registry.get_documents([model]):
+                update_search_documents(model, list(row_drifts))
+    return drift_stats
@@ -1,3 +1,5 @@
+import copy
+
 from django.db.models import Model, Manager, QuerySet
 
 
@@ -18,3 +20,108 @@ def get_or_none(model, *args, **kwargs):
         return qs.get(*args, **kwargs)
     except model.DoesNotExist:
         return None
+
+
+def _snapshot(value):
+    # Copies of mutable values (ArrayField, JSONField) so that changing them in place is seen as a change
+    return copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+
+
+class ChangeTrackingMixin:
+    """
+    Model mixin keeping the db values of the concrete fields of an instance: captured when it's loaded (see from_db)
+    and after each save, so that the signal receivers of a save can compare them with the values being saved (see
+    get_db_values and changed_fields) without each querying the previous state of the row.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._capture_db_values(zip(field_names, values))
+        return instance
+
+    def _capture_db_values(self, attnames_and_values) -> None:
+        db_values = self.__dict__.setdefault('_db_values', {})
+        for attname, value in attnames_and_values:
+            db_values[attname] = _snapshot(value)
+
+    def _capture_field_values(self, fields) -> None:
+        self._capture_db_values(
+            (field.attname, getattr(self, field.attname)) for field in fields
+        )
+
+    def _get_loaded_fields(self) -> list:
+        deferred_fields = self.get_deferred_fields()
+        return [
+            field
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred_fields
+        ]
+
+    def save_base(self, *args, update_fields=None, **kwargs):
+        # Set by models whose UPDATE leaves some columns out (see Asset._do_update), their db values didn't change
+        self._unwritten_attnames = ()
+        super().save_base(*args, update_fields=update_fields, **kwargs)
+        # After the post_save receivers, which still see the values from before the save
+        if update_fields is None:
+            self._capture_field_values(
+                [
+                    field
+                    for field in self._get_loaded_fields()
+                    if field.attname not in self._unwritten_attnames
+                ]
+            )
+        else:
+            self._capture_field_values(
+                [self._meta.get_field(name) for name in update_fields]
+            )
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        if fields is None:
+            self._capture_field_values(self._get_loaded_fields())
+        else:
+            self._capture_field_values([self._meta.get_field(name) for name in fields])
+
+    def get_db_values(self):
+        """
+        The db values of the concrete fields of the instance by attname, None for an instance that isn't saved yet.
+        The values that weren't captured (instances not loaded from the db, deferred fields) are loaded with a single
+        query, shared by the following calls.
+        """
+        if self._state.adding or self.pk is None:
+            return None
+        db_values = self.__dict__.setdefault('_db_values', {})
+        missing_attnames = [
+            field.attname
+            for field in self._meta.concrete_fields
+            if field.attname not in db_values
+        ]
+        if missing_attnames:
+            missing_values = (
+                type(self)
+                ._base_manager.using(self._state.db)
+                .filter(pk=self.pk)
+                .values(*missing_attnames)
+                .first()
+            )
+            if missing_values is None:
+                return None
+            self._capture_db_values(missing_values.items())
+        return db_values
+
+    @property
+    def changed_fields(self) -> set:
+        """
+        The attnames of the (non deferred) concrete fields whose value differs from the db one, all of them for an
+        instance that isn't saved yet.
+        """
+        attnames = [field.attname for field in self._get_loaded_fields()]
+        db_values = self.get_db_values()
+        if db_values is None:
+            return set(attnames)
+        return {
+            attname
+            for attname in attnames
+            if getattr(self, attname) != db_values[attname]
+        }
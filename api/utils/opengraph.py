@@ -0,0 +1,62 @@
+import logging
+from urllib.error import HTTPError
+from urllib.parse import quote_plus
+from urllib.request import urlopen
+
+import requests
+from django.conf import settings
+from furl import furl
+from opengraph import OpenGraph
+from opengraphio import OpenGraphIO
+
+
+def get_url_domain(url: str) -> str:
+    return furl(url).netloc.lower()
+
+
+def normalize_url(url: str) -> str:
+    """
+    Returns the url with its scheme and host lowercased, its path normalized (an empty path being '/') and without its
+    fragment, so that the different spellings of the url of a page are the same.
+    """
+    normalized_url = furl(url).remove(fragment=True)
+    if normalized_url.scheme:
+        normalized_url.scheme = normalized_url.scheme.lower()
+    if normalized_url.host:
+        normalized_url.host = normalized_url.host.lower()
+    normalized_url.path.normalize()
+    if not str(normalized_url.path):
+        normalized_url.path = '/'
+    return normalized_url.url
+
+
+def fetch_opengraph_data(url: str) -> dict:
+    """
+    Returns the OpenGraph description and image of the page at the given url as {'description': ..., 'image': ...}.
+    """
+    try:
+        with urlopen(url, timeout=settings.OPENGRAPH_FETCH_TIMEOUT) as response:
+            og_dict: dict = OpenGraph(html=response.read())
+
+        # https://ogp.me/ OpenGraph descriptions are short one-two sentences.
+        return {
+            'description': og_dict.get('description', ''),
+            'image': og_dict.get('image'),
+        }
+    except HTTPError as e:
+        # Some websites have same origin policy even for accessing OGP tags so trying to parse
+        # from their url may result in a forbidden error
+        logging.exception(e)
+
+    opengraph = OpenGraphIO({'app_id': settings.OPENGRAPH_IO_APP_ID})
+    response = requests.get(
+        settings.OPENGRAPH_IO_API_URL + quote_plus(url),
+        params=opengraph.get_site_info_query_params(),
+        timeout=settings.OPENGRAPH_FETCH_TIMEOUT,
+    )
+    response.raise_for_status()
+    hybrid_graph_dict = response.json()['hybridGraph']
+    return {
+        'description': hybrid_graph_dict.get('description', ''),
+        'image': hybrid_graph_dict.get('image'),
+    }
@@ -0,0 +1,153 @@
+import heapq
+import logging
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+from django.core.cache import cache
+from django.db import connections
+
+
+def normalize_prefix_index_text(text: str) -> str:
+    """
+    Lowercased words separated by single spaces, so "E-Commerce  Tools" and "e-com" are compared as "e commerce tools"
+    and "e com" (like the standard Elasticsearch analyzer tokenizes them).
+    """
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+class PrefixIndex:
+    """
+    An immutable in-memory index of values by the prefixes of their texts, kept as a sorted array of keys that is
+    binary searched. A value is indexed under each of its texts starting from every word of them (so "Email Marketing"
+    is found by "mark" too, like a match_phrase_prefix query would).
+    """
+
+    def __init__(self, items: Iterable[tuple]):
+        """
+        :param items: (texts, value, popularity) tuples, matches are returned by descending popularity and then in
+                      the order of the items.
+        """
+        self._values = []
+        self._popularities = []
+        entries = set()
+        for texts, value, popularity in items:
+            value_index = len(self._values)
+            self._values.append(value)
+            self._popularities.append(popularity)
+            for text in texts:
+                words = normalize_prefix_index_text(text or '').split(' ')
+                for i in range(len(words)):
+                    entries.add((' '.join(words[i:]), value_index))
+
+        entries = sorted(entries)
+        self._keys = [key for key, _ in entries]
+        self._key_value_indexes = [value_index for _, value_index in entries]
+
+    def __len__(self):
+        return len(self._values)
+
+    def search(self, prefix: str, limit: int) -> list:
+        prefix = normalize_prefix_index_text(prefix)
+        if not prefix:
+            return []
+
+        start = bisect_left(self._keys, prefix)
+        # Keys sharing the prefix are the ones sorted before the prefix followed by the greatest character
+        end = bisect_left(self._keys, prefix + '\U0010ffff', lo=start)
+        value_indexes = set(self._key_value_indexes[start:end])
+        return [
+            self._values[value_index]
+            for value_index in heapq.nsmallest(
+                limit,
+                value_indexes,
+                key=lambda value_index: (-self._popularities[value_index], value_index),
+            )
+        ]
+
+
+class VersionedIndex:
+    """
+    A per-process index (built by `build_index`) that is rebuilt once its version stamp, which is shared by all the
+    processes through the cache, is bumped (see bump_version) or it is older than `max_age` seconds. The stamp is only
+    read every `check_interval` seconds so that using the index costs no cache round trip most of the time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        build_index: Callable,
+        check_interval: float,
+        max_age: float,
+    ):
+        self._name = name
+        self._version_cache_key = 'index_version:{}'.format(name)
+        self._build_index = build_index
+        self._check_interval = check_interval
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+        self._built_at = None
+        self._checked_at = None
+        self._rebuild_thread = None
+
+    def bump_version(self, *args, **kwargs) -> None:
+        # Can be connected to model signals as is
+        cache.set(self._version_cache_key, uuid.uuid4().hex, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index = None
+
+    def _is_stale(self, now: float) -> bool:
+        if self._index is None or now - self._built_at >= self._max_age:
+            return True
+        if now - self._checked_at < self._check_interval:
+            return False
+        self._checked_at = now
+        return cache.get(self._version_cache_key) != self._version
+
+    def _rebuild(self) -> None:
+        version = cache.get(self._version_cache_key)
+        self._index = self._build_index()
+        self._version = version
+        self._built_at = self._checked_at = time.monotonic()
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            with self._lock:
+                self._rebuild()
+        except Exception as e:
+            # The current index is kept until the next attempt
+            logging.exception(e)
+        finally:
+            self._rebuild_thread = None
+            # The thread has its own db connection
+            connections.close_all()
+
+    def get(self, in_background: bool = False):
+        """
+        :param in_background: once there is an index, rebuild it on another thread and keep returning the current one
+                              meanwhile, instead of making the caller wait for the rebuild.
+        """
+        now = time.monotonic()
+        if self._is_stale(now):
+            if in_background and self._index is not None:
+                with self._lock:
+                    if self._rebuild_thread is None and self._built_at < now:
+                        self._rebuild_thread = threading.Thread(
+                            target=self._rebuild_in_background,
+                            name='rebuild-{}-index'.format(self._name),
+                            daemon=True,
+                        )
+                        self._rebuild_thread.start()
+            else:
+                with self._lock:
+                    # Another thread may have rebuilt it while this one was waiting
+                    if self._index is None or self._built_at < now:
+                        self._rebuild()
+        return self._index
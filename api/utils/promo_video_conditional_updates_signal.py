@@ -5,14 +5,13 @@ def promo_video_conditional_updates(sender, instance=None, **kwargs):
     """
     Performs some checks to compare old model state with new model state and perform conditional field update logic.
     Conditional updates help because they reduce average write time when saving many objects.
+    The old state comes from the instance, see ChangeTrackingMixin.
     """
-
-    try:
-        instance_old = sender.objects.get(pk=instance.pk)
-        if instance.promo_video and instance_old.promo_video is None:
-            # Only update the promo video if old video link was not set and the new is set
-            instance.promo_video = get_embed_video_url(instance.promo_video)
-    except sender.DoesNotExist:
-        # If it's a new solution being created for which an old one does not exist then
+    db_values = instance.get_db_values()
+    if db_values is None:
+        # If it's a new asset/solution being created for which an old one does not exist then
         # we still want to update the promo video
         instance.promo_video = get_embed_video_url(instance.promo_video)
+    elif instance.promo_video and db_values['promo_video'] is None:
+        # Only update the promo video if old video link was not set and the new is set
+        instance.promo_video = get_embed_video_url(instance.promo_video)
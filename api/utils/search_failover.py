@@ -0,0 +1,80 @@
+"""
+Failover of the search list views (/assets/?q=, /solutions/?q=) from Elasticsearch to Postgres full-text search.
+
+Elasticsearch requests of the searches are given settings.SEARCH_ELASTICSEARCH_LATENCY_BUDGET seconds. A request that
+exceeds it or fails is answered with Postgres full-text search instead (see full_text_search), and so are the following
+ones for settings.SEARCH_FAILOVER_COOLDOWN seconds, after which Elasticsearch is tried again. The state is kept in the
+default cache, so it is only shared by the processes when the cache is (see CACHES in settings), otherwise each process
+detects the outage and fails over on its own.
+"""
+
+import logging
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db.models import F, QuerySet
+from elasticsearch.exceptions import TransportError
+
+logger = logging.getLogger(__name__)
+
+ELASTICSEARCH = 'elasticsearch'
+POSTGRES = 'postgres'
+
+ELASTICSEARCH_UNAVAILABLE_CACHE_KEY = 'search_failover:elasticsearch_unavailable'
+
+
+def get_search_engine() -> str:
+    """
+    The engine searches should be sent to, ELASTICSEARCH or POSTGRES.
+    """
+    if settings.SEARCH_BACKEND == POSTGRES or cache.get(
+        ELASTICSEARCH_UNAVAILABLE_CACHE_KEY
+    ):
+        return POSTGRES
+    return ELASTICSEARCH
+
+
+def mark_elasticsearch_unavailable(error: Exception) -> None:
+    logger.warning(
+        'Elasticsearch search failed (%s), searching with Postgres for %s seconds',
+        error,
+        settings.SEARCH_FAILOVER_COOLDOWN,
+    )
+    cache.set(
+        ELASTICSEARCH_UNAVAILABLE_CACHE_KEY, True, settings.SEARCH_FAILOVER_COOLDOWN
+    )
+
+
+def is_elasticsearch_unavailable_error(error: Exception) -> bool:
+    """
+    Whether an error raised by an Elasticsearch request means the cluster is unavailable (time outs, connection and
+    server errors) rather than the request being wrong.
+    """
+    if not isinstance(error, TransportError):
+        return False
+    # ConnectionError (and ConnectionTimeout) have 'N/A' as status code
+    return not isinstance(error.status_code, int) or error.status_code >= 500
+
+
+def with_latency_budget(es_search):
+    """
+    The search with its requests timing out after settings.SEARCH_ELASTICSEARCH_LATENCY_BUDGET seconds.
+    """
+    return es_search.params(
+        request_timeout=settings.SEARCH_ELASTICSEARCH_LATENCY_BUDGET
+    )
+
+
+def full_text_search(queryset: QuerySet, search_query: str) -> QuerySet:
+    """
+    The rows of the queryset whose (GIN indexed) search_vector matches the search query, by descending ts_rank.
+    Unlike the Elasticsearch searches, all the words of the query are required (quoted phrases, OR and -word are
+    supported, see websearch_to_tsquery).
+    """
+    query = SearchQuery(search_query, config='english', search_type='websearch')
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(search_rank=SearchRank(F('search_vector'), query))
+        .order_by('-search_rank', 'pk')
+    )
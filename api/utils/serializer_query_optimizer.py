@@ -0,0 +1,101 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Prefetch, QuerySet
+from rest_framework.serializers import ListSerializer, ModelSerializer
+
+
+def _prefix_lookup(prefix: str, lookup):
+    if isinstance(lookup, Prefetch):
+        return Prefetch(
+            '{}__{}'.format(prefix, lookup.prefetch_through), queryset=lookup.queryset
+        )
+    return '{}__{}'.format(prefix, lookup)
+
+
+def _get_annotations(serializer: ModelSerializer) -> dict:
+    annotate_counts = getattr(serializer.Meta, 'annotate_counts', {})
+    return {
+        annotation: Count(count, distinct=True) if isinstance(count, str) else count
+        for annotation, count in annotate_counts.items()
+    }
+
+
+def _get_related_lookups(serializer: ModelSerializer) -> tuple:
+    """
+    Returns the (select_related lookups, prefetch_related lookups) needed to serialize instances with the given
+    serializer without querying the db per instance.
+    Relations serialized by nested model serializers are detected from the declared fields, relations that are only
+    used by method fields or model properties are listed in `Meta.select_related` / `Meta.prefetch_related`.
+    """
+    model = serializer.Meta.model
+    select_related = list(getattr(serializer.Meta, 'select_related', []))
+    prefetch_related = list(getattr(serializer.Meta, 'prefetch_related', []))
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        nested_serializer = field.child if isinstance(field, ListSerializer) else field
+        if not isinstance(nested_serializer, ModelSerializer) or '.' in field.source:
+            continue
+
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        nested_select_related, nested_prefetch_related = _get_related_lookups(
+            nested_serializer
+        )
+        if model_field.many_to_many or model_field.one_to_many:
+            if (
+                nested_select_related
+                or nested_prefetch_related
+                or _get_annotations(nested_serializer)
+            ):
+                # Whatever the nested serializer needs is applied to the prefetch query of the relation itself
+                prefetch_related.append(
+                    Prefetch(
+                        field.source,
+                        queryset=_optimize_queryset(
+                            model_field.related_model._default_manager.all(),
+                            nested_serializer,
+                        ),
+                    )
+                )
+            else:
+                prefetch_related.append(field.source)
+        else:
+            select_related.append(field.source)
+            select_related.extend(
+                _prefix_lookup(field.source, lookup) for lookup in nested_select_related
+            )
+            prefetch_related.extend(
+                _prefix_lookup(field.source, lookup)
+                for lookup in nested_prefetch_related
+            )
+
+    return select_related, prefetch_related
+
+
+def _optimize_queryset(queryset: QuerySet, serializer: ModelSerializer) -> QuerySet:
+    select_related, prefetch_related = _get_related_lookups(serializer)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+
+    annotations = _get_annotations(serializer)
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    return queryset
+
+
+def optimize_queryset_for_serializer(queryset: QuerySet, serializer_class) -> QuerySet:
+    """
+    Applies the select_related/prefetch_related/annotate(Count(...)) the given (model) serializer needs to the
+    queryset, so that serializing a page of it costs a fixed number of queries instead of a few per row.
+    Counts are annotated as declared in `Meta.annotate_counts` ({annotation name: relation to count or a Count}).
+    """
+    return _optimize_queryset(queryset, serializer_class())
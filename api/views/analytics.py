@@ -1,7 +1,13 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from django.views.generic import RedirectView
 
 from api.models import Asset
+from api.models.asset import (
+    asset_clickthrough_counts_buffer,
+    get_clickthrough_target_cache_key,
+)
 
 
 class AssetClickThroughCounterRedirectView(RedirectView):
@@ -9,7 +15,28 @@ class AssetClickThroughCounterRedirectView(RedirectView):
     permanent = False
     query_string = False
 
+    @staticmethod
+    def _get_clickthrough_target(slug: str) -> tuple:
+        """
+        Returns (asset id, url to redirect to) of the asset with the given slug, cached so that redirecting doesn't
+        hit the db (the cache is invalidated whenever the asset is saved).
+        """
+        cache_key = get_clickthrough_target_cache_key(slug)
+        clickthrough_target = cache.get(cache_key)
+        if clickthrough_target is None:
+            asset = get_object_or_404(
+                Asset.objects.only('id', 'affiliate_link', 'website'), slug=slug
+            )
+            clickthrough_target = (asset.id, asset.affiliate_link or asset.website)
+            cache.set(
+                cache_key,
+                clickthrough_target,
+                settings.ASSET_CLICKTHROUGH_TARGET_CACHE_TIMEOUT,
+            )
+        return clickthrough_target
+
     def get_redirect_url(self, *args, **kwargs):
-        asset = get_object_or_404(Asset, slug=kwargs['slug'])
-        asset.update_clickthrough_counter()
-        return asset.affiliate_link or asset.website
+        asset_id, url = self._get_clickthrough_target(kwargs['slug'])
+        # Rolled up into Asset.tweb_url_clickthrogh_counter in the background
+        asset_clickthrough_counts_buffer.add(asset_id)
+        return url
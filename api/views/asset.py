@@ -2,33 +2,173 @@ import logging
 import operator
 from functools import reduce
 
-from django.db.models import QuerySet, Count, F, Q
+from django.conf import settings
+from django.db.models import Case, Count, Exists, OuterRef, QuerySet, Q, When
+from elasticsearch_dsl import A
 from elasticsearch_dsl.query import MultiMatch
 from rest_framework import viewsets, status
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from api.models import Asset, Tag, Attribute, AssetAttributeVote
+from api.models import (
+    Asset,
+    AssetPricePlan,
+    Tag,
+    Attribute,
+    AssetAttributeVote,
+    SimilarAsset,
+)
+from api.models.linked_tag import get_tag_facet_counts
+from api.models.tag import tag_search_counts_buffer
 from api.models.user_asset_usage import UserAssetUsage
 from api.documents.asset import AssetDocument
-from api.serializers.asset import AssetSerializer, AuthenticatedAssetSerializer
+from api.documents.search_queryset import SearchQuerySet
+from api.serializers.asset import (
+    AssetSerializer,
+    AuthenticatedAssetSerializer,
+    get_asset_list_cards_for_user,
+)
 from api.serializers.asset_attribute import AuthenticatedAssetAttributeSerializer
 from api.permissions.asset_permissions import AssetPermissions
 from api.serializers.tag import TagFeaturedSerializer
-
-
-class AssetViewSetPagination(LimitOffsetPagination):
+from api.utils.search_failover import (
+    POSTGRES,
+    full_text_search,
+    with_latency_budget,
+)
+from api.utils.serializer_query_optimizer import optimize_queryset_for_serializer
+from api.views.common import (
+    ExactCountsMixin,
+    SearchFailoverMixin,
+    SearchLimitOffsetPagination,
+)
+
+
+# Number of tags returned in the tag facet of a search (the ones of the most matching assets)
+ASSET_SEARCH_TAG_FACET_SIZE = 20
+# Buckets of the avg_rating facet of a search (ratings go from 1 to 10, unrated assets have 0)
+ASSET_SEARCH_RATING_FACET_RANGES = [
+    {'to': 2},
+    {'from': 2, 'to': 4},
+    {'from': 4, 'to': 6},
+    {'from': 6, 'to': 8},
+    {'from': 8},
+]
+ASSET_SEARCH_FACET_AGGS = {
+    'tags': A('terms', field='tags.slug.raw', size=ASSET_SEARCH_TAG_FACET_SIZE),
+    'has_free_trial': A('terms', field='has_free_trial'),
+    'avg_rating': A(
+        'range', field='avg_rating', ranges=ASSET_SEARCH_RATING_FACET_RANGES
+    ),
+    'has_price_plans': A('terms', field='has_price_plans'),
+}
+
+
+def _get_boolean_facet(buckets: list) -> dict:
+    counts = {'true': 0, 'false': 0}
+    for bucket in buckets:
+        counts[bucket['key_as_string']] = bucket['doc_count']
+    return counts
+
+
+def get_asset_search_facets(aggregations: dict) -> dict:
+    """
+    The facets of an asset search from the results of its ASSET_SEARCH_FACET_AGGS aggregations.
+    """
+    return {
+        'tags': [
+            {'slug': bucket['key'], 'count': bucket['doc_count']}
+            for bucket in aggregations['tags']['buckets']
+        ],
+        'has_free_trial': _get_boolean_facet(aggregations['has_free_trial']['buckets']),
+        'avg_rating': [
+            {
+                'from': bucket.get('from'),
+                'to': bucket.get('to'),
+                'count': bucket['doc_count'],
+            }
+            for bucket in aggregations['avg_rating']['buckets']
+        ],
+        'has_price_plans': _get_boolean_facet(
+            aggregations['has_price_plans']['buckets']
+        ),
+    }
+
+
+def get_asset_search_facets_from_db(assets: QuerySet) -> dict:
+    """
+    The same facets as get_asset_search_facets, computed in SQL (for searches that aren't served by Elasticsearch).
+    """
+    tag_counts = get_tag_facet_counts(assets)
+    tag_slugs = dict(Tag.objects.filter(id__in=tag_counts).values_list('id', 'slug'))
+    tags = sorted(
+        (
+            {'slug': tag_slugs[tag_id], 'count': count}
+            for tag_id, count in tag_counts.items()
+            if tag_id in tag_slugs
+        ),
+        key=lambda tag: (-tag['count'], tag['slug']),
+    )[:ASSET_SEARCH_TAG_FACET_SIZE]
+
+    rating_ranges = {
+        'avg_rating_{}'.format(i): Count(
+            'pk',
+            filter=Q(
+                **{
+                    'avg_rating__{}'.format(lookup): rating_range[bound]
+                    for bound, lookup in (('from', 'gte'), ('to', 'lt'))
+                    if bound in rating_range
+                }
+            ),
+        )
+        for i, rating_range in enumerate(ASSET_SEARCH_RATING_FACET_RANGES)
+    }
+    counts = (
+        Asset.objects.filter(id__in=assets.order_by().values('id'))
+        .annotate(
+            has_price_plans=Exists(
+                AssetPricePlan.objects.filter(asset_id=OuterRef('pk'))
+            )
+        )
+        .aggregate(
+            total=Count('pk'),
+            has_free_trial=Count('pk', filter=Q(has_free_trial=True)),
+            has_price_plans=Count('pk', filter=Q(has_price_plans=True)),
+            **rating_ranges,
+        )
+    )
+    return {
+        'tags': tags,
+        'has_free_trial': {
+            'true': counts['has_free_trial'],
+            'false': counts['total'] - counts['has_free_trial'],
+        },
+        'avg_rating': [
+            {
+                'from': rating_range.get('from'),
+                'to': rating_range.get('to'),
+                'count': counts['avg_rating_{}'.format(i)],
+            }
+            for i, rating_range in enumerate(ASSET_SEARCH_RATING_FACET_RANGES)
+        ],
+        'has_price_plans': {
+            'true': counts['has_price_plans'],
+            'false': counts['total'] - counts['has_price_plans'],
+        },
+    }
+
+
+class AssetViewSetPagination(SearchLimitOffsetPagination):
     default_limit = 20
     limit_query_param = "limit"
     offset_query_param = "offset"
     max_limit = 100
 
 
-class AssetViewSet(viewsets.ModelViewSet):
+class AssetViewSet(ExactCountsMixin, SearchFailoverMixin, viewsets.ModelViewSet):
 
     queryset = Asset.objects.all()
     permission_classes = [AssetPermissions]
@@ -36,6 +176,7 @@ class AssetViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = {'avg_rating': ['gte', 'lte'], 'has_free_trial': ['exact']}
     ordering_fields = ['avg_rating', 'upvotes_count']
+    exact_count_fields = ['upvotes_count']
     lookup_field = 'slug'
     pagination_class = AssetViewSetPagination
 
@@ -45,13 +186,16 @@ class AssetViewSet(viewsets.ModelViewSet):
         else:
             return AuthenticatedAssetSerializer
 
+    def _optimize_for_serializer(self, queryset: QuerySet) -> QuerySet:
+        return optimize_queryset_for_serializer(queryset, self.get_serializer_class())
+
     def _is_staff_or_superuser(self) -> bool:
         return self.request.user.is_staff or self.request.user.is_superuser
 
     def _update_tag_search_counts_for_tags_used_in_search_query(self, search_query):
-        tags = search_query.split()
-        Tag.objects.filter(slug__in=tags).distinct().update(counter=F('counter') + 1)
-        return
+        # Buffered and written in batches in the background, so that searching doesn't write to the db
+        for tag_slug in set(search_query.split()):
+            tag_search_counts_buffer.add(tag_slug)
 
     def _published_or_submitted_by_or_owner_filter(
         self, queryset: QuerySet
@@ -71,22 +215,14 @@ class AssetViewSet(viewsets.ModelViewSet):
         """
         DB level AND filter to fetch only those assets that have all the given tags.
         """
-        desired_tags = Tag.objects.filter(slug__in=tag_slugs).all()
-
-        # First create a query which filters having at-least as many tags as those in the desired list
-        # Then filter the assets which have each of the desired tag.
-        assets = Asset.objects.annotate(c=Count('tags')).filter(
-            c__gte=len(desired_tags)
+        desired_tag_ids = list(
+            Tag.objects.filter(slug__in=tag_slugs).values_list('id', flat=True)
         )
-        for tag in desired_tags:
-            assets = assets.filter(tags__in=[tag])
-        return assets
+        # Containment on the GIN indexed tag ids (a set intersection of the assets of each tag), see Asset.tag_ids
+        return Asset.objects.filter(tag_ids__contains=desired_tag_ids)
 
     @staticmethod
-    def _get_assets_db_qs_via_elasticsearch_query(search_query: str) -> QuerySet:
-        """
-        Given a search query string uses that to perform a MultiMatch search query against ElasticSearch indexes.
-        """
+    def _get_assets_es_search(search_query: str):
         es_query = MultiMatch(
             query=search_query,
             fields=['tags.slug^2', 'short_description', 'description', 'name^3'],
@@ -94,10 +230,80 @@ class AssetViewSet(viewsets.ModelViewSet):
             # after that this will even return results if the threshold % of the tags/clauses are present.
             minimum_should_match='3<75%',
         )
-        es_search = AssetDocument.search().query(es_query)
-        assets_db_queryset = es_search.to_queryset()
+        return AssetDocument.paginated_search().query(es_query)
+
+    @staticmethod
+    def _get_assets_db_qs_via_elasticsearch_query(search_query: str) -> QuerySet:
+        """
+        Given a search query string uses that to perform a MultiMatch search query against ElasticSearch indexes.
+        The returned queryset only fetches the hits of the page being paginated (see SearchQuerySet).
+        """
+        es_search = with_latency_budget(
+            AssetViewSet._get_assets_es_search(search_query)
+        )
+        assets_db_queryset = SearchQuerySet.from_search(
+            es_search,
+            Asset.objects.all(),
+            # Filters of the view (including the ones of filterset_fields) that are applied by Elasticsearch
+            filter_fields={
+                'is_published': 'is_published',
+                'avg_rating': 'avg_rating',
+                'has_free_trial': 'has_free_trial',
+            },
+        )
         return assets_db_queryset
 
+    @staticmethod
+    def _get_assets_db_qs_via_postgres_query(search_query: str) -> QuerySet:
+        """
+        Given a search query string uses that to perform a full-text search on Asset.search_vector, for when
+        Elasticsearch is unavailable.
+        """
+        return full_text_search(Asset.objects.all(), search_query)
+
+    def get_search_queryset(self) -> QuerySet:
+        search_query = self.request.query_params.get('q')
+        if self.get_search_engine() == POSTGRES:
+            assets_db_queryset = self._get_assets_db_qs_via_postgres_query(search_query)
+        else:
+            assets_db_queryset = self._get_assets_db_qs_via_elasticsearch_query(
+                search_query
+            )
+            if self._are_search_facets_requested():
+                assets_db_queryset = assets_db_queryset.with_search_aggs(
+                    **ASSET_SEARCH_FACET_AGGS
+                )
+
+        # For list, we will not show assets submitted by the logged in user or if user own an asset because it might deceive them into believing that their asset is published
+        # (This filter is applied by Elasticsearch, so only the requested page is fetched from the db)
+        assets_db_queryset = assets_db_queryset.filter(is_published=True)
+
+        return self._optimize_for_serializer(assets_db_queryset)
+
+    def _are_search_facets_requested(self) -> bool:
+        # /api/assets/?q=<Search Keywords>&facets=true
+        return self.request.query_params.get('q') is not None and (
+            self.request.query_params.get('facets') in ('1', 'true')
+        )
+
+    def _add_search_facets(self, response: Response) -> Response:
+        """
+        Adds the facet counts of the search (tags, has_free_trial, avg_rating buckets and has_price_plans) to the
+        response of a list if they were requested. They are computed by the same Elasticsearch request as the page.
+        """
+        if not self._are_search_facets_requested():
+            return response
+
+        if self.get_search_engine() == POSTGRES:
+            response.data['facets'] = get_asset_search_facets_from_db(
+                self.filter_queryset(self.get_search_queryset())
+            )
+        else:
+            response.data['facets'] = get_asset_search_facets(
+                self.paginator.get_search_aggregations()
+            )
+        return response
+
     def get_queryset(self):
         if self.action == 'list':
             # /api/assets/?q=<Search Keywords> (List View)
@@ -108,14 +314,7 @@ class AssetViewSet(viewsets.ModelViewSet):
                 return Asset.objects.none()
 
             self._update_tag_search_counts_for_tags_used_in_search_query(search_query)
-            assets_db_queryset = self._get_assets_db_qs_via_elasticsearch_query(
-                search_query
-            )
-
-            # For list, we will not show assets submitted by the logged in user or if user own an asset because it might deceive them into believing that their asset is published
-            assets_db_queryset = assets_db_queryset.filter(is_published=True)
-
-            return assets_db_queryset
+            return self.get_search_queryset()
 
         elif self.action == 'retrieve':
             slug = self.kwargs['slug']
@@ -124,11 +323,41 @@ class AssetViewSet(viewsets.ModelViewSet):
             if not self._is_staff_or_superuser():
 
                 asset = self._published_or_submitted_by_or_owner_filter(asset)
-            return asset
+            return self._optimize_for_serializer(asset)
         else:
             # self.action == 'update' or something else
             return super().get_queryset()
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if (
+            settings.ASSET_SEARCH_LIST_FROM_INDEX
+            and isinstance(queryset, SearchQuerySet)
+            and queryset.is_served_by_search_page()
+        ):
+            # Index-only mode: render the page from the list cards stored in the search index, the db is only
+            # queried for the fields that depend on the logged in user.
+            page = self.paginate_queryset(
+                queryset.from_search_source('list_card', 'owner_id', 'submitted_by_id')
+            )
+            if self.search_engine != POSTGRES:
+                return self._add_search_facets(
+                    self.get_paginated_response(
+                        get_asset_list_cards_for_user(page, request.user)
+                    )
+                )
+            # Failed over to Postgres, the page holds assets
+        else:
+            page = self.paginate_queryset(queryset)
+
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self._add_search_facets(self.get_paginated_response(serializer.data))
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
     def _get_filter_kwargs_for_asset_user_link_queryset(self, asset_slug):
         kwargs = {
             "asset": Asset.objects.get(slug=asset_slug),
@@ -192,21 +421,29 @@ class AssetViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        asset = (
-            Asset.objects.filter(slug=asset_slug_param.strip())
-            .prefetch_related('tags')
-            .get()
-        )
-
-        q = ' '.join(tag.slug for tag in asset.tags.all())
-        assets_db_qs = self._get_assets_db_qs_via_elasticsearch_query(q)
+        asset = Asset.objects.get(slug=asset_slug_param.strip())
 
-        if not include_self:
-            assets_db_qs = assets_db_qs.filter(~Q(id=asset.id))
-        else:
-            assets_db_qs = assets_db_qs | Asset.objects.filter(id=asset.id)
+        # Precomputed and ordered by similarity, see SimilarAsset
+        similar_asset_ids = list(
+            SimilarAsset.objects.filter(asset=asset)
+            .order_by('-score')
+            .values_list('similar_asset_id', flat=True)
+        )
+        if include_self:
+            similar_asset_ids.insert(0, asset.id)
+
+        assets_db_qs = Asset.objects.filter(id__in=similar_asset_ids)
+        if similar_asset_ids:
+            assets_db_qs = assets_db_qs.order_by(
+                Case(
+                    *[
+                        When(id=asset_id, then=position)
+                        for position, asset_id in enumerate(similar_asset_ids)
+                    ]
+                )
+            )
 
-        assets_db_qs = self.filter_queryset(assets_db_qs)
+        assets_db_qs = self._optimize_for_serializer(self.filter_queryset(assets_db_qs))
         page = self.paginate_queryset(assets_db_qs)
 
         if page is not None:
@@ -223,8 +460,10 @@ class AssetViewSet(viewsets.ModelViewSet):
         if len(asset_slugs) < 2 or len(asset_slugs) > 3:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        assets = Asset.objects.filter(
-            reduce(operator.or_, (Q(slug=asset_slug) for asset_slug in asset_slugs))
+        assets = self._optimize_for_serializer(
+            Asset.objects.filter(
+                reduce(operator.or_, (Q(slug=asset_slug) for asset_slug in asset_slugs))
+            )
         )
 
         if len(asset_slugs) != len(assets):
@@ -6,13 +6,15 @@ from api.serializers.asset_question import (
     AssetQuestionSerializer,
     AuthenticatedAssetQuestionSerializer,
 )
+from api.views.common import ExactCountsMixin
 
 
-class AssetQuestionViewSet(viewsets.ModelViewSet):
+class AssetQuestionViewSet(ExactCountsMixin, viewsets.ModelViewSet):
     queryset = AssetQuestion.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['asset__slug', 'submitted_by__username']
+    exact_count_fields = ['upvotes_count']
 
     def get_serializer_class(self):
         if self.request.user.is_anonymous:
@@ -1,14 +1,111 @@
 from django_elasticsearch_dsl.search import Search
+from elasticsearch.exceptions import TransportError
+from rest_framework.pagination import LimitOffsetPagination
+
+from api.documents.search_queryset import SearchQuerySet
+from api.models.counter_shard import add_unrolled_counts
+from api.utils.search_failover import (
+    ELASTICSEARCH,
+    POSTGRES,
+    get_search_engine,
+    is_elasticsearch_unavailable_error,
+    mark_elasticsearch_unavailable,
+)
+
+
+class SearchLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination that lets a SearchQuerySet know which page is going to be requested, so that the page and
+    the total count are fetched from Elasticsearch in a single request (instead of fetching every hit).
+    """
+
+    search_queryset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.search_queryset = None
+        if isinstance(queryset, SearchQuerySet):
+            limit = self.get_limit(request)
+            if limit is not None:
+                queryset = queryset.for_page(self.get_offset(request), limit)
+            self.search_queryset = queryset
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_search_aggregations(self) -> dict:
+        """
+        The aggregations of the last paginated SearchQuerySet (see SearchQuerySet.with_search_aggs), fetched with its
+        page.
+        """
+        if self.search_queryset is None:
+            return {}
+        return self.search_queryset.get_search_aggregations()
+
+
+class SearchFailoverMixin:
+    """
+    For viewsets whose list is a search served by Elasticsearch: if Elasticsearch exceeds its latency budget or fails
+    while a page is fetched, the page is searched with Postgres full-text search instead (see
+    api.utils.search_failover). Subclasses must define get_search_queryset(), the queryset of the list searched with
+    get_search_engine().
+    """
+
+    search_engine = None
+
+    def get_search_engine(self) -> str:
+        if self.search_engine is None:
+            self.search_engine = get_search_engine()
+        return self.search_engine
+
+    def paginate_queryset(self, queryset):
+        try:
+            return super().paginate_queryset(queryset)
+        except TransportError as e:
+            if not (
+                self.action == 'list'
+                and self.get_search_engine() == ELASTICSEARCH
+                and is_elasticsearch_unavailable_error(e)
+            ):
+                raise
+            mark_elasticsearch_unavailable(e)
+            self.search_engine = POSTGRES
+            return super().paginate_queryset(
+                self.filter_queryset(self.get_search_queryset())
+            )
+
+
+class ExactCountsMixin:
+    """
+    For viewsets of models with sharded counters (see api.utils.denormalized_counters.ShardedCounter), which lag behind
+    by up to settings.COUNTER_SHARDS_ROLLUP_INTERVAL seconds: `?exact_counts=true` makes the `exact_count_fields` of a
+    retrieved object exact.
+    """
+
+    exact_count_fields = []
+
+    def get_object(self):
+        obj = super().get_object()
+        # Only for reads, so that the exact counts are never saved (the changes would be rolled up a second time)
+        if self.action == 'retrieve' and (
+            self.request.query_params.get('exact_counts') in ('1', 'true')
+        ):
+            for field in self.exact_count_fields:
+                add_unrolled_counts([obj], field)
+        return obj
+
+
+# In the rare case of deleting and re-adding objects, there can be a scenario where the same item occurs
+# more than once in the index, we want to ensure response has unique results, so a few more hits than the
+# unique results returned are processed (and need to be fetched).
+MAX_PROCESSED_AUTOCOMPLETE_HITS = 10
+# extract_results_from_matching_query returns up to 8 unique results
+MAX_AUTOCOMPLETE_RESULTS = 8
 
 
 def extract_results_from_matching_query(es_search: Search, case='tag') -> list:
-    """From a matching es_search_query extract relevant results"""
+    """From a matching es_search_query (or its already executed response) extract relevant results"""
     results = set()
     max_unique_items = 7
 
-    # In the rare case of deleting and re-adding objects, there can be a scenario where the same item occurs
-    # more than once in the index, we want to ensure response has unique results.
-    max_processed_items = 10
+    max_processed_items = MAX_PROCESSED_AUTOCOMPLETE_HITS
     for i, hit in enumerate(es_search):
         if len(results) > max_unique_items or i >= max_processed_items:
             break
@@ -26,3 +123,20 @@ def extract_results_from_matching_query(es_search: Search, case='tag') -> list:
                 # case == 'asset_name_and_slug':
                 results.add((hit.name, hit.slug))
     return list(results)
+
+
+def extract_suggestions_from_matching_query(es_search: Search, key: str) -> list:
+    """
+    From a matching es_search_query extract the suggestion payloads stored in the index (the `suggestion` field of the
+    documents), unique by their `key` item, so that they can be returned without querying the db.
+    """
+    es_search = es_search.source(['suggestion']).extra(track_total_hits=False)
+    response = es_search[:MAX_PROCESSED_AUTOCOMPLETE_HITS].execute()
+
+    suggestions = {}
+    for hit in response.to_dict()['hits']['hits']:
+        # Documents indexed before suggestions were stored don't have one
+        suggestion = hit.get('_source', {}).get('suggestion')
+        if suggestion and suggestion[key] not in suggestions:
+            suggestions[suggestion[key]] = suggestion
+    return list(suggestions.values())[:MAX_AUTOCOMPLETE_RESULTS]
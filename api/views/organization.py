@@ -2,7 +2,11 @@ from django.http import JsonResponse
 from rest_framework import viewsets, permissions
 
 from api.documents.organization import OrganizationDocument
-from api.views.common import extract_results_from_matching_query
+from api.utils.autocomplete_index import get_autocomplete_index
+from api.views.common import (
+    MAX_AUTOCOMPLETE_RESULTS,
+    extract_suggestions_from_matching_query,
+)
 from api.models.organization import Organization
 from api.serializers.organization import OrganizationSerializer
 
@@ -18,20 +22,26 @@ class OrganizationViewSet(viewsets.ModelViewSet):
     lookup_field = 'name'
 
 
-def _es_search_organizations(q):
-    return OrganizationDocument.search().query('match_phrase_prefix', name=q)
+def _es_search_organizations(q) -> list:
+    """
+    Returns the suggestions of the organizations matching q, as stored in the organization index.
+    """
+    es_search = OrganizationDocument.search().query('match_phrase_prefix', name=q)
+    return extract_suggestions_from_matching_query(es_search, key='name')
 
 
 def autocomplete_organizations(request):
     # TODO: For now this is open but require an API key to use this endpoint as well for proper rate limiting.
     q = request.GET.get('q')
     if q and len(q) >= 2:
-        # es_search = OrganizationDocument.search().query('match_phrase_prefix', name=q)
-        es_search = _es_search_organizations(q)
-        results = extract_results_from_matching_query(es_search, case='organization')
+        index = get_autocomplete_index()
+        results = (
+            index.organizations.search(q, MAX_AUTOCOMPLETE_RESULTS) if index else []
+        )
+        if not results:
+            results = _es_search_organizations(q)
     else:
         results = []
 
-    organizations = Organization.objects.filter(name__in=results)
-    organization_serializer = OrganizationSerializer(organizations, many=True)
-    return JsonResponse({'results': organization_serializer.data})
+    # The suggestions are the OrganizationSerializer payloads of the organizations, so no db query is needed
+    return JsonResponse({'results': results})
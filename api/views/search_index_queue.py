@@ -0,0 +1,16 @@
+from django.http import JsonResponse
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+
+from api.models.search_index_queue import get_search_index_queue_stats
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def search_index_queue_stats(request):
+    """
+    How far behind the search indexes are, for monitoring (is_backlogged is true when the queue is lagging behind by
+    more than SEARCH_INDEX_QUEUE_MAX_LAG seconds, failed_objects is the number of instances whose updates were given up
+    on).
+    """
+    return JsonResponse(get_search_index_queue_stats())
@@ -1,13 +1,22 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
 from django_filters.rest_framework import DjangoFilterBackend
 from django.http import JsonResponse
 from rest_framework import viewsets, permissions
-from api.views.common import extract_results_from_matching_query
+from api.views.common import (
+    MAX_AUTOCOMPLETE_RESULTS,
+    extract_suggestions_from_matching_query,
+)
 
-from api.models import SolutionQuestion, Solution
+from api.models import SolutionQuestion
+from api.models.solution_question import get_solution_questions_cache_key
 from api.documents.solution_question import SolutionQuestionDocument
 from api.serializers.solution_question import (
     SolutionQuestionSerializer,
 )
+from api.utils.prefix_index import PrefixIndex
 
 
 class SolutionQuestionViewSet(viewsets.ModelViewSet):
@@ -20,29 +29,67 @@ class SolutionQuestionViewSet(viewsets.ModelViewSet):
         return SolutionQuestionSerializer
 
 
-def _get_solution_questions_db_qs_via_elasticsearch_query(q):
-    return SolutionQuestionDocument.search().query('match_phrase_prefix', title=q)
+def _es_search_solution_questions(q, solution_slug) -> list:
+    """
+    Returns the suggestions of the questions of the solution matching q, as stored in the solution question index.
+    """
+    es_search = (
+        SolutionQuestionDocument.search()
+        .query('match_phrase_prefix', title=q)
+        .filter('term', solution_slug=solution_slug)
+    )
+    return extract_suggestions_from_matching_query(es_search, key='id')
+
+
+def _get_cached_solution_questions(solution_slug) -> Optional[list]:
+    """
+    Returns the serialized questions of the solution if it has no more than SOLUTION_QUESTIONS_CACHE_MAX_COUNT, they
+    are cached until one of them changes.
+    """
+    cache_key = get_solution_questions_cache_key(solution_slug)
+    cached = cache.get(cache_key)
+    if cached is None:
+        max_count = settings.SOLUTION_QUESTIONS_CACHE_MAX_COUNT
+        solution_questions = list(
+            SolutionQuestion.objects.filter(solution__slug=solution_slug).order_by(
+                'id'
+            )[: max_count + 1]
+        )
+        cached = {
+            'questions': SolutionQuestionSerializer(solution_questions, many=True).data
+            if len(solution_questions) <= max_count
+            else None
+        }
+        cache.set(cache_key, cached, settings.SOLUTION_QUESTIONS_CACHE_TIMEOUT)
+    return cached['questions']
 
 
 def autocomplete_solution_questions(request):
     """
-    The view serves as an endpoint to autocomplete solution question titles and uses an elasticsearch index.
+    The view serves as an endpoint to autocomplete solution question titles of a solution. Solutions with few questions
+    are served from memory, the questions of the others are searched in an elasticsearch index.
     """
     q = request.GET.get('q')
     solution_slug = request.GET.get('solution__slug')
-    solution = Solution.objects.get(slug=solution_slug)
+    solution_questions = _get_cached_solution_questions(solution_slug)
 
     if q and len(q) >= 3:
-        es_search = _get_solution_questions_db_qs_via_elasticsearch_query(q)
-        results = extract_results_from_matching_query(
-            es_search, case='solution_question'
-        )
-
-        solution_questions = solution.questions.filter(title__in=results)
-        serializer = SolutionQuestionSerializer(solution_questions, many=True)
+        if solution_questions is not None:
+            results = PrefixIndex(
+                ([solution_question['title']], solution_question, 0)
+                for solution_question in solution_questions
+            ).search(q, MAX_AUTOCOMPLETE_RESULTS)
+        else:
+            results = _es_search_solution_questions(q, solution_slug)
+    elif q == '':
+        if solution_questions is not None:
+            results = solution_questions
+        else:
+            results = SolutionQuestionSerializer(
+                SolutionQuestion.objects.filter(solution__slug=solution_slug),
+                many=True,
+            ).data
     else:
-        if q == '':
-            solution_questions = solution.questions.all()
-            serializer = SolutionQuestionSerializer(solution_questions, many=True)
+        results = []
 
-    return JsonResponse({'results': serializer.data})
+    return JsonResponse({'results': results})
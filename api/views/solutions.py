@@ -7,23 +7,36 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.filters import OrderingFilter
 from django.db.models import QuerySet, Count, F, Q
-from rest_framework.pagination import LimitOffsetPagination
 
+from api.documents.search_queryset import SearchQuerySet
 from api.documents.solution import SolutionDocument
+from api.models.asset import Asset
 from api.models.solution import Solution
 from api.serializers.solution import SolutionSerializer, AuthenticatedSolutionSerializer
 from api.documents.asset import AssetDocument
 from api.serializers.asset import AssetSerializer, AuthenticatedAssetSerializer
-
-
-class SolutionViewSetPagination(LimitOffsetPagination):
+from api.utils.search_failover import (
+    POSTGRES,
+    full_text_search,
+    with_latency_budget,
+)
+from api.utils.serializer_query_optimizer import optimize_queryset_for_serializer
+from api.views.common import (
+    ExactCountsMixin,
+    SearchFailoverMixin,
+    SearchLimitOffsetPagination,
+    extract_suggestions_from_matching_query,
+)
+
+
+class SolutionViewSetPagination(SearchLimitOffsetPagination):
     default_limit = 20
     limit_query_param = "limit"
     offset_query_param = "offset"
     max_limit = 100
 
 
-class SolutionViewSet(viewsets.ModelViewSet):
+class SolutionViewSet(ExactCountsMixin, SearchFailoverMixin, viewsets.ModelViewSet):
 
     queryset = Solution.objects.filter(
         stripe_product__livemode=settings.STRIPE_LIVE_MODE
@@ -40,6 +53,7 @@ class SolutionViewSet(viewsets.ModelViewSet):
         'upvotes_count',
         'stripe_primary_price__unit_amount',
     ]
+    exact_count_fields = ['upvotes_count']
     lookup_field = 'slug'
     serializer_class = SolutionSerializer
     pagination_class = SolutionViewSetPagination
@@ -50,6 +64,9 @@ class SolutionViewSet(viewsets.ModelViewSet):
         else:
             return AuthenticatedSolutionSerializer
 
+    def _optimize_for_serializer(self, queryset: QuerySet) -> QuerySet:
+        return optimize_queryset_for_serializer(queryset, self.get_serializer_class())
+
     @staticmethod
     def _get_assets_db_qs_via_elasticsearch_query(search_query: str) -> QuerySet:
         """
@@ -61,24 +78,66 @@ class SolutionViewSet(viewsets.ModelViewSet):
             # If number of tokenized words/clauses in query is less than or equal to 3, they are all required,
             # after that this will even return results if the threshold % of the tags/clauses are present.
         )
-        es_search = AssetDocument.search().query(es_query)
-        assets_db_queryset = es_search.to_queryset()
+        es_search = AssetDocument.paginated_search().query(es_query)
+        assets_db_queryset = SearchQuerySet.from_search(es_search, Asset.objects.all())
         return assets_db_queryset
 
+    @staticmethod
+    def _get_solutions_es_search(search_query: str):
+        es_query = MultiMatch(query=search_query, fields=['title', 'tags.slug'])
+        return SolutionDocument.paginated_search().query(es_query)
+
     @staticmethod
     def _get_solutions_db_qs_via_elasticsearch_query(search_query: str) -> QuerySet:
         """
         Given a search query string uses that to perform a MultiMatch search query against ElasticSearch indexes.
         """
-        es_query = MultiMatch(query=search_query, fields=['title', 'tags.slug'])
-        es_search = SolutionDocument.search().query(es_query)
-        solutions_db_queryset = es_search.to_queryset().filter(
+        es_search = with_latency_budget(
+            SolutionViewSet._get_solutions_es_search(search_query)
+        )
+        # Both filters are applied by Elasticsearch, so a paginated list only fetches the requested page
+        solutions_db_queryset = SearchQuerySet.from_search(
+            es_search,
+            Solution.objects.all(),
+            filter_fields={
+                'is_searchable': 'is_searchable',
+                'stripe_product__livemode': 'livemode',
+            },
+        ).filter(
             is_searchable=True,
             stripe_product__livemode=settings.STRIPE_LIVE_MODE,
         )
 
         return solutions_db_queryset
 
+    @staticmethod
+    def _get_solutions_db_qs_via_postgres_query(search_query: str) -> QuerySet:
+        """
+        Given a search query string uses that to perform a full-text search on Solution.search_vector, for when
+        Elasticsearch is unavailable.
+        """
+        return full_text_search(
+            Solution.objects.filter(
+                is_searchable=True,
+                stripe_product__livemode=settings.STRIPE_LIVE_MODE,
+            ),
+            search_query,
+        )
+
+    def get_search_queryset(self) -> QuerySet:
+        q = self.request.query_params.getlist('q')
+        search_query = ' '.join(q)
+        if self.get_search_engine() == POSTGRES:
+            solutions_db_queryset = self._get_solutions_db_qs_via_postgres_query(
+                search_query
+            )
+        else:
+            solutions_db_queryset = self._get_solutions_db_qs_via_elasticsearch_query(
+                search_query
+            )
+
+        return self._optimize_for_serializer(solutions_db_queryset)
+
     def get_queryset(self):
         if self.action == 'list':
             """
@@ -88,17 +147,11 @@ class SolutionViewSet(viewsets.ModelViewSet):
             - /solutions/?q=<search_param>
             - /solutions/?q=<search_param1>&q=<search_param2>
             """
-            q = self.request.query_params.getlist('q')
-            search_query = ' '.join(q)
-            solutions_db_queryset = self._get_solutions_db_qs_via_elasticsearch_query(
-                search_query
-            )
-
-            return solutions_db_queryset
+            return self.get_search_queryset()
         elif self.action == 'retrieve':
             slug = self.kwargs['slug']
             solution = Solution.objects.filter(slug=slug)
-            return solution
+            return self._optimize_for_serializer(solution)
         # if self.action == 'update' or something else
         else:
             super().get_queryset()
@@ -133,44 +186,61 @@ class SolutionViewSet(viewsets.ModelViewSet):
             solution_tags.add(solution_tag)
 
         q = ' '.join(tag.slug for tag in solution_tags)
-        assets_db_qs = self._get_assets_db_qs_via_elasticsearch_query(q)
+        if self.request.user.is_anonymous:
+            asset_serializer_class = AssetSerializer
+        else:
+            asset_serializer_class = AuthenticatedAssetSerializer
+        assets_db_qs = optimize_queryset_for_serializer(
+            self._get_assets_db_qs_via_elasticsearch_query(q), asset_serializer_class
+        )
 
         page = self.paginate_queryset(assets_db_qs)
 
         if page is not None:
-            if self.request.user.is_anonymous:
-                serializer = AssetSerializer(assets_db_qs, many=True)
-            else:
-                serializer = AuthenticatedAssetSerializer(assets_db_qs, many=True)
-            return self.get_paginated_response(serializer.data)
-
-        if self.request.user.is_anonymous:
-            serializer = AssetSerializer(
-                assets_db_qs,
-                many=True,
-                context={'request': request},
-            )
-        else:
-            serializer = AuthenticatedAssetSerializer(
-                assets_db_qs, many=True, context={'request': request}
+            serializer = asset_serializer_class(
+                page, many=True, context={'request': request}
             )
+            return self.get_paginated_response(serializer.data)
 
+        serializer = asset_serializer_class(
+            assets_db_qs, many=True, context={'request': request}
+        )
         return Response(serializer.data)
 
 
+def _es_search_solutions(search_query: str) -> list:
+    """
+    Returns the suggestions of the solutions matching the search query, as stored in the solution index.
+    """
+    # The same filters as SolutionViewSet applies to searches
+    es_search = (
+        SolutionViewSet._get_solutions_es_search(search_query)
+        .filter('term', is_searchable=True)
+        .filter('term', livemode=settings.STRIPE_LIVE_MODE)
+    )
+    return extract_suggestions_from_matching_query(es_search, key='id')
+
+
 def autocomplete_solutions(request):
     """
     The view serves as an endpoint to autocomplete solution titles and uses an elasticsearch index.
+    Suggestions are returned as stored in the index (see SolutionSuggestionSerializer) without querying the db, unless
+    `?expand=true` is passed to get the full SolutionSerializer payloads of all the matching solutions.
     """
     q = request.GET.getlist('q')
     search_query = ' '.join(q)
     if search_query and len(search_query) >= 2:
-        solutions_db_queryset = (
-            SolutionViewSet._get_solutions_db_qs_via_elasticsearch_query(search_query)
-        )
-
-        serializer = SolutionSerializer(solutions_db_queryset, many=True)
-        results = serializer.data
+        if request.GET.get('expand', '').lower() in ('1', 'true'):
+            solutions_db_queryset = optimize_queryset_for_serializer(
+                SolutionViewSet._get_solutions_db_qs_via_elasticsearch_query(
+                    search_query
+                ),
+                SolutionSerializer,
+            )
+            serializer = SolutionSerializer(solutions_db_queryset, many=True)
+            results = serializer.data
+        else:
+            results = _es_search_solutions(search_query)
     else:
         results = []
 
@@ -1,11 +1,18 @@
 from django.http import JsonResponse
+from elasticsearch_dsl import MultiSearch
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
 from api.documents.asset import AssetDocument
 from api.documents.tag import TagDocument
-from api.views.common import extract_results_from_matching_query
+from api.utils.autocomplete_index import get_autocomplete_index
+from api.views.common import (
+    MAX_AUTOCOMPLETE_RESULTS,
+    MAX_PROCESSED_AUTOCOMPLETE_HITS,
+    extract_results_from_matching_query,
+    extract_suggestions_from_matching_query,
+)
 from api.models import Tag
 from api.serializers.tag import TagSerializer, TopTagSerializer
 
@@ -18,22 +25,41 @@ def autocomplete_tags(request):
     # TODO: For now this is open but require an API key to use this endpoint as well for proper rate limiting.
     q = request.GET.get('q')
     if q and len(q) >= 3:
-        es_search = TagDocument.search().query('match_phrase_prefix', name=q)
-        results = extract_results_from_matching_query(es_search)
+        index = get_autocomplete_index()
+        results = index.tags.search(q, MAX_AUTOCOMPLETE_RESULTS) if index else []
+        if not results:
+            es_search = TagDocument.search().query('match_phrase_prefix', name=q)
+            results = extract_suggestions_from_matching_query(es_search, key='slug')
     else:
         results = []
 
-    tags = Tag.objects.filter(slug__in=results)
-    tag_serializer = TagSerializer(tags, many=True)
-
-    return JsonResponse({'results': tag_serializer.data})
+    # The suggestions are the TagSerializer payloads of the tags, so no db query is needed
+    return JsonResponse({'results': results})
 
 
 def _es_search_asset_and_tag(q):
-    return (
-        TagDocument.search().query('match_phrase_prefix', name=q),
-        AssetDocument.search().query('match_phrase_prefix', name=q),
+    """
+    Returns the (tag hits, asset hits) matching q, both searches are sent in a single _msearch request and only fetch
+    the hits and fields that autocomplete_assets_and_tags uses.
+    """
+    multi_search = (
+        MultiSearch()
+        .add(
+            TagDocument.search()
+            .query('match_phrase_prefix', name=q)
+            .source(['slug'])
+            .extra(track_total_hits=False)[:MAX_PROCESSED_AUTOCOMPLETE_HITS]
+        )
+        .add(
+            # Not search(), which counts all the hits first to fetch every one of them
+            AssetDocument.paginated_search()
+            .query('match_phrase_prefix', name=q)
+            .source(['name', 'slug'])
+            .extra(track_total_hits=False)[:MAX_PROCESSED_AUTOCOMPLETE_HITS]
+        )
     )
+    tags_response, assets_response = multi_search.execute()
+    return tags_response, assets_response
 
 
 def autocomplete_assets_and_tags(request):
@@ -50,13 +76,23 @@ def autocomplete_assets_and_tags(request):
     results_dict = {tags_key: [], asset_names_key: [], asset_slugs_key: []}
 
     if q and len(q) >= 2:
-        es_search_tags, es_search_assets = _es_search_asset_and_tag(q)
-        results_dict[tags_key] = extract_results_from_matching_query(
-            es_search_tags, case='tag'
-        )
-        asset_results = extract_results_from_matching_query(
-            es_search_assets, case='asset_name_and_slug'
-        )  # type: list[tuple]
+        index = get_autocomplete_index()
+        if index:
+            results_dict[tags_key] = [
+                tag['slug'] for tag in index.tags.search(q, MAX_AUTOCOMPLETE_RESULTS)
+            ]
+            asset_results = index.assets.search(q, MAX_AUTOCOMPLETE_RESULTS)
+        else:
+            asset_results = []
+
+        if not results_dict[tags_key] and not asset_results:
+            es_search_tags, es_search_assets = _es_search_asset_and_tag(q)
+            results_dict[tags_key] = extract_results_from_matching_query(
+                es_search_tags, case='tag'
+            )
+            asset_results = extract_results_from_matching_query(
+                es_search_assets, case='asset_name_and_slug'
+            )  # type: list[tuple]
         # asset_results contains something like [(asset1_name, asset1_slug), ...]
         if len(asset_results) > 0:
             asset_names, asset_slugs = zip(*asset_results)
@@ -52,6 +52,13 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
     "https://staging.taggedweb.com",
 ]
+# The rate limit headers of the API responses (see api.middleware.RateLimitHeadersMiddleware) are readable by the
+# frontends
+CORS_EXPOSE_HEADERS = [
+    'X-RateLimit-Limit',
+    'X-RateLimit-Remaining',
+    'X-RateLimit-Reset',
+]
 
 # Application definition
 
@@ -148,6 +155,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.RateLimitHeadersMiddleware',
 ]
 
 ROOT_URLCONF = 'taggedweb.urls'
@@ -185,6 +193,25 @@ DATABASES = {
     },
 }
 
+# The default cache must be shared by all the processes serving the site (gunicorn workers, runapscheduler): what is
+# cached from the db (e.g. the click-through targets) is invalidated by the process writing to it, and the rate
+# throttles (see api.throttling) count the requests of a user with atomic cache increments. Set MEMCACHED_LOCATION
+# (e.g. 127.0.0.1:11211) to use Memcached, otherwise each process has its own in-memory cache, which is only fine when
+# there is a single one (local development, tests).
+if os.environ.get('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ['MEMCACHED_LOCATION'],
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
 AUTH_USER_MODEL = 'api.User'
 
 # Password validation
@@ -273,9 +300,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
     ],
+    # The throttles count the requests in the default cache, which must be shared by the workers (see CACHES)
     'DEFAULT_THROTTLE_CLASSES': [
         # 'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'api.throttling.UserDailyRateThrottle',
         'api.throttling.SubscriptionDailyRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
@@ -290,6 +318,106 @@ ELASTICSEARCH_DSL = {
     'default': {'hosts': 'localhost:9200'},
 }
 
+# 'elasticsearch' to search with the ELASTICSEARCH_DSL cluster, or 'local' to answer the same queries in-process from
+# BM25 indexes built from the db (see api.documents.local_search), so that no Elasticsearch node is needed. Local
+# indexes are rebuilt once a write is noticed, which is checked every LOCAL_SEARCH_INDEX_VERSION_CHECK_INTERVAL
+# seconds, and at least every LOCAL_SEARCH_INDEX_MAX_AGE seconds.
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'elasticsearch')
+LOCAL_SEARCH_INDEX_VERSION_CHECK_INTERVAL = 5
+LOCAL_SEARCH_INDEX_MAX_AGE = 10 * 60
+
+# The search list views (/assets/?q=, /solutions/?q=) fail over to Postgres full-text search (see
+# api.utils.search_failover) when an Elasticsearch request takes longer than SEARCH_ELASTICSEARCH_LATENCY_BUDGET seconds
+# or fails, and keep searching with it for SEARCH_FAILOVER_COOLDOWN seconds. SEARCH_BACKEND = 'postgres' makes them
+# always search with it.
+SEARCH_ELASTICSEARCH_LATENCY_BUDGET = 2
+SEARCH_FAILOVER_COOLDOWN = 60
+
+# Writes don't update the search indexes synchronously, the instances to re-index are queued in the db and sent to
+# Elasticsearch in bulk by process_search_index_queue (run by runapscheduler, or the process_search_index_queue
+# command). Use 'django_elasticsearch_dsl.signals.RealTimeSignalProcessor' to index on every write instead.
+ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = (
+    'api.documents.signal_processor.QueuedSignalProcessor'
+)
+# An instance is re-indexed once it hasn't been written to for SEARCH_INDEX_QUEUE_DEBOUNCE seconds, but at most
+# SEARCH_INDEX_QUEUE_MAX_DELAY seconds after its first queued write, SEARCH_INDEX_QUEUE_BATCH_SIZE instances at a time.
+SEARCH_INDEX_QUEUE_DEBOUNCE = 2
+SEARCH_INDEX_QUEUE_MAX_DELAY = 30
+SEARCH_INDEX_QUEUE_BATCH_SIZE = 500
+# Failed updates of an instance are retried after SEARCH_INDEX_QUEUE_RETRY_BACKOFF, 2x, 4x, ... seconds, and given up
+# on after SEARCH_INDEX_QUEUE_MAX_ATTEMPTS attempts (until the instance is written to again).
+SEARCH_INDEX_QUEUE_MAX_ATTEMPTS = 5
+SEARCH_INDEX_QUEUE_RETRY_BACKOFF = 30
+# The queue is reported as backlogged (see /search-index-queue-stats/) when its oldest update has been waiting for
+# longer than this many seconds.
+SEARCH_INDEX_QUEUE_MAX_LAG = 5 * 60
+
+# Serve the asset search listing (/assets/?q=) straight from the list cards stored in the asset search index instead
+# of the db (only per-user fields are then fetched from the db). The cards are only as fresh as the index is, so
+# counters like upvotes_count may lag behind until the asset is re-indexed.
+ASSET_SEARCH_LIST_FROM_INDEX = False
+
+# Searches don't bump the counters of the tags used in the query right away, the increments are buffered in memory
+# (per worker process) and written in one batch every TAG_SEARCH_COUNTS_FLUSH_INTERVAL seconds, as soon as
+# TAG_SEARCH_COUNTS_MAX_PENDING increments are buffered, or when the worker shuts down gracefully.
+TAG_SEARCH_COUNTS_FLUSH_INTERVAL = 10
+TAG_SEARCH_COUNTS_MAX_PENDING = 1000
+
+# Number of most similar assets precomputed per asset for /assets/similar/ (see api.models.similar_asset). The similar
+# assets of the assets whose tags changed are updated every SIMILAR_ASSETS_QUEUE_INTERVAL seconds (by runapscheduler),
+# SIMILAR_ASSETS_QUEUE_BATCH_SIZE assets at a time.
+SIMILAR_ASSETS_COUNT = 50
+SIMILAR_ASSETS_QUEUE_INTERVAL = 60
+SIMILAR_ASSETS_QUEUE_BATCH_SIZE = 500
+
+# Asset click-throughs (/r/assets/<slug>) are redirected to a target url cached (in the shared cache, see CACHES) for
+# ASSET_CLICKTHROUGH_TARGET_CACHE_TIMEOUT seconds, and counted the same way as the tag search counts are.
+ASSET_CLICKTHROUGH_TARGET_CACHE_TIMEOUT = 60 * 60
+CLICKTHROUGH_COUNTS_FLUSH_INTERVAL = 10
+CLICKTHROUGH_COUNTS_MAX_PENDING = 1000
+
+# The changes of the sharded counters (e.g. upvote counts, see ShardedCounter) of a row are spread over COUNTER_SHARDS
+# slots, rolled up into the counter columns every COUNTER_SHARDS_ROLLUP_INTERVAL seconds.
+COUNTER_SHARDS = 8
+COUNTER_SHARDS_ROLLUP_INTERVAL = 10
+
+# Assets are enriched with the OpenGraph description/image of their website in the background (see
+# api.models.opengraph_enrichment_job), by a pool of OPENGRAPH_ENRICHMENT_WORKERS threads making at most
+# OPENGRAPH_ENRICHMENT_MAX_PER_DOMAIN concurrent requests per domain. Failed jobs are retried after
+# OPENGRAPH_ENRICHMENT_RETRY_BACKOFF, 2x, 4x, ... seconds, up to OPENGRAPH_ENRICHMENT_MAX_ATTEMPTS attempts. Results
+# are cached per (normalized) website url for OPENGRAPH_RESULT_CACHE_TIMEOUT seconds.
+OPENGRAPH_ENRICHMENT_WORKERS = 8
+OPENGRAPH_ENRICHMENT_MAX_PER_DOMAIN = 2
+OPENGRAPH_ENRICHMENT_MAX_ATTEMPTS = 5
+OPENGRAPH_ENRICHMENT_RETRY_BACKOFF = 60
+# Running jobs not finished after this many seconds are considered abandoned (e.g. the worker died) and run again
+OPENGRAPH_ENRICHMENT_JOB_TIMEOUT = 10 * 60
+OPENGRAPH_RESULT_CACHE_TIMEOUT = 24 * 60 * 60
+OPENGRAPH_FETCH_TIMEOUT = 10
+# Used for sites that refuse to serve their OpenGraph tags to us
+OPENGRAPH_IO_API_URL = 'https://opengraph.io/api/1.1/site/'
+OPENGRAPH_IO_APP_ID = os.environ.get(
+    'OPENGRAPH_IO_APP_ID', '8046bf50-dd39-4e7f-8988-8e8667387ff9'
+)
+
+# Autocomplete suggestions are served from in-process prefix indexes of the tag, asset and organization names (see
+# api.utils.autocomplete_index), Elasticsearch is only queried when they have no suggestion. Writes to the indexed
+# fields of these models bump a version stamp in the cache which is checked every
+# AUTOCOMPLETE_INDEX_VERSION_CHECK_INTERVAL seconds, and the indexes are rebuilt at least every
+# AUTOCOMPLETE_INDEX_MAX_AGE seconds (e.g. if the cache is not shared by processes). If
+# AUTOCOMPLETE_INDEX_REBUILD_IN_BACKGROUND, they are rebuilt by a background thread while the requests keep being
+# answered from the previous ones.
+AUTOCOMPLETE_FROM_PREFIX_INDEX = True
+AUTOCOMPLETE_INDEX_VERSION_CHECK_INTERVAL = 5
+AUTOCOMPLETE_INDEX_MAX_AGE = 10 * 60
+AUTOCOMPLETE_INDEX_REBUILD_IN_BACKGROUND = True
+
+# The questions of solutions having at most SOLUTION_QUESTIONS_CACHE_MAX_COUNT questions are cached (in the shared
+# cache, see CACHES) for SOLUTION_QUESTIONS_CACHE_TIMEOUT seconds and autocompleted from memory, the others are searched
+# in Elasticsearch.
+SOLUTION_QUESTIONS_CACHE_MAX_COUNT = 50
+SOLUTION_QUESTIONS_CACHE_TIMEOUT = 60 * 60
+
 # DJStripe pendpoints reside at /stripe/* so this will be at /webhook
 DJSTRIPE_WEBHOOK_URL = r"^webhook/$"
 
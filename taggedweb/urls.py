@@ -48,6 +48,7 @@ from api.views.analytics import AssetClickThroughCounterRedirectView
 from api.views.asset_votes import AssetVoteViewSet
 from api.views.asset_claims import AssetClaimViewSet
 from api.views.download_sitemap import download_sitemap
+from api.views.search_index_queue import search_index_queue_stats
 from dj_rest_auth.views import PasswordResetConfirmView
 from api.views.user_problem import UserProblemViewSet
 from api.views.organization import autocomplete_organizations
@@ -128,6 +129,7 @@ urlpatterns = [
     path('autocomplete-solution-questions/', autocomplete_solution_questions),
     # Download sitemap file
     path('download/sitemap/', download_sitemap),
+    path('search-index-queue-stats/', search_index_queue_stats),
     # DRF Standard Token Auth Views
     path('api-auth/', include('rest_framework.urls')),
     path('api-token-auth/', obtain_auth_token),
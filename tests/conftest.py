@@ -1,9 +1,22 @@
 import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import pytest, stripe, collections
 from django.conf import settings
+from django.core.cache import cache
 from djstripe.models import Product, Price, Event
 from django.test import Client
+from elasticsearch import Transport
+from elasticsearch_dsl.connections import connections
 from api.models.solution_booking import SolutionBooking
+from api.models.asset import asset_clickthrough_counts_buffer
+from api.models.tag import tag_search_counts_buffer
+from api.utils.autocomplete_index import autocomplete_index
+from api.documents.local_search import (
+    clear_local_search_indexes,
+    disconnect_local_search_signals,
+    use_local_search_backend,
+)
 from dateutil.relativedelta import relativedelta
 from api.models import (
     Asset,
@@ -32,6 +45,96 @@ def patch_elasticsearch(mocker):
     mocker.patch('elasticsearch.Transport.perform_request')
 
 
+@pytest.fixture(autouse=True)
+def clear_counter_buffers(monkeypatch):
+    # Without a flusher thread, which would flush on its own db connection (outside of the test transaction) and
+    # take the counts of a test before it flushes them
+    for buffer in (tag_search_counts_buffer, asset_clickthrough_counts_buffer):
+        monkeypatch.setattr(buffer, '_flush_interval', None)
+    # Counts buffered by a test must not be flushed into the db of another one (or after the test db is gone)
+    yield
+    tag_search_counts_buffer.clear()
+    asset_clickthrough_counts_buffer.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_autocomplete_index(settings):
+    # Rolling back the test transaction doesn't bump the version of the index
+    autocomplete_index.clear()
+    # Other threads have their own db connections which can't see the data of the test transaction
+    settings.AUTOCOMPLETE_INDEX_REBUILD_IN_BACKGROUND = False
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Nor does it invalidate what was cached from the db
+    yield
+    cache.clear()
+
+
+# Not patched (see patch_elasticsearch), for the tests using the local search backend
+_transport_perform_request = Transport.perform_request
+
+
+@pytest.fixture
+def local_search_backend(mocker, settings):
+    """
+    Serves the Elasticsearch requests of the test with the local search backend (see api.documents.local_search), so
+    that searches run against what the test wrote to the db.
+    """
+    mocker.patch('elasticsearch.Transport.perform_request', _transport_perform_request)
+    settings.LOCAL_SEARCH_INDEX_VERSION_CHECK_INTERVAL = 0
+    connection = connections.get_connection()
+    clear_local_search_indexes()
+    use_local_search_backend()
+    yield
+    disconnect_local_search_signals()
+    clear_local_search_indexes()
+    connections.add_connection('default', connection)
+
+
+class LocalHttpSite:
+    """
+    A local stand-in for third party websites/APIs: serves `responses` ({path: (status, content type, body)}) on
+    127.0.0.1 and records the requested paths.
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.requested_paths = []
+        site = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                site.requested_paths.append(path)
+                status, content_type, body = site.responses.get(
+                    path, (404, 'text/plain', 'Not Found')
+                )
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), RequestHandler)
+        self.url = 'http://127.0.0.1:{}'.format(self._server.server_port)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def local_http_site():
+    site = LocalHttpSite()
+    yield site
+    site.close()
+
+
 @pytest.fixture
 def example_stripe_product():
     return Product.objects.create(
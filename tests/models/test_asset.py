@@ -1,4 +1,6 @@
-from api.models import Asset
+from django.db.models.signals import post_save
+
+from api.models import Asset, Tag
 
 
 class TestAssetPromoVideoField:
@@ -68,3 +70,36 @@ class TestAssetPromoVideoField:
 
         expected_embed_url = 'https://www.youtube.com/embed/Q0hi9d1W3Ag'
         assert asset.promo_video == expected_embed_url
+
+
+class TestAssetSave:
+    def test_save_does_not_overwrite_the_db_maintained_columns(self, example_asset):
+        stale_asset = Asset.objects.get(id=example_asset.id)
+        tag = Tag.objects.create(slug='crm', name='CRM')
+        example_asset.tags.add(tag)
+
+        stale_asset.name = 'Renamed asset'
+        stale_asset.save()
+
+        asset = Asset.objects.get(id=example_asset.id)
+        assert (asset.name, asset.tag_ids) == ('Renamed asset', [tag.id])
+
+    def test_save_keeps_the_django_semantics(self, example_asset):
+        update_fields_seen = []
+
+        def _receiver(sender, instance, update_fields, **kwargs):
+            update_fields_seen.append(update_fields)
+
+        post_save.connect(_receiver, sender=Asset)
+        try:
+            example_asset.save()
+            asset_id = example_asset.id
+            example_asset.delete()
+            # A row that doesn't exist anymore is inserted again
+            example_asset.id = asset_id
+            example_asset.save()
+        finally:
+            post_save.disconnect(_receiver, sender=Asset)
+
+        assert update_fields_seen == [None, None]
+        assert Asset.objects.filter(id=asset_id).exists()
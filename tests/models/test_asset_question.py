@@ -1,5 +1,6 @@
 import pytest
 from api.models import AssetQuestion, AssetQuestionVote, Asset
+from api.models.counter_shard import roll_up_counter_shards
 
 
 def test_asset_question_is_unique_for_asset(example_asset, user_and_password):
@@ -12,6 +13,8 @@ def test_asset_question_is_unique_for_asset(example_asset, user_and_password):
     question1.save()
 
     def _check_upvote_counts_of_a_question(expected_count: int) -> None:
+        # The upvotes are counted through sharded counters
+        roll_up_counter_shards()
         assert (
             Asset.objects.get(id=example_asset.id)
             .questions.get(id=question1.id)
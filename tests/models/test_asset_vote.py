@@ -1,4 +1,5 @@
 from api.models import Asset, AssetVote
+from api.models.counter_shard import roll_up_counter_shards
 
 
 def test_upvotes_count_for_an_asset_should_be_updated_automatically_if_asset_vote_is_created_update_deleted(
@@ -7,6 +8,8 @@ def test_upvotes_count_for_an_asset_should_be_updated_automatically_if_asset_vot
     example_asset,
 ):
     def _check_upvote_counts_of_an_asset(expected_count: int) -> None:
+        # The upvotes are counted through sharded counters
+        roll_up_counter_shards()
         assert Asset.objects.get(id=example_asset.id).upvotes_count == expected_count
 
     _check_upvote_counts_of_an_asset(0)
@@ -0,0 +1,50 @@
+from api.models import Asset, AssetVote, User
+from api.models.counter_shard import (
+    CounterShard,
+    add_unrolled_counts,
+    roll_up_counter_shards,
+)
+
+
+def _create_upvotes(asset, count: int) -> list:
+    return [
+        AssetVote.objects.create(
+            asset=asset, user=User.objects.create(username='voter{}'.format(i))
+        )
+        for i in range(count)
+    ]
+
+
+def test_upvotes_are_added_to_slots_until_rolled_up(example_asset, settings):
+    settings.COUNTER_SHARDS = 4
+    votes = _create_upvotes(example_asset, 20)
+    votes[0].delete()
+
+    shards = CounterShard.objects.filter(
+        counter='api.asset.upvotes_count', object_id=example_asset.id
+    )
+    assert 1 < shards.count() <= 4
+    assert Asset.objects.get(id=example_asset.id).upvotes_count == 0
+
+    asset = Asset.objects.get(id=example_asset.id)
+    add_unrolled_counts([asset], 'upvotes_count')
+    assert asset.upvotes_count == 19
+
+    assert roll_up_counter_shards() == 1
+    assert Asset.objects.get(id=example_asset.id).upvotes_count == 19
+    assert not CounterShard.objects.exists()
+
+    # Nothing left to roll up
+    assert roll_up_counter_shards() == 0
+    assert Asset.objects.get(id=example_asset.id).upvotes_count == 19
+
+
+def test_rollup_updates_every_counted_row(example_asset, example_asset_2):
+    _create_upvotes(example_asset, 2)
+    AssetVote.objects.create(
+        asset=example_asset_2, user=User.objects.create(username='other voter')
+    )
+
+    assert roll_up_counter_shards() == 2
+    assert Asset.objects.get(id=example_asset.id).upvotes_count == 2
+    assert Asset.objects.get(id=example_asset_2.id).upvotes_count == 1
@@ -0,0 +1,178 @@
+import json
+from urllib.parse import quote_plus
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from api.models import Asset, OpenGraphEnrichmentJob
+from api.models.opengraph_enrichment_job import process_opengraph_enrichment_jobs
+
+OPENGRAPH_PAGE = '''
+<html>
+<head>
+<meta property="og:title" content="Mailchimp" />
+<meta property="og:type" content="website" />
+<meta property="og:url" content="https://mailchimp.com/" />
+<meta property="og:description" content="Email marketing for small businesses" />
+<meta property="og:image" content="https://mailchimp.com/og.png" />
+</head>
+<body></body>
+</html>
+'''
+
+
+@pytest.fixture
+def opengraph_site(local_http_site, settings):
+    # Pool threads have their own db connections which can't see the data of the test transaction
+    settings.OPENGRAPH_ENRICHMENT_WORKERS = 1
+    settings.OPENGRAPH_IO_API_URL = '{}/opengraph-io/'.format(local_http_site.url)
+    settings.OPENGRAPH_ENRICHMENT_RETRY_BACKOFF = 60
+    local_http_site.responses['/'] = (200, 'text/html', OPENGRAPH_PAGE)
+    cache.clear()
+    yield local_http_site
+    cache.clear()
+
+
+def _create_asset(slug: str, website: str) -> Asset:
+    return Asset.objects.create(slug=slug, name=slug, website=website)
+
+
+def test_saving_an_asset_only_queues_its_enrichment(opengraph_site):
+    asset = _create_asset('mailchimp', opengraph_site.url + '/')
+
+    assert opengraph_site.requested_paths == []
+    asset.refresh_from_db()
+    assert asset.description is None
+    assert asset.logo_url == 'https://logo.clearbit.com/{}'.format(
+        opengraph_site.url[len('http://') :]
+    )
+    job = OpenGraphEnrichmentJob.objects.get(asset=asset)
+    assert job.status == OpenGraphEnrichmentJob.Status.PENDING
+    assert job.website == asset.website
+
+    # Saving it again doesn't queue it again
+    asset.short_description = 'Email marketing'
+    asset.save()
+    assert OpenGraphEnrichmentJob.objects.count() == 1
+
+
+def test_assets_with_a_description_are_not_enriched(opengraph_site):
+    Asset.objects.create(
+        slug='mailchimp',
+        name='mailchimp',
+        website=opengraph_site.url + '/',
+        description='bla bla bla',
+    )
+    assert not OpenGraphEnrichmentJob.objects.exists()
+
+
+def test_jobs_enrich_assets_from_their_website(opengraph_site):
+    asset = _create_asset('mailchimp', opengraph_site.url + '/')
+
+    assert process_opengraph_enrichment_jobs() == 1
+
+    asset.refresh_from_db()
+    assert asset.description == 'Email marketing for small businesses'
+    assert asset.og_image_url == 'https://mailchimp.com/og.png'
+    job = OpenGraphEnrichmentJob.objects.get(asset=asset)
+    assert job.status == OpenGraphEnrichmentJob.Status.DONE
+    assert process_opengraph_enrichment_jobs() == 0
+
+
+def test_results_are_cached_per_website(opengraph_site):
+    assets = [
+        _create_asset('asset-{}'.format(i), website)
+        for i, website in enumerate(
+            [
+                opengraph_site.url + '/',
+                opengraph_site.url,
+                opengraph_site.url.upper() + '/#pricing',
+            ]
+        )
+    ]
+
+    assert process_opengraph_enrichment_jobs() == 3
+
+    assert opengraph_site.requested_paths == ['/']
+    for asset in assets:
+        asset.refresh_from_db()
+        assert asset.description == 'Email marketing for small businesses'
+
+
+def test_pages_of_the_same_domain_are_not_shared(opengraph_site):
+    opengraph_site.responses['/other/'] = (
+        200,
+        'text/html',
+        OPENGRAPH_PAGE.replace(
+            'Email marketing for small businesses', 'Another product'
+        ),
+    )
+    asset = _create_asset('mailchimp', opengraph_site.url + '/')
+    other_asset = _create_asset('other', opengraph_site.url + '/other/')
+
+    assert process_opengraph_enrichment_jobs() == 2
+
+    assert sorted(opengraph_site.requested_paths) == ['/', '/other/']
+    asset.refresh_from_db()
+    other_asset.refresh_from_db()
+    assert asset.description == 'Email marketing for small businesses'
+    assert other_asset.description == 'Another product'
+
+
+def test_opengraph_io_is_used_when_the_site_refuses_to_serve_its_page(opengraph_site):
+    opengraph_site.responses['/'] = (403, 'text/html', 'Forbidden')
+    opengraph_site.responses[
+        '/opengraph-io/{}'.format(quote_plus(opengraph_site.url + '/'))
+    ] = (
+        200,
+        'application/json',
+        json.dumps(
+            {'hybridGraph': {'description': 'From OpenGraph.io', 'image': None}}
+        ),
+    )
+    asset = _create_asset('mailchimp', opengraph_site.url + '/')
+
+    process_opengraph_enrichment_jobs()
+
+    asset.refresh_from_db()
+    assert asset.description == 'From OpenGraph.io'
+
+
+def test_failed_jobs_are_retried_with_a_backoff(opengraph_site, settings):
+    settings.OPENGRAPH_ENRICHMENT_MAX_ATTEMPTS = 2
+    opengraph_site.responses['/'] = (500, 'text/html', 'Internal Server Error')
+    asset = _create_asset('mailchimp', opengraph_site.url + '/')
+
+    process_opengraph_enrichment_jobs()
+
+    job = OpenGraphEnrichmentJob.objects.get(asset=asset)
+    assert job.status == OpenGraphEnrichmentJob.Status.PENDING
+    assert job.attempts == 1
+    assert job.next_attempt_at > timezone.now()
+    assert job.last_error
+    # Not due yet
+    assert process_opengraph_enrichment_jobs() == 0
+
+    OpenGraphEnrichmentJob.objects.update(next_attempt_at=timezone.now())
+    process_opengraph_enrichment_jobs()
+
+    job.refresh_from_db()
+    assert job.status == OpenGraphEnrichmentJob.Status.FAILED
+    assert job.attempts == 2
+    asset.refresh_from_db()
+    assert asset.description is None
+
+
+def test_changing_the_website_queues_the_asset_again(opengraph_site):
+    asset = _create_asset('mailchimp', opengraph_site.url + '/')
+    process_opengraph_enrichment_jobs()
+
+    asset.description = ''
+    asset.website = opengraph_site.url.replace('127.0.0.1', 'localhost') + '/'
+    asset.save()
+
+    job = OpenGraphEnrichmentJob.objects.get(asset=asset)
+    assert job.status == OpenGraphEnrichmentJob.Status.PENDING
+    assert job.website == asset.website
+    assert job.domain == asset.website[len('http://') : -1]
@@ -0,0 +1,337 @@
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+
+from api.documents.asset import AssetDocument
+from api.models import (
+    Asset,
+    AssetAttributeVote,
+    Organization,
+    SearchIndexQueueItem,
+    Tag,
+    UserAssetUsage,
+)
+from api.models.search_index_queue import (
+    get_search_index_queue_stats,
+    process_search_index_queue,
+)
+
+
+def _mock_elasticsearch(mocker, errors=False, items=()):
+    return mocker.patch(
+        'elasticsearch.Transport.perform_request',
+        return_value={'took': 1, 'errors': errors, 'items': list(items)},
+    )
+
+
+def _get_bulk_actions(perform_request, index: str) -> list:
+    """
+    The (action, id, source) tuples of the bulk requests sent for the given index.
+    """
+    actions = []
+    for call in perform_request.call_args_list:
+        method, url = call.args[:2]
+        if not url.endswith('/_bulk'):
+            continue
+        lines = [json.loads(line) for line in call.kwargs['body'].strip().split('\n')]
+        while lines:
+            action = lines.pop(0)
+            op_type, meta = next(iter(action.items()))
+            source = lines.pop(0) if op_type != 'delete' else None
+            if meta['_index'] == index:
+                actions.append((op_type, str(meta['_id']), source))
+    return actions
+
+
+def _age_queue(seconds: int):
+    SearchIndexQueueItem.objects.update(
+        created=timezone.now() - timedelta(seconds=seconds)
+    )
+
+
+def test_saving_an_asset_queues_it_instead_of_indexing_it(mocker):
+    perform_request = _mock_elasticsearch(mocker)
+
+    asset = Asset.objects.create(slug='mailchimp', name='Mailchimp')
+    asset.short_description = 'Email marketing'
+    asset.save()
+
+    perform_request.assert_not_called()
+    assert list(
+        SearchIndexQueueItem.objects.filter(model='api.asset').values_list(
+            'object_id', flat=True
+        )
+    ) == [str(asset.id), str(asset.id)]
+
+
+def test_queued_updates_are_coalesced_into_one_bulk_request(mocker, settings):
+    settings.SEARCH_INDEX_QUEUE_DEBOUNCE = 2
+    perform_request = _mock_elasticsearch(mocker)
+    mailchimp = Asset.objects.create(slug='mailchimp', name='Mailchimp')
+    hubspot = Asset.objects.create(slug='hubspot', name='HubSpot')
+    mailchimp.name = 'Mailchimp 2'
+    mailchimp.save()
+
+    # Not due yet, the assets may be written to again
+    assert process_search_index_queue() == 0
+    perform_request.assert_not_called()
+
+    _age_queue(seconds=3)
+    assert process_search_index_queue() == 2
+
+    actions = _get_bulk_actions(perform_request, 'asset')
+    assert sorted((op_type, _id) for op_type, _id, _ in actions) == sorted(
+        [('index', str(mailchimp.id)), ('index', str(hubspot.id))]
+    )
+    assert [
+        source['name'] for _, _id, source in actions if _id == str(mailchimp.id)
+    ] == ['Mailchimp 2']
+    assert not SearchIndexQueueItem.objects.filter(model='api.asset').exists()
+
+    # Processing again is a no-op
+    perform_request.reset_mock()
+    SearchIndexQueueItem.objects.all().delete()
+    assert process_search_index_queue() == 0
+    perform_request.assert_not_called()
+
+
+def test_continuously_updated_objects_are_indexed_after_the_max_delay(mocker, settings):
+    settings.SEARCH_INDEX_QUEUE_DEBOUNCE = 2
+    settings.SEARCH_INDEX_QUEUE_MAX_DELAY = 30
+    _mock_elasticsearch(mocker)
+    asset = Asset.objects.create(slug='mailchimp', name='Mailchimp')
+    _age_queue(seconds=31)
+    asset.save()
+
+    assert process_search_index_queue() == 1
+
+
+def test_deleted_objects_are_deleted_from_the_index(mocker, settings):
+    settings.SEARCH_INDEX_QUEUE_DEBOUNCE = 0
+    asset = Asset.objects.create(slug='mailchimp', name='Mailchimp')
+    asset_id = asset.id
+    asset.delete()
+    perform_request = _mock_elasticsearch(
+        mocker,
+        errors=True,
+        # Never indexed
+        items=[{'delete': {'_id': str(asset_id), 'status': 404}}],
+    )
+
+    process_search_index_queue()
+
+    assert ('delete', str(asset_id), None) in _get_bulk_actions(
+        perform_request, 'asset'
+    )
+    assert not SearchIndexQueueItem.objects.filter(model='api.asset').exists()
+
+
+def test_failed_updates_stay_queued(mocker, settings):
+    settings.SEARCH_INDEX_QUEUE_DEBOUNCE = 0
+    asset = Asset.objects.create(slug='mailchimp', name='Mailchimp')
+    _mock_elasticsearch(
+        mocker,
+        errors=True,
+        items=[{'index': {'_id': str(asset.id), 'status': 429}}],
+    )
+    mocker.patch('api.models.search_index_queue.logging.error')
+
+    assert process_search_index_queue() == 0
+    assert SearchIndexQueueItem.objects.filter(
+        model='api.asset', object_id=str(asset.id), attempts=1
+    ).exists()
+
+
+def test_failed_documents_dont_hold_up_the_others(mocker, settings):
+    settings.SEARCH_INDEX_QUEUE_DEBOUNCE = 0
+    settings.SEARCH_INDEX_QUEUE_RETRY_BACKOFF = 60
+    assets = [
+        Asset.objects.create(slug='asset-{}'.format(i), name='Asset {}'.format(i))
+        for i in range(4)
+    ]
+    rejected_asset, unpreparable_asset = assets[:2]
+    _mock_elasticsearch(
+        mocker,
+        errors=True,
+        items=[{'index': {'_id': str(rejected_asset.id), 'status': 400}}],
+    )
+    prepare = AssetDocument.prepare
+
+    def _prepare(document, instance):
+        if instance.id == unpreparable_asset.id:
+            raise ValueError('Cannot prepare')
+        return prepare(document, instance)
+
+    mocker.patch.object(AssetDocument, 'prepare', _prepare)
+    mocker.patch('api.models.search_index_queue.logging.error')
+
+    assert process_search_index_queue() == 2
+
+    assert _get_queued_object_ids('api.asset') == {
+        str(rejected_asset.id),
+        str(unpreparable_asset.id),
+    }
+    assert set(
+        SearchIndexQueueItem.objects.values_list('attempts', 'status').distinct()
+    ) == {(1, SearchIndexQueueItem.Status.PENDING)}
+    assert 'Cannot prepare' in (
+        SearchIndexQueueItem.objects.get(
+            object_id=str(unpreparable_asset.id)
+        ).last_error
+    )
+
+    # They are retried after the backoff, with the updates queued in the meantime
+    _mock_elasticsearch(mocker)
+    Asset.objects.create(slug='new-asset', name='New Asset')
+    assert process_search_index_queue() == 1
+    assert process_search_index_queue() == 0
+    assert _get_queued_object_ids('api.asset') == {
+        str(rejected_asset.id),
+        str(unpreparable_asset.id),
+    }
+
+    SearchIndexQueueItem.objects.update(next_attempt_at=timezone.now())
+    mocker.patch.object(AssetDocument, 'prepare', prepare)
+    assert process_search_index_queue() == 2
+    assert not SearchIndexQueueItem.objects.exists()
+
+
+def test_updates_failing_too_many_times_are_given_up_on(mocker, settings):
+    settings.SEARCH_INDEX_QUEUE_DEBOUNCE = 0
+    settings.SEARCH_INDEX_QUEUE_MAX_ATTEMPTS = 2
+    settings.SEARCH_INDEX_QUEUE_RETRY_BACKOFF = 0
+    asset = Asset.objects.create(slug='mailchimp', name='Mailchimp')
+    _mock_elasticsearch(
+        mocker,
+        errors=True,
+        items=[{'index': {'_id': str(asset.id), 'status': 400}}],
+    )
+    mocker.patch('api.models.search_index_queue.logging.error')
+
+    process_search_index_queue()
+    process_search_index_queue()
+
+    assert set(
+        SearchIndexQueueItem.objects.values_list('attempts', 'status').distinct()
+    ) == {(2, SearchIndexQueueItem.Status.FAILED)}
+    stats = get_search_index_queue_stats()
+    assert (stats['pending_objects'], stats['failed_objects']) == (0, 1)
+    assert process_search_index_queue() == 0
+
+    # Until it's written to again
+    asset.save()
+    _mock_elasticsearch(mocker)
+    assert process_search_index_queue() == 1
+    assert not SearchIndexQueueItem.objects.exists()
+
+
+def _get_queued_object_ids(model: str) -> set:
+    return set(
+        SearchIndexQueueItem.objects.filter(model=model).values_list(
+            'object_id', flat=True
+        )
+    )
+
+
+def test_renaming_a_tag_reindexes_its_assets_and_solutions_in_bulk(
+    mocker, settings, example_solution
+):
+    settings.SEARCH_INDEX_QUEUE_DEBOUNCE = 0
+    tag = Tag.objects.create(slug='crm', name='CRM')
+    assets = [
+        Asset.objects.create(slug='asset-{}'.format(i), name='Asset {}'.format(i))
+        for i in range(3)
+    ]
+    tag.assets.set(assets)
+    example_solution.tags.set([tag])
+    SearchIndexQueueItem.objects.all().delete()
+    perform_request = _mock_elasticsearch(mocker)
+
+    tag.name = 'Customer Relationship Management'
+    tag.save()
+
+    perform_request.assert_not_called()
+    assert _get_queued_object_ids('api.tag') == {str(tag.id)}
+    assert _get_queued_object_ids('api.asset') == {str(asset.id) for asset in assets}
+    assert _get_queued_object_ids('api.solution') == {str(example_solution.id)}
+
+    process_search_index_queue()
+
+    bulk_requests = [
+        call for call in perform_request.call_args_list if call.args[1] == '/_bulk'
+    ]
+    # One per index: asset, solution and tag
+    assert len(bulk_requests) == 3
+    asset_actions = _get_bulk_actions(perform_request, 'asset')
+    assert len(asset_actions) == 3
+    assert all(
+        [tag['name'] for tag in source['list_card']['tags']]
+        == ['Customer Relationship Management']
+        for _, _, source in asset_actions
+    )
+
+
+def test_deleting_a_tag_reindexes_its_assets(mocker, settings):
+    settings.SEARCH_INDEX_QUEUE_DEBOUNCE = 0
+    tag = Tag.objects.create(slug='crm', name='CRM')
+    asset = Asset.objects.create(slug='hubspot', name='HubSpot')
+    asset.tags.set([tag])
+    SearchIndexQueueItem.objects.all().delete()
+    perform_request = _mock_elasticsearch(mocker)
+
+    tag_id = tag.id
+    tag.delete()
+    process_search_index_queue()
+
+    assert [
+        (op_type, _id, source['tags'])
+        for op_type, _id, source in _get_bulk_actions(perform_request, 'asset')
+    ] == [('index', str(asset.id), [])]
+    assert ('delete', str(tag_id), None) in _get_bulk_actions(perform_request, 'tag')
+
+
+def test_search_index_queue_stats(settings):
+    settings.SEARCH_INDEX_QUEUE_MAX_LAG = 60
+    assert get_search_index_queue_stats() == {
+        'pending_updates': 0,
+        'pending_objects': 0,
+        'failed_objects': 0,
+        'lag_seconds': 0,
+        'is_backlogged': False,
+    }
+
+    asset = Asset.objects.create(slug='mailchimp', name='Mailchimp')
+    asset.save()
+    _age_queue(seconds=120)
+
+    stats = get_search_index_queue_stats()
+    assert stats['pending_updates'] == 2
+    assert stats['pending_objects'] == 1
+    assert stats['lag_seconds'] >= 120
+    assert stats['is_backlogged'] is True
+
+
+def test_writes_to_what_the_asset_list_card_embeds_reindex_the_asset(
+    mocker, example_asset, example_solution, admin_user
+):
+    _mock_elasticsearch(mocker)
+    example_asset.solutions.add(example_solution)
+    attribute = example_asset.attributes.create(name='Easy to use')
+    writes = [
+        lambda: example_asset.questions.create(title='Is it free?'),
+        lambda: example_asset.snapshots.create(url='https://mailchimp.com/1.png'),
+        lambda: AssetAttributeVote.objects.create(
+            asset=example_asset, attribute=attribute, user=admin_user
+        ),
+        lambda: UserAssetUsage.objects.create(asset=example_asset, user=admin_user),
+        lambda: example_asset.customer_organizations.create(name='Acme'),
+        lambda: Organization.objects.filter(name='Acme').get().save(),
+        lambda: example_solution.save(),
+        lambda: example_solution.questions.create(title='How long does it take?'),
+    ]
+
+    for write in writes:
+        SearchIndexQueueItem.objects.all().delete()
+        write()
+        assert str(example_asset.id) in _get_queued_object_ids('api.asset')
@@ -0,0 +1,93 @@
+from api.models import Asset, LinkedTag, SimilarAsset, SimilarAssetsQueueItem, Tag
+from api.models.similar_asset import (
+    build_similar_assets,
+    process_similar_assets_queue,
+)
+
+
+def _get_similar_assets() -> dict:
+    return {
+        (asset_id, similar_asset_id): round(score, 6)
+        for asset_id, similar_asset_id, score in SimilarAsset.objects.values_list(
+            'asset_id', 'similar_asset_id', 'score'
+        )
+    }
+
+
+def _create_assets_with_tags(tag_slugs_per_asset: list) -> list:
+    tags = {}
+    assets = []
+    for i, tag_slugs in enumerate(tag_slugs_per_asset):
+        asset = Asset.objects.create(
+            slug='asset-{}'.format(i), name='Asset {}'.format(i), description='test'
+        )
+        for tag_slug in tag_slugs:
+            if tag_slug not in tags:
+                tags[tag_slug] = Tag.objects.create(slug=tag_slug, name=tag_slug)
+            asset.tags.add(tags[tag_slug])
+        assets.append(asset)
+    return assets
+
+
+def test_similar_assets_are_assets_sharing_tags():
+    asset_0, asset_1, asset_2 = _create_assets_with_tags(
+        [['crm', 'email'], ['crm'], ['video']]
+    )
+
+    build_similar_assets()
+
+    assert set(_get_similar_assets()) == {
+        (asset_0.id, asset_1.id),
+        (asset_1.id, asset_0.id),
+    }
+
+
+def test_incremental_updates_match_a_rebuild():
+    assets = _create_assets_with_tags(
+        [['crm', 'email'], ['crm'], ['email', 'video'], ['video'], []]
+    )
+    crm = Tag.objects.get(slug='crm')
+    video = Tag.objects.get(slug='video')
+
+    # Adding and removing tags, from both sides of the relation
+    assets[4].tags.add(crm, video)
+    assets[0].tags.remove(crm)
+    video.assets.add(assets[1])
+    LinkedTag.objects.filter(asset=assets[2], tag=video).delete()
+    LinkedTag.objects.create(asset=assets[3], tag=crm)
+    process_similar_assets_queue()
+    incrementally_updated = _get_similar_assets()
+
+    build_similar_assets()
+
+    assert incrementally_updated == _get_similar_assets()
+
+
+def test_clearing_tags_removes_similar_assets():
+    asset_0, asset_1 = _create_assets_with_tags([['crm'], ['crm']])
+    process_similar_assets_queue()
+    assert SimilarAsset.objects.filter(asset=asset_1).exists()
+
+    asset_0.tags.clear()
+    process_similar_assets_queue()
+
+    assert not SimilarAsset.objects.exists()
+
+
+def test_tag_changes_are_queued_instead_of_updating_the_neighbours():
+    assets = _create_assets_with_tags([['crm'], ['crm'], ['crm']])
+    build_similar_assets()
+    assert not SimilarAssetsQueueItem.objects.exists()
+    similar_assets = _get_similar_assets()
+
+    Tag.objects.get(slug='crm').delete()
+
+    assert _get_similar_assets() == similar_assets
+    assert sorted(
+        SimilarAssetsQueueItem.objects.values_list('asset_id', flat=True)
+    ) == [asset.id for asset in assets]
+
+    assert process_similar_assets_queue(batch_size=2) == 2
+    assert process_similar_assets_queue() == 1
+    assert not SimilarAsset.objects.exists()
+    assert not SimilarAssetsQueueItem.objects.exists()
@@ -0,0 +1,203 @@
+import pytest
+
+from api.utils.bm25_index import (
+    Analyzer,
+    BM25Index,
+    get_fields_from_mapping,
+    get_minimum_should_match,
+)
+
+HTML_STRIP_ANALYSIS = {
+    'analyzer': {
+        'html_strip': {
+            'tokenizer': 'standard',
+            'filter': ['lowercase', 'stop', 'snowball'],
+            'char_filter': ['html_strip'],
+            'type': 'custom',
+        }
+    }
+}
+
+ASSET_MAPPING = {
+    'name': {'type': 'text'},
+    'slug': {'type': 'keyword'},
+    'description': {
+        'type': 'text',
+        'analyzer': 'html_strip',
+        'fields': {'raw': {'type': 'keyword'}},
+    },
+    'tags': {
+        'type': 'nested',
+        'properties': {'slug': {'type': 'text', 'analyzer': 'html_strip'}},
+    },
+    'is_published': {'type': 'boolean'},
+    'list_card': {'type': 'object', 'enabled': False},
+}
+
+
+def _build_index(documents: list) -> BM25Index:
+    return BM25Index(
+        enumerate(documents),
+        get_fields_from_mapping(ASSET_MAPPING, HTML_STRIP_ANALYSIS),
+    )
+
+
+@pytest.mark.parametrize(
+    'spec, clauses_count, expected',
+    [
+        (None, 4, 1),
+        ('2', 4, 2),
+        ('-1', 4, 3),
+        ('75%', 4, 3),
+        ('-25%', 4, 3),
+        ('75%', 3, 2),
+        ('3<75%', 2, 2),
+        ('3<75%', 3, 3),
+        ('3<75%', 4, 3),
+        ('3<75%', 8, 6),
+        ('2<-25% 9<-3', 10, 7),
+        ('5', 2, 2),
+    ],
+)
+def test_minimum_should_match(spec, clauses_count, expected):
+    assert get_minimum_should_match(spec, clauses_count) == expected
+
+
+def test_analyzer_strips_html_stop_words_and_inflections():
+    analyzer = Analyzer(['html_strip'], ['lowercase', 'stop', 'snowball'])
+
+    assert analyzer.analyze('<p>The <b>Emails</b> of marketing</p>') == [
+        (1, 'email'),
+        (3, 'market'),
+    ]
+
+
+def test_fields_from_mapping():
+    fields = get_fields_from_mapping(ASSET_MAPPING, HTML_STRIP_ANALYSIS)
+
+    assert set(fields) == {
+        'name',
+        'slug',
+        'description',
+        'description.raw',
+        'tags.slug',
+        'is_published',
+    }
+    assert fields['description.raw'][:2] == ('description', 'keyword')
+    assert fields['tags.slug'][:2] == ('tags.slug', 'text')
+
+
+def test_multi_match_ranks_by_boosted_fields():
+    index = _build_index(
+        [
+            {'name': 'Acme', 'description': 'The best email marketing tool'},
+            {'name': 'Email Blaster', 'description': 'Send newsletters'},
+            {'name': 'Acme CRM', 'tags': [{'slug': 'email'}]},
+            {'name': 'Unrelated', 'description': 'Accounting'},
+        ]
+    )
+
+    hits = index.search(
+        {
+            'multi_match': {
+                'query': 'email',
+                'fields': ['tags.slug^2', 'description', 'name^3'],
+            }
+        }
+    )
+
+    # A match in name outranks the others, documents without any match aren't hits
+    assert hits[0][0] == 1
+    assert sorted(doc for doc, _ in hits) == [0, 1, 2]
+
+
+def test_multi_match_minimum_should_match_applies_per_field():
+    index = _build_index(
+        [
+            {'name': 'email marketing automation'},
+            {'name': 'email marketing'},
+            {'name': 'email', 'description': 'marketing automation'},
+        ]
+    )
+
+    def search(query):
+        return sorted(
+            doc
+            for doc, _ in index.search(
+                {
+                    'multi_match': {
+                        'query': query,
+                        'fields': ['name', 'description'],
+                        'minimum_should_match': '3<75%',
+                    }
+                }
+            )
+        )
+
+    # Up to 3 terms they are all required (in one of the fields)
+    assert search('email marketing automation') == [0]
+    # 3 of 4
+    assert search('email marketing automation tool') == [0]
+    assert search('email marketing') == [0, 1]
+
+
+def test_match_phrase_prefix():
+    index = _build_index(
+        [
+            {'name': 'Email Marketing'},
+            {'name': 'Marketing Email'},
+            {'name': 'Email Market Research'},
+            {'name': 'Emailing'},
+        ]
+    )
+
+    def search(query):
+        return sorted(
+            doc for doc, _ in index.search({'match_phrase_prefix': {'name': query}})
+        )
+
+    assert search('email mar') == [0, 2]
+    assert search('ema') == [0, 1, 2, 3]
+    assert search('marketing e') == [1]
+
+
+def test_bool_filters():
+    index = _build_index(
+        [
+            {'name': 'Mailchimp', 'slug': 'mailchimp', 'is_published': True},
+            {'name': 'Mailgun', 'slug': 'mailgun', 'is_published': False},
+            {'name': 'Hubspot', 'slug': 'hubspot', 'is_published': True},
+        ]
+    )
+
+    hits = index.search(
+        {
+            'bool': {
+                'must': [{'match_phrase_prefix': {'name': 'mail'}}],
+                'filter': [{'term': {'is_published': True}}],
+            }
+        }
+    )
+    assert [doc for doc, _ in hits] == [0]
+
+    hits = index.search({'bool': {'filter': [{'terms': {'slug': ['hubspot', 'x']}}]}})
+    assert hits == [(2, 0.0)]
+
+    hits = index.search({'bool': {'must_not': [{'term': {'slug': 'mailgun'}}]}})
+    assert [doc for doc, _ in hits] == [0, 2]
+
+
+def test_range_scores_matches_with_its_boost():
+    index = _build_index(
+        [{'slug': 'hubspot'}, {'slug': 'mailchimp'}, {'slug': 'mailgun'}]
+    )
+
+    assert index.search({'range': {'slug': {'gte': 'maild', 'boost': 2.5}}}) == [
+        (2, 2.5)
+    ]
+    assert index.search({'range': {'slug': {'lt': 'mailchimp'}}}) == [(0, 1.0)]
+
+
+def test_unsupported_queries_are_rejected():
+    with pytest.raises(ValueError):
+        _build_index([]).search({'fuzzy': {'name': 'mail'}})
@@ -0,0 +1,64 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Asset
+from api.models.solution_booking import SolutionBooking
+
+
+def _get_selects(queries, table: str) -> list:
+    return [
+        query['sql']
+        for query in queries.captured_queries
+        if query['sql'].startswith('SELECT')
+        and 'FROM "{}"'.format(table) in query['sql']
+    ]
+
+
+def test_db_values_are_captured_when_loaded_and_saved(example_asset):
+    assert Asset(name='New asset').get_db_values() is None
+
+    asset = Asset.objects.get(id=example_asset.id)
+    asset.name = 'Renamed asset'
+    asset.tag_ids.append(1)
+    assert asset.changed_fields == {'name', 'tag_ids'}
+    assert asset.get_db_values()['name'] == example_asset.name
+
+    asset.save()
+    assert asset.changed_fields == {'tag_ids'}
+    assert asset.get_db_values()['name'] == 'Renamed asset'
+
+
+def test_save_of_a_loaded_instance_does_not_read_its_old_state(
+    example_solution, admin_user
+):
+    booking = SolutionBooking.objects.create(
+        booked_by=admin_user, solution=example_solution
+    )
+    booking = SolutionBooking.objects.get(id=booking.id)
+
+    booking.status = SolutionBooking.Status.IN_PROGRESS
+    with CaptureQueriesContext(connection) as queries:
+        booking.save()
+
+    assert _get_selects(queries, 'api_solutionbooking') == []
+    assert booking.started_at is not None
+    assert booking.changed_fields == set()
+
+
+def test_values_not_captured_are_loaded_once_per_save(example_solution, admin_user):
+    booking = SolutionBooking.objects.create(
+        booked_by=admin_user, solution=example_solution
+    )
+    booking = SolutionBooking.objects.only('id', 'status').get(id=booking.id)
+
+    booking.status = SolutionBooking.Status.COMPLETED
+    with CaptureQueriesContext(connection) as queries:
+        booking.save()
+
+    assert len(_get_selects(queries, 'api_solutionbooking')) == 1
+    assert (
+        SolutionBooking.objects.get(
+            id=booking.id
+        ).solution.bookings_pending_fulfillment_count
+        == 0
+    )
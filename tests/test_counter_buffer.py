@@ -0,0 +1,44 @@
+from api.utils.counter_buffer import CounterBuffer
+
+
+def test_increments_are_coalesced_per_key():
+    flushed = []
+    buffer = CounterBuffer(flushed.append, flush_interval=None)
+
+    buffer.add('a')
+    buffer.add('b')
+    buffer.add('a', 2)
+    buffer.flush()
+    buffer.flush()
+
+    assert flushed == [{'a': 3, 'b': 1}]
+
+
+def test_flushes_once_max_pending_is_reached():
+    flushed = []
+    buffer = CounterBuffer(flushed.append, flush_interval=None, max_pending=3)
+
+    buffer.add('a')
+    buffer.add('b')
+    assert flushed == []
+
+    buffer.add('a')
+    assert flushed == [{'a': 2, 'b': 1}]
+
+
+def test_counts_are_kept_when_flushing_fails():
+    flushed = []
+
+    def _flush_counts(counts):
+        if not flushed:
+            flushed.append(None)
+            raise Exception('db is down')
+        flushed.append(counts)
+
+    buffer = CounterBuffer(_flush_counts, flush_interval=None)
+    buffer.add('a')
+    buffer.flush()
+    buffer.add('a')
+    buffer.flush()
+
+    assert flushed == [None, {'a': 2}]
@@ -0,0 +1,111 @@
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.management.commands.benchmark_request_signals import _get_receiver_names
+from api.models import Asset, AssetReview, AssetVote, Solution
+from api.models.counter_shard import add_unrolled_counts
+from api.models.solution_booking import SolutionBooking
+from api.models.solution_review import SolutionReview
+
+
+def test_no_model_receivers_run_on_every_request():
+    for signal in (request_started, request_finished):
+        assert not [
+            name for name in _get_receiver_names(signal) if name.startswith('api.')
+        ]
+
+
+def test_upvote_changed_to_downvote_is_uncounted(example_asset, user_and_password):
+    def _get_upvotes_count() -> int:
+        asset = Asset.objects.get(id=example_asset.id)
+        add_unrolled_counts([asset], 'upvotes_count')
+        return asset.upvotes_count
+
+    vote = AssetVote.objects.create(
+        asset=example_asset, user=user_and_password[0], is_upvote=True
+    )
+    assert _get_upvotes_count() == 1
+
+    vote.is_upvote = False
+    vote.save()
+    assert _get_upvotes_count() == 0
+
+    vote.delete()
+    assert _get_upvotes_count() == 0
+
+
+def test_counters_are_updated_with_one_update_per_counting_row(
+    example_solution, admin_user
+):
+    booking = SolutionBooking.objects.create(
+        booked_by=admin_user, solution=example_solution, rating=1
+    )
+
+    booking.status = SolutionBooking.Status.COMPLETED
+    booking.rating = -1
+    with CaptureQueriesContext(connection) as queries:
+        booking.save()
+
+    counter_updates = [
+        query['sql']
+        for query in queries.captured_queries
+        if query['sql'].startswith('UPDATE "api_solution"')
+    ]
+    assert len(counter_updates) == 1
+    solution = Solution.objects.get(id=example_solution.id)
+    assert solution.bookings_pending_fulfillment_count == 0
+    assert (solution.sad_count, solution.neutral_count, solution.happy_count) == (
+        1,
+        0,
+        0,
+    )
+
+
+def test_completed_booking_is_uncounted_once(example_solution, admin_user):
+    booking = SolutionBooking.objects.create(
+        booked_by=admin_user, solution=example_solution
+    )
+    booking.status = SolutionBooking.Status.COMPLETED
+    booking.save()
+    booking.provider_notes = 'done'
+    booking.save()
+
+    solution = Solution.objects.get(id=example_solution.id)
+    assert solution.bookings_pending_fulfillment_count == 0
+
+    booking.delete()
+    solution = Solution.objects.get(id=example_solution.id)
+    assert solution.bookings_pending_fulfillment_count == 0
+
+
+def test_solution_review_type_change_moves_the_count(example_solution, admin_user):
+    review = SolutionReview.objects.create(
+        solution=example_solution, user=admin_user, type=SolutionReview.Type.SAD
+    )
+    review.type = SolutionReview.Type.HAPPY
+    review.save()
+
+    solution = Solution.objects.get(id=example_solution.id)
+    assert (solution.sad_count, solution.neutral_count, solution.happy_count) == (
+        0,
+        0,
+        1,
+    )
+
+
+def test_review_moved_to_another_asset_updates_both_averages(
+    example_asset, example_asset_2, user_and_password
+):
+    review = AssetReview.objects.create(
+        asset=example_asset, user=user_and_password[0], rating=6
+    )
+    AssetReview.objects.create(asset=example_asset_2, rating=10)
+
+    review.asset = example_asset_2
+    review.save()
+
+    asset = Asset.objects.get(id=example_asset.id)
+    assert (asset.avg_rating, asset.reviews_count) == (0, 0)
+    asset_2 = Asset.objects.get(id=example_asset_2.id)
+    assert (asset_2.avg_rating, asset_2.reviews_count) == (8, 2)
@@ -1,5 +1,5 @@
 from api.management.commands.merge_tags import _merge_tags
-from api.models import Tag, Asset
+from api.models import Tag, Asset, SearchIndexQueueItem
 
 
 def test__merge_tags():
@@ -19,3 +19,34 @@ def test__merge_tags():
     _merge_tags(tag1_obj.name, tag2_obj.name)
 
     assert asset.tags.get() == tag2_obj
+
+
+def test__merge_tags_updates_indexed_tag_ids():
+    tag1_obj = Tag.objects.create(name='t1', slug='t1')
+    tag2_obj = Tag.objects.create(name='t2', slug='t2')
+    asset = Asset.objects.create(slug='test-asset', name='Test Asset')
+    asset.tags.set([tag1_obj])
+
+    _merge_tags(tag1_obj.name, tag2_obj.name)
+
+    asset.refresh_from_db()
+    assert asset.tag_ids == [tag2_obj.id]
+
+
+def test__merge_tags_queues_the_reindex_of_the_assets():
+    tag1_obj = Tag.objects.create(name='t1', slug='t1')
+    tag2_obj = Tag.objects.create(name='t2', slug='t2')
+    assets = [
+        Asset.objects.create(slug='asset-{}'.format(i), name='Asset {}'.format(i))
+        for i in range(3)
+    ]
+    tag1_obj.assets.set(assets)
+    SearchIndexQueueItem.objects.all().delete()
+
+    _merge_tags(tag1_obj.name, tag2_obj.name)
+
+    assert set(
+        SearchIndexQueueItem.objects.filter(model='api.asset').values_list(
+            'object_id', flat=True
+        )
+    ) == {str(asset.id) for asset in assets}
@@ -0,0 +1,76 @@
+import threading
+
+from api.utils.prefix_index import PrefixIndex, VersionedIndex
+
+
+def _get_index() -> PrefixIndex:
+    return PrefixIndex(
+        [
+            (['Email Marketing'], 'email-marketing', 5),
+            (['E-Commerce'], 'e-commerce', 1),
+            (['Mailchimp', 'mailchimp'], 'mailchimp', 10),
+            (['Marketo'], 'marketo', 0),
+        ]
+    )
+
+
+def test_search_matches_the_start_of_any_word_by_popularity():
+    index = _get_index()
+    assert index.search('ma', 10) == ['mailchimp', 'email-marketing', 'marketo']
+    assert index.search('Mark', 10) == ['email-marketing', 'marketo']
+    assert index.search('email mar', 10) == ['email-marketing']
+    assert index.search('chimp', 10) == []
+
+
+def test_search_ignores_case_and_punctuation():
+    index = _get_index()
+    assert index.search('E-COM', 10) == ['e-commerce']
+    assert index.search('e com', 10) == ['e-commerce']
+    assert index.search('  ', 10) == []
+
+
+def test_search_is_limited():
+    assert _get_index().search('ma', 2) == ['mailchimp', 'email-marketing']
+
+
+def test_versioned_index_is_rebuilt_when_its_version_is_bumped():
+    builds = []
+
+    def build_index():
+        builds.append(1)
+        return len(builds)
+
+    versioned_index = VersionedIndex('test', build_index, check_interval=0, max_age=60)
+    assert versioned_index.get() == 1
+    assert versioned_index.get() == 1
+
+    versioned_index.bump_version()
+    assert versioned_index.get() == 2
+    assert versioned_index.get() == 2
+
+
+def test_versioned_index_can_be_rebuilt_in_the_background():
+    builds = []
+    can_build = threading.Event()
+
+    def build_index():
+        if builds:
+            can_build.wait(10)
+        builds.append(1)
+        return len(builds)
+
+    versioned_index = VersionedIndex('test', build_index, check_interval=0, max_age=60)
+    # The first index is always built by the caller
+    assert versioned_index.get(in_background=True) == 1
+
+    versioned_index.bump_version()
+    assert versioned_index.get(in_background=True) == 1
+    rebuild_thread = versioned_index._rebuild_thread
+    # A rebuild is running already
+    assert versioned_index.get(in_background=True) == 1
+    assert versioned_index._rebuild_thread is rebuild_thread
+
+    can_build.set()
+    rebuild_thread.join(10)
+    assert versioned_index.get(in_background=True) == 2
+    assert builds == [1, 1]
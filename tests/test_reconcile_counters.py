@@ -0,0 +1,86 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+
+from api.models import Asset, AssetReview, AssetVote, Solution, User
+from api.models.counter_shard import roll_up_counter_shards
+from api.models.solution_booking import SolutionBooking
+from api.models.solution_review import SolutionReview
+from api.utils.denormalized_counters import reconcile_counters
+
+
+def _create_users(count: int) -> list:
+    return [User.objects.create(username='user{}'.format(i)) for i in range(count)]
+
+
+def test_counters_drifted_by_bulk_writes_are_corrected(example_asset, example_solution):
+    users = _create_users(3)
+    # Written without signals, so not counted
+    AssetVote.objects.bulk_create(
+        [AssetVote(asset=example_asset, user=user) for user in users]
+    )
+    AssetReview.objects.bulk_create(
+        [
+            AssetReview(asset=example_asset, user=users[0], rating=7),
+            AssetReview(asset=example_asset, user=users[1], rating=8),
+        ]
+    )
+    Solution.objects.filter(id=example_solution.id).update(happy_count=5, sad_count=1)
+    SolutionReview.objects.create(
+        solution=example_solution, user=users[0], type=SolutionReview.Type.HAPPY
+    )
+    SolutionBooking.objects.create(
+        booked_by=users[1],
+        solution=example_solution,
+        rating=1,
+        status=SolutionBooking.Status.COMPLETED,
+    )
+
+    drift_stats = reconcile_counters(batch_size=1)
+
+    assert drift_stats['api.asset.upvotes_count'] == {
+        'rows': 1,
+        'drifted_rows': 1,
+        'total_drift': 3,
+        'max_drift': 3,
+    }
+    assert drift_stats['api.asset.avg_rating']['total_drift'] == Decimal('7.5')
+    # 5 set directly, plus the review and the booking counted by the signals
+    assert drift_stats['api.solution.happy_count']['total_drift'] == 5
+    assert drift_stats['api.solution.sad_count']['total_drift'] == 1
+    assert drift_stats['api.solution.neutral_count']['drifted_rows'] == 0
+
+    asset = Asset.objects.get(id=example_asset.id)
+    assert (asset.upvotes_count, asset.reviews_count, asset.avg_rating) == (
+        3,
+        2,
+        Decimal('7.5'),
+    )
+    solution = Solution.objects.get(id=example_solution.id)
+    assert (solution.happy_count, solution.sad_count) == (2, 0)
+    assert solution.bookings_pending_fulfillment_count == 0
+
+    assert not any(stats['drifted_rows'] for stats in reconcile_counters().values())
+
+
+def test_changes_not_rolled_up_yet_are_not_drift(example_asset):
+    AssetVote.objects.create(asset=example_asset, user=_create_users(1)[0])
+
+    assert reconcile_counters()['api.asset.upvotes_count']['drifted_rows'] == 0
+
+    roll_up_counter_shards()
+    assert Asset.objects.get(id=example_asset.id).upvotes_count == 1
+
+
+def test_reconcile_counters_command_dry_run(example_asset):
+    Asset.objects.filter(id=example_asset.id).update(reviews_count=4)
+    out = StringIO()
+
+    call_command('reconcile_counters', '--dry-run', stdout=out)
+
+    assert 'api.asset.reviews_count: 1 of 1 rows drifted' in out.getvalue()
+    assert Asset.objects.get(id=example_asset.id).reviews_count == 4
+
+    call_command('reconcile_counters', stdout=StringIO())
+    assert Asset.objects.get(id=example_asset.id).reviews_count == 0
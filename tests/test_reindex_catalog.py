@@ -0,0 +1,138 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from api.models import Asset
+
+
+class FakeElasticsearch:
+    """
+    Answers the requests of reindex_catalog as a cluster where the `asset` alias points to `existing_index` would (or
+    where `asset` is an index if `existing_index` is None).
+    """
+
+    def __init__(self, existing_index=None, failing_ids=()):
+        self.existing_index = existing_index
+        self.failing_ids = set(failing_ids)
+        self.bulk_actions = []
+        self.requests = []
+
+    def perform_request(self, method, url, headers=None, params=None, body=None):
+        self.requests.append((method, url, body))
+        if url == '/_bulk':
+            return self._bulk(body)
+        if method == 'HEAD' and url == '/_alias/asset':
+            return self.existing_index is not None
+        if method == 'HEAD' and url == '/asset':
+            return True
+        if method == 'GET' and url == '/_alias/asset':
+            return {self.existing_index: {'aliases': {'asset': {}}}}
+        return {'acknowledged': True}
+
+    def _bulk(self, body):
+        lines = [json.loads(line) for line in body.strip().split('\n')]
+        items = []
+        for action, source in zip(lines[::2], lines[1::2]):
+            meta = action['index']
+            self.bulk_actions.append((meta['_index'], str(meta['_id']), source))
+            status = 429 if str(meta['_id']) in self.failing_ids else 201
+            items.append({'index': {'_id': meta['_id'], 'status': status}})
+        return {'took': 1, 'errors': bool(self.failing_ids), 'items': items}
+
+    def get_requests(self, method):
+        return [
+            (url, body)
+            for request_method, url, body in self.requests
+            if request_method == method
+        ]
+
+
+@pytest.fixture
+def assets():
+    return [
+        Asset.objects.create(slug='mailchimp', name='Mailchimp'),
+        Asset.objects.create(slug='hubspot', name='HubSpot'),
+    ]
+
+
+def _reindex_assets(mocker, fake_elasticsearch, *args):
+    mocker.patch(
+        'elasticsearch.Transport.perform_request',
+        side_effect=fake_elasticsearch.perform_request,
+    )
+    # Rows are loaded in this thread so that they are read in the transaction of the test
+    call_command(
+        'reindex_catalog', 'asset', '--processes', '1', '--threads', '1', *args
+    )
+
+
+def test_reindex_builds_a_new_index_and_swaps_the_alias(mocker, assets):
+    fake_elasticsearch = FakeElasticsearch(existing_index='asset-20220101000000')
+
+    _reindex_assets(mocker, fake_elasticsearch)
+
+    new_index = fake_elasticsearch.bulk_actions[0][0]
+    assert new_index.startswith('asset-') and new_index != 'asset-20220101000000'
+    assert sorted(
+        (index, _id, source['name'])
+        for index, _id, source in fake_elasticsearch.bulk_actions
+    ) == sorted((new_index, str(asset.id), asset.name) for asset in assets)
+    assert fake_elasticsearch.get_requests('POST')[-1] == (
+        '/_aliases',
+        {
+            'actions': [
+                {'add': {'index': new_index, 'alias': 'asset'}},
+                {'remove': {'index': 'asset-20220101000000', 'alias': 'asset'}},
+            ]
+        },
+    )
+    assert ('/asset-20220101000000', None) in fake_elasticsearch.get_requests('DELETE')
+
+
+def test_reindex_replaces_an_index_having_the_alias_name(mocker, assets):
+    fake_elasticsearch = FakeElasticsearch(existing_index=None)
+
+    _reindex_assets(mocker, fake_elasticsearch)
+
+    new_index = fake_elasticsearch.bulk_actions[0][0]
+    assert fake_elasticsearch.get_requests('POST')[-1] == (
+        '/_aliases',
+        {
+            'actions': [
+                {'add': {'index': new_index, 'alias': 'asset'}},
+                {'remove_index': {'index': 'asset'}},
+            ]
+        },
+    )
+
+
+def test_reindex_keeps_the_current_index_if_documents_fail(mocker, assets):
+    fake_elasticsearch = FakeElasticsearch(
+        existing_index='asset-20220101000000', failing_ids=[str(assets[0].id)]
+    )
+
+    with pytest.raises(CommandError):
+        _reindex_assets(mocker, fake_elasticsearch)
+
+    new_index = fake_elasticsearch.bulk_actions[0][0]
+    assert not [
+        url for url, _ in fake_elasticsearch.get_requests('POST') if url == '/_aliases'
+    ]
+    assert fake_elasticsearch.get_requests('DELETE') == [('/' + new_index, None)]
+
+
+def test_reindex_deletes_the_new_index_if_it_cannot_be_built(mocker, assets):
+    fake_elasticsearch = FakeElasticsearch(existing_index='asset-20220101000000')
+    mocker.patch(
+        'api.documents.asset.AssetDocument.prepare',
+        side_effect=ValueError('Cannot prepare'),
+    )
+
+    with pytest.raises(ValueError):
+        _reindex_assets(mocker, fake_elasticsearch)
+
+    (new_index_url, _), *_ = fake_elasticsearch.get_requests('PUT')
+    assert new_index_url.startswith('/asset-')
+    assert fake_elasticsearch.get_requests('DELETE') == [(new_index_url, None)]
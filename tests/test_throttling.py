@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+from django.core.cache import cache
+
+from api.models import User
+from api.throttling import SlidingWindowRateThrottle, UserDailyRateThrottle
+
+DAY = 86400
+ASSETS_BASE_ENDPOINT = 'http://127.0.0.1:8000/assets/'
+
+
+def _get_throttle(limit: int, now: float) -> SlidingWindowRateThrottle:
+    throttle = SlidingWindowRateThrottle()
+    throttle.num_requests, throttle.duration = limit, DAY
+    throttle.timer = lambda: now
+    return throttle
+
+
+def _request():
+    return SimpleNamespace(user=SimpleNamespace(pk=1, is_authenticated=True), META={})
+
+
+def test_requests_over_the_limit_are_throttled_without_being_counted():
+    request = _request()
+    now = 100 * DAY
+    for _ in range(3):
+        assert _get_throttle(3, now).allow_request(request, None)
+
+    throttle = _get_throttle(3, now)
+    assert not throttle.allow_request(request, None)
+    assert throttle.current_count == 3
+    assert request.rate_limit == {'limit': 3, 'remaining': 0, 'reset': 101 * DAY}
+    # Until the end of the day, and then until a third of it slides out
+    assert round(throttle.wait()) == DAY + DAY / 3
+
+
+def test_previous_window_requests_slide_out():
+    request = _request()
+    for _ in range(4):
+        assert _get_throttle(4, 100 * DAY + DAY - 1).allow_request(request, None)
+
+    # A quarter into the next day, 3 of the previous 4 requests are still counted
+    throttle = _get_throttle(4, 101 * DAY + DAY / 4)
+    assert throttle.allow_request(request, None)
+    assert request.rate_limit['remaining'] == 0
+    assert not _get_throttle(4, 101 * DAY + DAY / 4).allow_request(request, None)
+
+    assert _get_throttle(4, 101 * DAY + DAY / 2).allow_request(request, None)
+
+
+def test_subscription_limit_is_sent_as_headers(authenticated_client, user_and_password):
+    User.objects.filter(id=user_and_password[0].id).update(api_daily_rate_limit=10)
+
+    response = authenticated_client.get(ASSETS_BASE_ENDPOINT)
+    assert response['X-RateLimit-Limit'] == '10'
+    assert response['X-RateLimit-Remaining'] == '9'
+    assert int(response['X-RateLimit-Reset']) % DAY == 0
+
+    response = authenticated_client.get(ASSETS_BASE_ENDPOINT)
+    assert response['X-RateLimit-Remaining'] == '8'
+
+
+def test_default_user_limit_uses_the_sliding_window(
+    authenticated_client, user_and_password, settings
+):
+    assert 'api.throttling.UserDailyRateThrottle' in (
+        settings.REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES']
+    )
+    assert (
+        'rest_framework.throttling.UserRateThrottle'
+        not in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES']
+    )
+
+    # Unlimited subscription, the headers are the ones of the default limit
+    User.objects.filter(id=user_and_password[0].id).update(api_daily_rate_limit=0)
+    response = authenticated_client.get(ASSETS_BASE_ENDPOINT)
+    limit = UserDailyRateThrottle().num_requests
+    assert response['X-RateLimit-Limit'] == str(limit)
+    assert response['X-RateLimit-Remaining'] == str(limit - 1)
+    # The counts of the window, not a list of request timestamps
+    current_key = '{}:{}'.format(
+        'throttle_user_{}'.format(user_and_password[0].id),
+        int(response['X-RateLimit-Reset']) // DAY - 1,
+    )
+    assert cache.get(current_key) == 1
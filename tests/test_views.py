@@ -1,4 +1,5 @@
-from api.models import Tag, Asset
+from api.models import Tag, Asset, LinkedTag
+from api.models.linked_tag import get_tag_facet_counts
 from api.views.asset import AssetViewSet
 
 
@@ -24,3 +25,42 @@ class TestAssetViewSet:
             [email_marketing_tag_slug, aws_ses_tag_slug]
         )
         assert assets.get().name == asset_makemymails.name
+
+    def test__filter_desired_tags_after_tags_change(self):
+        tags = [
+            Tag.objects.create(slug='tag-{}'.format(i), name='Tag {}'.format(i))
+            for i in range(3)
+        ]
+        asset = Asset.objects.create(slug='asset', name='Asset')
+        asset.tags.set(tags)
+        # A stale instance must not overwrite the indexed tag ids
+        asset.save()
+        assert list(
+            AssetViewSet._filter_assets_matching_tags_exact(['tag-0', 'tag-1', 'tag-2'])
+        ) == [asset]
+
+        tags[1].assets.remove(asset)
+        assert not AssetViewSet._filter_assets_matching_tags_exact(
+            ['tag-0', 'tag-1']
+        ).exists()
+
+        LinkedTag.objects.create(asset=asset, tag=tags[1])
+        assert AssetViewSet._filter_assets_matching_tags_exact(
+            ['tag-0', 'tag-1']
+        ).exists()
+
+        tags[2].delete()
+        asset.refresh_from_db()
+        assert asset.tag_ids == sorted([tags[0].id, tags[1].id])
+
+    def test_tag_facet_counts(self):
+        crm = Tag.objects.create(slug='crm', name='CRM')
+        email = Tag.objects.create(slug='email', name='Email')
+        Asset.objects.create(slug='asset-1', name='Asset 1').tags.set([crm, email])
+        Asset.objects.create(slug='asset-2', name='Asset 2').tags.set([crm])
+        Asset.objects.create(slug='asset-3', name='Asset 3').tags.set([email])
+
+        assert get_tag_facet_counts(Asset.objects.all()) == {crm.id: 2, email.id: 2}
+        assert get_tag_facet_counts(
+            AssetViewSet._filter_assets_matching_tags_exact(['crm'])
+        ) == {crm.id: 2, email.id: 1}
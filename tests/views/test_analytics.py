@@ -0,0 +1,58 @@
+from elasticsearch import Transport
+
+from api.models import Asset
+from api.models.asset import asset_clickthrough_counts_buffer
+
+
+def _get_clickthrough_url(asset: Asset) -> str:
+    return '/r/assets/{}'.format(asset.slug)
+
+
+class TestAssetClickThroughCounterRedirect:
+    def test_redirects_to_affiliate_link_or_website(
+        self, unauthenticated_client, example_asset
+    ):
+        response = unauthenticated_client.get(_get_clickthrough_url(example_asset))
+        assert response.status_code == 302
+        assert response.url == example_asset.website
+
+        example_asset.affiliate_link = 'https://mailchimp.com/?ref=taggedweb'
+        example_asset.save()
+
+        response = unauthenticated_client.get(_get_clickthrough_url(example_asset))
+        assert response.status_code == 302
+        assert response.url == example_asset.affiliate_link
+
+    def test_previous_slug_of_renamed_asset_is_not_found(
+        self, unauthenticated_client, example_asset
+    ):
+        previous_clickthrough_url = _get_clickthrough_url(example_asset)
+        assert unauthenticated_client.get(previous_clickthrough_url).status_code == 302
+
+        example_asset.slug = 'renamed-asset'
+        example_asset.save()
+
+        assert unauthenticated_client.get(previous_clickthrough_url).status_code == 404
+        response = unauthenticated_client.get(_get_clickthrough_url(example_asset))
+        assert response.url == example_asset.website
+
+    def test_unknown_slug_is_not_found(self, unauthenticated_client):
+        response = unauthenticated_client.get('/r/assets/unknown')
+        assert response.status_code == 404
+
+    def test_clicks_are_counted_without_touching_db_or_elasticsearch(
+        self, unauthenticated_client, example_asset, django_assert_num_queries
+    ):
+        clickthrough_url = _get_clickthrough_url(example_asset)
+        unauthenticated_client.get(clickthrough_url)
+        Transport.perform_request.reset_mock()
+
+        with django_assert_num_queries(0):
+            for _ in range(3):
+                unauthenticated_client.get(clickthrough_url)
+        assert not Transport.perform_request.called
+
+        asset_clickthrough_counts_buffer.flush()
+        assert not Transport.perform_request.called
+        example_asset.refresh_from_db()
+        assert example_asset.tweb_url_clickthrogh_counter == 4
@@ -1,10 +1,17 @@
 from rest_framework import status
 
-from api.models import Asset, Tag
+from api.models import Asset, AssetVote, Tag, AssetAttributeVote, UserAssetUsage
 import pytest
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django_elasticsearch_dsl.search import Search
+from elasticsearch_dsl.response import Response
 
+from api.documents.asset import AssetDocument
 from api.models.asset_snapshot import AssetSnapshot
+from api.models.similar_asset import process_similar_assets_queue
+from api.models.tag import tag_search_counts_buffer
 
 from api.views.asset import AssetViewSet
 from tests.common import login_client
@@ -21,6 +28,38 @@ def patch_elasticsearch(mocker):
     )
 
 
+def patch_elasticsearch_search_hits(mocker, assets: list, with_source=False) -> list:
+    """
+    Makes Elasticsearch return the given assets as search hits (in the given relevance order), honouring from/size.
+    With with_source the hits carry the asset documents as prepared for the asset index.
+    Returns the list the executed search request bodies are appended to.
+    """
+    executed_search_bodies = []
+    sources = (
+        [AssetDocument().prepare(asset) for asset in assets] if with_source else []
+    )
+
+    def _execute(es_search, ignore_cache=False):
+        body = es_search.to_dict()
+        executed_search_bodies.append(body)
+        start = body.get('from', 0)
+        end = start + body.get('size', len(assets))
+        hits = [
+            {'_index': 'asset', '_id': str(asset.id), '_score': 1.0}
+            for asset in assets[start:end]
+        ]
+        for hit, source in zip(hits, sources[start:end]):
+            hit['_source'] = source
+        return Response(
+            es_search,
+            {'hits': {'total': {'value': len(assets), 'relation': 'eq'}, 'hits': hits}},
+        )
+
+    mocker.patch.object(Search, 'execute', autospec=True, side_effect=_execute)
+    mocker.patch.object(Search, 'count', autospec=True, return_value=len(assets))
+    return executed_search_bodies
+
+
 def _create_asset(client: Client):
     asset_slug = 'test_slug'
     asset_name = 'test_asset'
@@ -215,19 +254,20 @@ class TestUnpublishedAsset:
             )
 
 
-class AssetTagSearchCounter:
+class TestAssetTagSearchCounter:
     """
     To test the tag search counter. We store how many times each tag is used to perform a search whenever the
-    assets endpoint is hit.
+    assets endpoint is hit. The counts are buffered in memory and written to the db in batches.
     """
 
     def test_update_counter_of_tag_used_for_filtering_assets(
-        self, authenticated_client
+        self, authenticated_client, mocker
     ):
         def assert_counter(expected_count):
             assert Tag.objects.get(slug='tag-1').counter == expected_count
             assert Tag.objects.get(slug='tag-2').counter == expected_count
 
+        patch_elasticsearch(mocker)
         asset_query = '{}?q=tag-1%20tag-2'.format(ASSETS_BASE_ENDPOINT)
         Tag.objects.create(
             slug='tag-1',
@@ -242,7 +282,29 @@ class AssetTagSearchCounter:
 
         response = authenticated_client.get(asset_query)
         assert response.status_code == 200
-        assert_counter(1)
+        response = authenticated_client.get(asset_query)
+        assert response.status_code == 200
+        # Nothing is written while searching
+        assert_counter(0)
+
+        tag_search_counts_buffer.flush()
+        assert_counter(2)
+
+    def test_buffered_counts_are_flushed_in_a_single_query(
+        self, authenticated_client, mocker, django_assert_num_queries
+    ):
+        patch_elasticsearch(mocker)
+        Tag.objects.create(slug='tag-1', name='tag 1')
+        Tag.objects.create(slug='tag-2', name='tag 2')
+
+        authenticated_client.get('{}?q=tag-1%20tag-1'.format(ASSETS_BASE_ENDPOINT))
+        authenticated_client.get('{}?q=tag-1%20tag-2'.format(ASSETS_BASE_ENDPOINT))
+
+        with django_assert_num_queries(1):
+            tag_search_counts_buffer.flush()
+
+        assert Tag.objects.get(slug='tag-1').counter == 2
+        assert Tag.objects.get(slug='tag-2').counter == 1
 
     @pytest.mark.parametrize(
         "tag_slug, tag_name, query,",
@@ -251,6 +313,7 @@ class AssetTagSearchCounter:
     def test_update_counter_of_tag_when_exactly_matched_with_searched_tag(
         self,
         authenticated_client,
+        mocker,
         tag_slug,
         tag_name,
         query,
@@ -259,6 +322,7 @@ class AssetTagSearchCounter:
         # which matches exactly with the searched tags. For example: if user searches 'database', then the counter
         # of a tag 'data' should not be incremented
         # Further, counter of those tags should also not increment whose name matches with the searched keyword
+        patch_elasticsearch(mocker)
         asset_query = '{}?q={}'.format(ASSETS_BASE_ENDPOINT, query)
         Tag.objects.create(
             slug=tag_slug,
@@ -268,6 +332,7 @@ class AssetTagSearchCounter:
 
         response = authenticated_client.get(asset_query)
         assert response.status_code == 200
+        tag_search_counts_buffer.flush()
 
         assert Tag.objects.get(slug=tag_slug).counter == 0
 
@@ -281,8 +346,8 @@ class TestAssetViewSetSimilarServices:
         self,
         authenticated_client,
         example_asset,
+        example_asset_tag,
         include_self,
-        mocker,
     ):
         similar_asset = Asset.objects.create(
             name='Simiar to Example Asset',
@@ -292,12 +357,7 @@ class TestAssetViewSetSimilarServices:
         )
         similar_asset.tags.set(example_asset.tags.all())
         similar_asset.save()
-
-        mocker.patch.object(
-            AssetViewSet,
-            '_get_assets_db_qs_via_elasticsearch_query',
-            return_value=Asset.objects.all(),
-        )
+        process_similar_assets_queue()
 
         asset_query = '{}similar/?slug={}&include_self={}'.format(
             ASSETS_BASE_ENDPOINT, example_asset.slug, include_self
@@ -316,7 +376,7 @@ class TestAssetViewSetSimilarServices:
 
     @pytest.mark.parametrize('ordering', ['avg_rating', '-avg_rating'])
     def test_ascending_and_descending_sorting_by_avg_rating(
-        self, authenticated_client, example_asset, ordering, mocker
+        self, authenticated_client, example_asset, example_asset_tag, ordering
     ):
         # Create 2 similar assets similar to example_asset
         similar_assets = []
@@ -333,12 +393,7 @@ class TestAssetViewSetSimilarServices:
             similar_asset.tags.set(example_asset.tags.all())
             similar_asset.save()
             similar_assets.append(similar_asset)
-
-        mocker.patch.object(
-            AssetViewSet,
-            '_get_assets_db_qs_via_elasticsearch_query',
-            return_value=Asset.objects.all(),
-        )
+        process_similar_assets_queue()
 
         asset_query = '{}similar/?slug={}&include_self=1&ordering={}'.format(
             ASSETS_BASE_ENDPOINT,
@@ -362,6 +417,315 @@ class TestAssetViewSetSimilarServices:
 
         assert len(results) == 3
 
+    def test_similar_services_are_ordered_by_similarity(
+        self, unauthenticated_client, example_asset
+    ):
+        common_tag = Tag.objects.create(slug='common', name='Common')
+        rare_tag = Tag.objects.create(slug='rare', name='Rare')
+        example_asset.tags.add(common_tag, rare_tag)
+        sharing_common_tag = Asset.objects.create(
+            slug='sharing-common-tag', name='Sharing Common Tag', description='test'
+        )
+        sharing_common_tag.tags.add(common_tag)
+        sharing_rare_tag = Asset.objects.create(
+            slug='sharing-rare-tag', name='Sharing Rare Tag', description='test'
+        )
+        sharing_rare_tag.tags.add(rare_tag)
+        for i in range(3):
+            Asset.objects.create(
+                slug='other-{}'.format(i), name='Other {}'.format(i), description='test'
+            ).tags.add(common_tag)
+        process_similar_assets_queue()
+
+        response = unauthenticated_client.get(
+            '{}similar/?slug={}'.format(ASSETS_BASE_ENDPOINT, example_asset.slug)
+        )
+
+        assert response.status_code == 200
+        result_slugs = [result['slug'] for result in response.data['results']]
+        assert result_slugs[:2] == [example_asset.slug, sharing_rare_tag.slug]
+        assert len(result_slugs) == 6
+
+
+class TestAssetSearchPagination:
+    @staticmethod
+    def _create_published_assets(count: int) -> list:
+        return [
+            Asset.objects.create(
+                name='Search Asset {}'.format(i),
+                slug='search-asset-{}'.format(i),
+                short_description='test',
+                description='test',
+                is_published=True,
+                avg_rating=i,
+            )
+            for i in range(count)
+        ]
+
+    def test_only_the_requested_page_is_fetched_from_elasticsearch_in_relevance_order(
+        self, unauthenticated_client, mocker
+    ):
+        assets = self._create_published_assets(4)
+        relevance_ordered_assets = [assets[2], assets[0], assets[3], assets[1]]
+        executed_search_bodies = patch_elasticsearch_search_hits(
+            mocker, relevance_ordered_assets
+        )
+
+        response = unauthenticated_client.get(
+            '{}?q=test&limit=2&offset=1'.format(ASSETS_BASE_ENDPOINT)
+        )
+
+        assert response.status_code == 200
+        assert response.data['count'] == 4
+        assert [asset['id'] for asset in response.data['results']] == [
+            assets[0].id,
+            assets[3].id,
+        ]
+
+        # The page and the count are fetched with a single request, and is_published is filtered by Elasticsearch
+        assert len(executed_search_bodies) == 1
+        search_body = executed_search_bodies[0]
+        assert search_body['from'] == 1
+        assert search_body['size'] == 2
+        assert search_body['track_total_hits'] is True
+        assert {'term': {'is_published': True}} in search_body['query']['bool'][
+            'filter'
+        ]
+        Search.count.assert_not_called()
+
+    def test_filters_are_applied_by_elasticsearch(self, unauthenticated_client, mocker):
+        assets = self._create_published_assets(2)
+        executed_search_bodies = patch_elasticsearch_search_hits(mocker, assets)
+
+        response = unauthenticated_client.get(
+            '{}?q=test&has_free_trial=true&avg_rating__gte=1'.format(
+                ASSETS_BASE_ENDPOINT
+            )
+        )
+
+        assert response.status_code == 200
+        assert len(executed_search_bodies) == 1
+        search_filters = executed_search_bodies[0]['query']['bool']['filter']
+        assert {'term': {'has_free_trial': True}} in search_filters
+        assert {'range': {'avg_rating': {'gte': 1}}} in search_filters
+        Search.count.assert_not_called()
+
+    def test_ordering_falls_back_to_ordering_all_search_hits_in_the_db(
+        self, unauthenticated_client, mocker
+    ):
+        assets = self._create_published_assets(3)
+        patch_elasticsearch_search_hits(mocker, [assets[1], assets[2], assets[0]])
+
+        response = unauthenticated_client.get(
+            '{}?q=test&ordering=-avg_rating'.format(ASSETS_BASE_ENDPOINT)
+        )
+
+        assert response.status_code == 200
+        assert response.data['count'] == 3
+        assert [asset['id'] for asset in response.data['results']] == [
+            assets[2].id,
+            assets[1].id,
+            assets[0].id,
+        ]
+
+
+class TestAssetSearchListFromIndex:
+    @pytest.mark.parametrize(
+        "client",
+        [
+            pytest.lazy_fixture("unauthenticated_client"),
+            pytest.lazy_fixture("authenticated_client"),
+        ],
+    )
+    def test_list_from_index_matches_list_from_db(
+        self,
+        client,
+        settings,
+        mocker,
+        user_and_password,
+        example_asset,
+        example_asset_tag,
+        example_asset_attribute,
+        example_asset_question,
+        example_asset_2,
+    ):
+        user = user_and_password[0]
+        example_asset.votes.create(user=user)
+        UserAssetUsage.objects.create(user=user, asset=example_asset)
+        AssetAttributeVote.objects.create(
+            user=user, asset=example_asset, attribute=example_asset_attribute
+        )
+        Asset.objects.filter(id=example_asset_2.id).update(submitted_by=user)
+        assets = list(
+            Asset.objects.filter(id__in=[example_asset.id, example_asset_2.id])
+        )
+        patch_elasticsearch_search_hits(mocker, assets, with_source=True)
+
+        asset_list_url = '{}?q=test'.format(ASSETS_BASE_ENDPOINT)
+        settings.ASSET_SEARCH_LIST_FROM_INDEX = False
+        response_from_db = client.get(asset_list_url)
+        settings.ASSET_SEARCH_LIST_FROM_INDEX = True
+        response_from_index = client.get(asset_list_url)
+
+        assert response_from_index.status_code == 200
+        assert response_from_index.json()['count'] == 2
+        assert response_from_index.json() == response_from_db.json()
+
+    def test_anonymous_list_from_index_does_not_query_assets_from_db(
+        self,
+        unauthenticated_client,
+        settings,
+        mocker,
+        example_asset,
+        example_asset_tag,
+        django_assert_num_queries,
+    ):
+        settings.ASSET_SEARCH_LIST_FROM_INDEX = True
+        patch_elasticsearch_search_hits(mocker, [example_asset], with_source=True)
+
+        # The tag search counter update is buffered, so nothing at all hits the db
+        with django_assert_num_queries(0):
+            response = unauthenticated_client.get(
+                '{}?q=test'.format(ASSETS_BASE_ENDPOINT)
+            )
+
+        assert response.status_code == 200
+        assert response.data['results'][0]['slug'] == example_asset.slug
+        assert response.data['results'][0]['tags'][0]['slug'] == example_asset_tag.slug
+
+
+def _create_asset_with_nested_relations(slug: str, user, solution) -> Asset:
+    asset = Asset.objects.create(slug=slug, name=slug, is_published=True)
+    asset.tags.create(name='{} tag'.format(slug), slug='{}-tag'.format(slug))
+    asset.customer_organizations.create(name='{} customer'.format(slug))
+    asset.solutions.add(solution)
+    asset.questions.create(title='{} question'.format(slug))
+    asset.snapshots.create(url='https://{}.com/snapshot.png'.format(slug))
+    asset.price_plans.create(name='{} plan'.format(slug), price='10')
+    attribute = asset.attributes.create(name='{} attribute'.format(slug))
+    AssetAttributeVote.objects.create(
+        asset=asset, attribute=attribute, user=user, is_upvote=True
+    )
+    UserAssetUsage.objects.create(user=user, asset=asset)
+    return asset
+
+
+class TestAssetSerializerQueryCount:
+    """
+    Serializing assets must cost a fixed number of queries, however many assets are serialized.
+    """
+
+    @staticmethod
+    def _count_queries(client, url) -> int:
+        with CaptureQueriesContext(connection) as captured_queries:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(captured_queries)
+
+    def test_search_list_queries_do_not_grow_with_page_size(
+        self, unauthenticated_client, mocker, user_and_password, example_solution
+    ):
+        user, _ = user_and_password
+        assets = [
+            _create_asset_with_nested_relations(
+                'asset-{}'.format(i), user, example_solution
+            )
+            for i in range(3)
+        ]
+
+        patch_elasticsearch_search_hits(mocker, assets)
+        queries_for_one = self._count_queries(
+            unauthenticated_client, '{}?q=test&limit=1'.format(ASSETS_BASE_ENDPOINT)
+        )
+        queries_for_three = self._count_queries(
+            unauthenticated_client, '{}?q=test&limit=3'.format(ASSETS_BASE_ENDPOINT)
+        )
+
+        assert queries_for_one == queries_for_three
+
+    def test_logged_in_search_list_queries_do_not_grow_with_page_size(
+        self, authenticated_client, mocker, user_and_password, example_solution
+    ):
+        user, _ = user_and_password
+        assets = [
+            _create_asset_with_nested_relations(
+                'asset-{}'.format(i), user, example_solution
+            )
+            for i in range(3)
+        ]
+        for asset in assets:
+            AssetVote.objects.create(asset=asset, user=user, is_upvote=True)
+
+        patch_elasticsearch_search_hits(mocker, assets)
+        queries_for_one = self._count_queries(
+            authenticated_client, '{}?q=test&limit=1'.format(ASSETS_BASE_ENDPOINT)
+        )
+        response = authenticated_client.get(
+            '{}?q=test&limit=3'.format(ASSETS_BASE_ENDPOINT)
+        )
+        queries_for_three = self._count_queries(
+            authenticated_client, '{}?q=test&limit=3'.format(ASSETS_BASE_ENDPOINT)
+        )
+
+        assert queries_for_one == queries_for_three
+        for asset, asset_data in zip(assets, response.data['results']):
+            assert asset_data['used_by_me'] is True
+            assert asset_data['my_asset_vote'] == AssetVote.objects.get(asset=asset).id
+
+    def test_search_list_attribute_votes(
+        self, authenticated_client, mocker, user_and_password, example_solution
+    ):
+        user, _ = user_and_password
+        assets = [
+            _create_asset_with_nested_relations(
+                'asset-{}'.format(i), user, example_solution
+            )
+            for i in range(2)
+        ]
+        patch_elasticsearch_search_hits(mocker, assets)
+
+        response = authenticated_client.get('{}?q=test'.format(ASSETS_BASE_ENDPOINT))
+
+        assert response.status_code == 200
+        for asset, asset_data in zip(assets, response.data['results']):
+            attribute_vote = AssetAttributeVote.objects.get(asset=asset)
+            assert asset_data['attributes'][0]['upvotes_count'] == 1
+            assert (
+                asset_data['attributes'][0]['my_asset_attribute_vote']
+                == attribute_vote.id
+            )
+
+    def test_compare_queries_do_not_grow_with_number_of_assets(
+        self, unauthenticated_client, user_and_password, example_solution
+    ):
+        user, _ = user_and_password
+        for i in range(3):
+            _create_asset_with_nested_relations(
+                'asset-{}'.format(i), user, example_solution
+            )
+        compare_url = '{}compare/?asset__slugs=asset-0&asset__slugs=asset-1'.format(
+            ASSETS_BASE_ENDPOINT
+        )
+
+        queries_for_two = self._count_queries(unauthenticated_client, compare_url)
+        queries_for_three = self._count_queries(
+            unauthenticated_client, compare_url + '&asset__slugs=asset-2'
+        )
+
+        assert queries_for_two == queries_for_three
+
+    def test_users_count_is_annotated(
+        self, unauthenticated_client, user_and_password, example_solution
+    ):
+        user, _ = user_and_password
+        _create_asset_with_nested_relations('asset-0', user, example_solution)
+
+        response = unauthenticated_client.get('{}asset-0/'.format(ASSETS_BASE_ENDPOINT))
+
+        assert response.status_code == 200
+        assert response.data['users_count'] == 1
+        assert response.data['solutions'][0]['slug'] == example_solution.slug
+
 
 class TestAssetCreateUpdateWithOneManyFieldSnapshots:
     def test_create_asset_with_new_snapshots(
@@ -1275,3 +1639,17 @@ class TestPatchTagsToAsset:
         assert response.data['tags'][0]['name'] == example_asset_tag.name
         assert response.data['tags'][0]['slug'] == example_asset_tag.slug
         assert response.data['tags'][0]['description'] == example_asset_tag.description
+
+
+def test_asset_upvotes_count_is_exact_when_requested(
+    unauthenticated_client, example_asset, user_and_password
+):
+    AssetVote.objects.create(asset=example_asset, user=user_and_password[0])
+    asset_url = '{}{}/'.format(ASSETS_BASE_ENDPOINT, example_asset.slug)
+
+    # The vote isn't rolled up yet
+    response = unauthenticated_client.get(asset_url)
+    assert response.data['upvotes_count'] == 0
+
+    response = unauthenticated_client.get(asset_url + '?exact_counts=true')
+    assert response.data['upvotes_count'] == 1
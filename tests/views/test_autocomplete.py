@@ -1,12 +1,31 @@
+import json
+
+from django.core.cache import cache
+from elasticsearch import Transport
 from rest_framework import status
 
 from api.models import Asset, Tag, Organization, Solution, SolutionQuestion
 import pytest
 from api.documents.tag import TagDocument
 from api.documents.asset import AssetDocument
+from api.documents.organization import OrganizationDocument
+from api.documents.solution import SolutionDocument
+from api.documents.solution_question import SolutionQuestionDocument
 
-from api.views import solution_questions
 from api.views import tag, organization
+from api.utils.autocomplete_index import autocomplete_index, get_autocomplete_index
+from api.views.solutions import SolutionViewSet
+
+
+def _get_search_response(index: str, suggestions: list) -> dict:
+    return {
+        'hits': {
+            'hits': [
+                {'_index': index, '_id': str(i), '_source': {'suggestion': suggestion}}
+                for i, suggestion in enumerate(suggestions)
+            ]
+        }
+    }
 
 
 class TestTestAutocomplete:
@@ -17,7 +36,9 @@ class TestTestAutocomplete:
         mocker,
         example_asset_tag,
         example_asset_tag2,
+        settings,
     ):
+        settings.AUTOCOMPLETE_FROM_PREFIX_INDEX = False
         mocker.patch.object(
             tag,
             '_es_search_asset_and_tag',
@@ -35,33 +56,253 @@ class TestTestAutocomplete:
         assert response.json()['assets'][0] == example_asset.name
         assert response.json()['asset_slugs'][0] == example_asset.slug
 
-    def test_autocomplete_organization(
-        self, example_organization, mocker, authenticated_client
+    def test_asset_and_tag_autocomplete_is_a_single_multi_search(
+        self, authenticated_client
     ):
-        mocker.patch.object(
-            organization,
-            '_es_search_organizations',
-            return_value=Organization.objects.all(),
+        # Nothing matches q in the prefix index (the db is empty) so Elasticsearch is searched
+        Transport.perform_request.reset_mock()
+        Transport.perform_request.return_value = {
+            'responses': [
+                {
+                    'hits': {
+                        'hits': [
+                            {'_index': 'tag', '_id': '1', '_source': {'slug': 'email'}}
+                        ]
+                    }
+                },
+                {
+                    'hits': {
+                        'hits': [
+                            {
+                                '_index': 'asset',
+                                '_id': '1',
+                                '_source': {'name': 'Mailchimp', 'slug': 'mailchimp'},
+                            }
+                        ]
+                    }
+                },
+            ]
+        }
+
+        response = authenticated_client.get(
+            'http://localhost:8000/autocomplete-tags-and-assets/?q=mail'
         )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            'tags': ['email'],
+            'assets': ['Mailchimp'],
+            'asset_slugs': ['mailchimp'],
+        }
+        assert Transport.perform_request.call_count == 1
+        method, url = Transport.perform_request.call_args.args[:2]
+        assert (method, url) == ('POST', '/_msearch')
+        tag_header, tag_body, asset_header, asset_body = [
+            json.loads(line)
+            for line in Transport.perform_request.call_args.kwargs['body'].splitlines()
+        ]
+        assert tag_header['index'] == ['tag']
+        assert asset_header['index'] == ['asset']
+        assert tag_body['size'] == 10
+        assert tag_body['_source'] == ['slug']
+        assert asset_body['size'] == 10
+        assert asset_body['_source'] == ['name', 'slug']
+
+    def test_asset_and_tag_autocomplete_from_prefix_index(
+        self,
+        authenticated_client,
+        example_asset,
+        example_asset_tag,
+        example_asset_tag2,
+    ):
+        Transport.perform_request.reset_mock()
+
         response = authenticated_client.get(
-            'http://localhost:8000/autocomplete-organizations/?q=primer'
+            'http://localhost:8000/autocomplete-tags-and-assets/?q=test'
         )
+
         assert response.status_code == status.HTTP_200_OK
-        response_organization = response.json()['results'][0]
-        assert response_organization['name'] == example_organization.name
-        assert response_organization['website'] == example_organization.website
+        assert response.json() == {
+            'tags': [example_asset_tag.slug, example_asset_tag2.slug],
+            'assets': [],
+            'asset_slugs': [],
+        }
+        response = authenticated_client.get(
+            'http://localhost:8000/autocomplete-tags-and-assets/?q=mail'
+        )
+        assert response.json() == {
+            'tags': [],
+            'assets': [example_asset.name],
+            'asset_slugs': [example_asset.slug],
+        }
+        assert not Transport.perform_request.called
 
-    def test_autocomplete_solution_questions(
-        self, mocker, authenticated_client, example_solution_question
+    def test_prefix_index_is_updated_on_writes(
+        self, authenticated_client, example_asset_tag
+    ):
+        response = authenticated_client.get(
+            'http://localhost:8000/autocomplete-tags/?q=test'
+        )
+        assert [tag['slug'] for tag in response.json()['results']] == [
+            example_asset_tag.slug
+        ]
+
+        example_asset_tag.name = 'Renamed Tag'
+        example_asset_tag.save()
+        Tag.objects.create(name='Test Other', slug='test-other', counter=3)
+
+        # Every few seconds the version of the index is checked, not being rebuilt yet it still has the old names
+        response = authenticated_client.get(
+            'http://localhost:8000/autocomplete-tags/?q=rename'
+        )
+        assert response.json()['results'] == []
+
+        autocomplete_index._checked_at = 0
+        response = authenticated_client.get(
+            'http://localhost:8000/autocomplete-tags/?q=test'
+        )
+        assert [tag['slug'] for tag in response.json()['results']] == ['test-other']
+        response = authenticated_client.get(
+            'http://localhost:8000/autocomplete-tags/?q=rename'
+        )
+        assert [tag['slug'] for tag in response.json()['results']] == [
+            example_asset_tag.slug
+        ]
+
+    def test_prefix_index_is_only_invalidated_by_writes_to_indexed_fields(
+        self, example_asset_tag, example_asset, example_organization
+    ):
+        def get_version():
+            return cache.get(autocomplete_index._version_cache_key)
+
+        version = get_version()
+        example_asset_tag.is_homepage_featured = True
+        example_asset_tag.save()
+        example_asset.is_published = not example_asset.is_published
+        example_asset.save()
+        example_organization.save()
+        Tag.objects.get(id=example_asset_tag.id).save(update_fields=['counter'])
+        assert get_version() == version
+
+        example_asset.upvotes_count += 1
+        example_asset.save(update_fields=['upvotes_count'])
+        assert get_version() != version
+
+        version = get_version()
+        example_organization.logo_url = 'https://example.com/logo.png'
+        example_organization.save()
+        assert get_version() != version
+
+        version = get_version()
+        Tag.objects.create(name='Test Other', slug='test-other')
+        assert get_version() != version
+
+    def test_autocomplete_organization_from_prefix_index(
+        self, example_organization, authenticated_client
+    ):
+        response = authenticated_client.get(
+            'http://localhost:8000/autocomplete-organizations/?q=prim'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['results'][0]['name'] == example_organization.name
+
+    def test_autocomplete_organization(
+        self,
+        example_organization,
+        authenticated_client,
+        settings,
+        django_assert_num_queries,
+    ):
+        settings.AUTOCOMPLETE_FROM_PREFIX_INDEX = False
+        suggestion = OrganizationDocument().prepare(example_organization)['suggestion']
+        Transport.perform_request.return_value = _get_search_response(
+            'organization', [suggestion, suggestion]
+        )
+
+        with django_assert_num_queries(0):
+            response = authenticated_client.get(
+                'http://localhost:8000/autocomplete-organizations/?q=primer'
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['results'] == [
+            {
+                'name': example_organization.name,
+                'website': example_organization.website,
+                'logo_url': example_organization.logo_url,
+            }
+        ]
+
+    def test_autocomplete_tags_from_prefix_index_without_db_queries(
+        self, authenticated_client, example_asset_tag, django_assert_num_queries
+    ):
+        get_autocomplete_index()
+
+        with django_assert_num_queries(0):
+            response = authenticated_client.get(
+                'http://localhost:8000/autocomplete-tags/?q=test'
+            )
+
+        assert response.json()['results'] == [
+            {
+                'slug': example_asset_tag.slug,
+                'name': example_asset_tag.name,
+                'description': example_asset_tag.description,
+            }
+        ]
+
+    def test_autocomplete_solutions_returns_suggestions_from_the_index(
+        self, authenticated_client, example_solution, django_assert_num_queries
+    ):
+        suggestion = SolutionDocument().prepare(example_solution)['suggestion']
+        Transport.perform_request.reset_mock()
+        Transport.perform_request.return_value = _get_search_response(
+            'solution', [suggestion]
+        )
+
+        with django_assert_num_queries(0):
+            response = authenticated_client.get(
+                'http://localhost:8000/autocomplete-solutions/?q=test'
+            )
+
+        assert response.json()['results'] == [
+            {
+                'id': example_solution.id,
+                'slug': example_solution.slug,
+                'title': example_solution.title,
+                'type': example_solution.type,
+            }
+        ]
+        search_body = Transport.perform_request.call_args.kwargs['body']
+        assert search_body['_source'] == ['suggestion']
+        assert search_body['size'] == 10
+
+    def test_autocomplete_solutions_expanded(
+        self, mocker, authenticated_client, example_solution
     ):
         mocker.patch.object(
-            solution_questions,
-            '_get_solution_questions_db_qs_via_elasticsearch_query',
-            return_value=SolutionQuestion.objects.all(),
+            SolutionViewSet,
+            '_get_solutions_db_qs_via_elasticsearch_query',
+            return_value=Solution.objects.all(),
         )
+
         response = authenticated_client.get(
-            'http://localhost:8000/autocomplete-solution-questions/?q=test&solution__slug=test-solution'
+            'http://localhost:8000/autocomplete-solutions/?q=test&expand=true'
         )
+
+        result = response.json()['results'][0]
+        assert result['slug'] == example_solution.slug
+        assert result['scope_of_work'] == example_solution.scope_of_work
+
+    def test_autocomplete_solution_questions(
+        self,
+        authenticated_client,
+        example_solution_question,
+        django_assert_num_queries,
+    ):
+        Transport.perform_request.reset_mock()
+        url = 'http://localhost:8000/autocomplete-solution-questions/?q=test&solution__slug=test-solution'
+        response = authenticated_client.get(url)
         assert response.status_code == status.HTTP_200_OK
         assert (
             response.json()['results'][0]['solution']
@@ -69,5 +310,59 @@ class TestTestAutocomplete:
         )
         assert response.json()['results'][0]['title'] == 'test solution question'
 
+        # The few questions of the solution are cached and autocompleted from memory
+        with django_assert_num_queries(0):
+            response = authenticated_client.get(
+                'http://localhost:8000/autocomplete-solution-questions/?q=quest&solution__slug=test-solution'
+            )
+        assert [result['id'] for result in response.json()['results']] == [
+            example_solution_question.id
+        ]
+        assert not Transport.perform_request.called
+
+        example_solution_question.solution.questions.create(title='Another one')
+        response = authenticated_client.get(
+            'http://localhost:8000/autocomplete-solution-questions/?q=&solution__slug=test-solution'
+        )
+        assert len(response.json()['results']) == 2
+
+    def test_autocomplete_solution_questions_of_renamed_solution(
+        self, authenticated_client, example_solution_question
+    ):
+        url = 'http://localhost:8000/autocomplete-solution-questions/?q=&solution__slug={}'
+        response = authenticated_client.get(url.format('test-solution'))
+        assert len(response.json()['results']) == 1
+
+        solution = example_solution_question.solution
+        solution.slug = 'renamed-solution'
+        solution.save()
+
+        response = authenticated_client.get(url.format('test-solution'))
+        assert response.json()['results'] == []
+        response = authenticated_client.get(url.format('renamed-solution'))
+        assert len(response.json()['results']) == 1
+
+    def test_autocomplete_solution_questions_of_solutions_with_many_questions(
+        self, authenticated_client, example_solution_question, settings
+    ):
+        settings.SOLUTION_QUESTIONS_CACHE_MAX_COUNT = 0
+        suggestion = SolutionQuestionDocument().prepare(example_solution_question)[
+            'suggestion'
+        ]
+        Transport.perform_request.reset_mock()
+        Transport.perform_request.return_value = _get_search_response(
+            'solution_question', [suggestion]
+        )
+
+        response = authenticated_client.get(
+            'http://localhost:8000/autocomplete-solution-questions/?q=test&solution__slug=test-solution'
+        )
+
+        assert response.json()['results'][0]['id'] == example_solution_question.id
+        search_body = Transport.perform_request.call_args.kwargs['body']
+        assert search_body['query']['bool']['filter'] == [
+            {'term': {'solution_slug': 'test-solution'}}
+        ]
+
 
 #
@@ -0,0 +1,114 @@
+import pytest
+
+from api.models import Asset, Tag
+
+ASSETS_BASE_ENDPOINT = 'http://127.0.0.1:8000/assets/'
+
+
+@pytest.fixture
+def email_assets():
+    email_tag = Tag.objects.create(slug='email-marketing', name='Email Marketing')
+    assets = [
+        Asset.objects.create(
+            slug='acme',
+            name='Acme',
+            description='<p>The best <b>email</b> marketing tool</p>',
+            is_published=True,
+        ),
+        Asset.objects.create(
+            slug='email-blaster',
+            name='Email Blaster',
+            short_description='Newsletters',
+            is_published=True,
+        ),
+        Asset.objects.create(
+            slug='mailer',
+            name='Mailer',
+            description='Email campaigns',
+            is_published=False,
+        ),
+        Asset.objects.create(
+            slug='ledger',
+            name='Ledger',
+            description='Accounting',
+            is_published=True,
+        ),
+    ]
+    assets[0].tags.add(email_tag)
+    return assets
+
+
+def _search_asset_slugs(client, query: str) -> list:
+    response = client.get('{}?q={}'.format(ASSETS_BASE_ENDPOINT, query))
+    assert response.status_code == 200
+    return [asset['slug'] for asset in response.data['results']]
+
+
+def test_asset_search_returns_published_matches_by_relevance(
+    unauthenticated_client, local_search_backend, email_assets
+):
+    assert _search_asset_slugs(unauthenticated_client, 'email') == [
+        'email-blaster',
+        'acme',
+    ]
+    # Up to 3 terms, they are all required
+    assert _search_asset_slugs(unauthenticated_client, 'email marketing') == ['acme']
+    assert _search_asset_slugs(unauthenticated_client, 'email accounting') == []
+
+
+def test_asset_search_sees_writes(
+    unauthenticated_client, local_search_backend, email_assets
+):
+    assert _search_asset_slugs(unauthenticated_client, 'ledger') == ['ledger']
+
+    email_assets[3].name = 'Bookkeeper'
+    email_assets[3].save()
+
+    assert _search_asset_slugs(unauthenticated_client, 'ledger') == []
+    assert _search_asset_slugs(unauthenticated_client, 'bookkeeper') == ['ledger']
+
+
+def test_tag_autocomplete(
+    unauthenticated_client, local_search_backend, email_assets, settings
+):
+    settings.AUTOCOMPLETE_FROM_PREFIX_INDEX = False
+    Tag.objects.create(slug='marketing-email', name='Marketing Email')
+
+    response = unauthenticated_client.get(
+        'http://127.0.0.1:8000/autocomplete-tags/?q=email mar'
+    )
+
+    assert response.status_code == 200
+    assert [tag['slug'] for tag in response.json()['results']] == ['email-marketing']
+
+
+def test_asset_search_facets(
+    unauthenticated_client, local_search_backend, email_assets
+):
+    Asset.objects.filter(slug='acme').update(has_free_trial=True, avg_rating=9)
+    email_assets[0].price_plans.create(name='Free')
+
+    response = unauthenticated_client.get(
+        '{}?q=email&facets=true'.format(ASSETS_BASE_ENDPOINT)
+    )
+
+    assert response.status_code == 200
+    assert response.data['facets'] == {
+        'tags': [{'slug': 'email-marketing', 'count': 1}],
+        'has_free_trial': {'true': 1, 'false': 1},
+        'avg_rating': [
+            {'from': None, 'to': 2.0, 'count': 1},
+            {'from': 2.0, 'to': 4.0, 'count': 0},
+            {'from': 4.0, 'to': 6.0, 'count': 0},
+            {'from': 6.0, 'to': 8.0, 'count': 0},
+            {'from': 8.0, 'to': None, 'count': 1},
+        ],
+        'has_price_plans': {'true': 1, 'false': 1},
+    }
+
+    # Filtered by the search
+    response = unauthenticated_client.get(
+        '{}?q=email&facets=true&has_free_trial=true'.format(ASSETS_BASE_ENDPOINT)
+    )
+    assert [asset['slug'] for asset in response.data['results']] == ['acme']
+    assert response.data['facets']['has_free_trial'] == {'true': 1, 'false': 0}
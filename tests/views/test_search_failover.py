@@ -0,0 +1,157 @@
+import pytest
+from django.core.cache import cache
+from djstripe.models import Product
+from elasticsearch.exceptions import ConnectionTimeout
+
+from api.models import Asset, Solution, Tag
+from api.utils.search_failover import (
+    ELASTICSEARCH_UNAVAILABLE_CACHE_KEY,
+    full_text_search,
+)
+
+ASSETS_BASE_ENDPOINT = 'http://127.0.0.1:8000/assets/'
+SOLUTIONS_BASE_ENDPOINT = 'http://127.0.0.1:8000/solutions/'
+
+
+@pytest.fixture
+def email_assets():
+    email_tag = Tag.objects.create(slug='email-marketing', name='Email Marketing')
+    assets = [
+        Asset.objects.create(
+            slug='acme',
+            name='Acme',
+            description='<p>The best <b>emails</b> for your campaigns</p>',
+            is_published=True,
+        ),
+        Asset.objects.create(
+            slug='email-blaster', name='Email Blaster', is_published=True
+        ),
+        Asset.objects.create(slug='mailer', name='Mailer', is_published=True),
+        Asset.objects.create(slug='draft', name='Email Draft', is_published=False),
+    ]
+    assets[2].tags.add(email_tag)
+    return assets
+
+
+def _search_slugs(queryset, search_query: str) -> list:
+    return list(full_text_search(queryset, search_query).values_list('slug', flat=True))
+
+
+def test_search_vectors_are_maintained_by_triggers(email_assets):
+    # Ranked by the weight of the field that matched: name, then tag slugs, then description
+    assert _search_slugs(Asset.objects.all(), 'email') == [
+        'email-blaster',
+        'draft',
+        'mailer',
+        'acme',
+    ]
+
+    Asset.objects.filter(slug='email-blaster').update(name='Blaster')
+    Tag.objects.filter(slug='email-marketing').update(slug='newsletters')
+
+    assert _search_slugs(Asset.objects.all(), 'email') == ['draft', 'acme']
+    assert _search_slugs(Asset.objects.all(), 'newsletter') == ['mailer']
+
+
+def test_solution_search_vectors_include_their_tags(example_solution):
+    tag = Tag.objects.create(slug='web-scraping', name='Web Scraping')
+
+    assert _search_slugs(Solution.objects.all(), 'scraping') == []
+
+    example_solution.tags.add(tag)
+    assert _search_slugs(Solution.objects.all(), 'scraping') == [example_solution.slug]
+
+    example_solution.tags.remove(tag)
+    assert _search_slugs(Solution.objects.all(), 'scraping') == []
+
+
+def test_asset_search_fails_over_to_postgres(
+    unauthenticated_client, mocker, email_assets
+):
+    perform_request = mocker.patch(
+        'elasticsearch.Transport.perform_request',
+        side_effect=ConnectionTimeout('TIMEOUT', 'Read timed out', Exception()),
+    )
+
+    response = unauthenticated_client.get('{}?q=email'.format(ASSETS_BASE_ENDPOINT))
+
+    assert response.status_code == 200
+    assert [asset['slug'] for asset in response.data['results']] == [
+        'email-blaster',
+        'mailer',
+        'acme',
+    ]
+    assert response.data['count'] == 3
+    assert cache.get(ELASTICSEARCH_UNAVAILABLE_CACHE_KEY)
+
+    # Elasticsearch isn't tried again until the cooldown is over
+    perform_request.reset_mock()
+    response = unauthenticated_client.get('{}?q=mailer'.format(ASSETS_BASE_ENDPOINT))
+
+    assert [asset['slug'] for asset in response.data['results']] == ['mailer']
+    perform_request.assert_not_called()
+
+
+def test_elasticsearch_searches_have_a_latency_budget(
+    unauthenticated_client, mocker, settings
+):
+    settings.SEARCH_ELASTICSEARCH_LATENCY_BUDGET = 0.5
+    perform_request = mocker.patch(
+        'elasticsearch.Transport.perform_request',
+        return_value={'hits': {'total': {'value': 0}, 'hits': []}},
+    )
+
+    unauthenticated_client.get('{}?q=email'.format(ASSETS_BASE_ENDPOINT))
+
+    assert perform_request.call_args.kwargs['params']['request_timeout'] == 0.5
+
+
+def test_solution_search_with_postgres_backend(
+    unauthenticated_client, settings, example_solution, example_stripe_product
+):
+    settings.SEARCH_BACKEND = 'postgres'
+    example_stripe_product.livemode = False
+    example_stripe_product.save()
+    example_solution.stripe_product = example_stripe_product
+    example_solution.save()
+    Solution.objects.create(
+        slug='unlisted-solution',
+        title='Unlisted Test Solution',
+        stripe_product=Product.objects.create(
+            id='prod_unlisted', name='unlisted stripe product', livemode=False
+        ),
+        is_searchable=False,
+    )
+
+    response = unauthenticated_client.get('{}?q=test'.format(SOLUTIONS_BASE_ENDPOINT))
+
+    assert response.status_code == 200
+    assert [solution['slug'] for solution in response.data['results']] == [
+        example_solution.slug
+    ]
+
+
+def test_asset_search_facets_with_postgres_backend(
+    unauthenticated_client, settings, email_assets
+):
+    settings.SEARCH_BACKEND = 'postgres'
+    Asset.objects.filter(slug='acme').update(has_free_trial=True, avg_rating=9)
+    email_assets[0].price_plans.create(name='Free')
+
+    response = unauthenticated_client.get(
+        '{}?q=email&facets=true'.format(ASSETS_BASE_ENDPOINT)
+    )
+
+    assert response.status_code == 200
+    assert response.data['facets'] == {
+        'tags': [{'slug': 'email-marketing', 'count': 1}],
+        'has_free_trial': {'true': 1, 'false': 2},
+        'avg_rating': [
+            {'from': None, 'to': 2, 'count': 2},
+            {'from': 2, 'to': 4, 'count': 0},
+            {'from': 4, 'to': 6, 'count': 0},
+            {'from': 6, 'to': 8, 'count': 0},
+            {'from': 8, 'to': None, 'count': 1},
+        ],
+        'has_price_plans': {'true': 1, 'false': 2},
+    }
@@ -0,0 +1,17 @@
+from api.models import Asset, SearchIndexQueueItem
+
+
+def test_search_index_queue_stats_are_only_visible_to_admins(
+    admin_client, authenticated_client, settings
+):
+    settings.SEARCH_INDEX_QUEUE_MAX_LAG = 60
+    SearchIndexQueueItem.objects.all().delete()
+    Asset.objects.create(slug='mailchimp', name='Mailchimp')
+
+    response = admin_client.get('/search-index-queue-stats/')
+    assert response.status_code == 200
+    assert response.json()['pending_objects'] == 1
+    assert response.json()['is_backlogged'] is False
+
+    response = authenticated_client.get('/search-index-queue-stats/')
+    assert response.status_code == 403
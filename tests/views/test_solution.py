@@ -1,8 +1,13 @@
 from django.db.models.signals import post_save, pre_save
 from django.core.signals import request_finished
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from api.models import Solution
 from api.models.solution_booking import SolutionBooking
+from api.models.solution_bookmark import SolutionBookmark
+from api.models.solution_review import SolutionReview
+from api.models.solution_vote import SolutionVote
 from api.views.solutions import SolutionViewSet
 
 SOLUTIONS_BASE_ENDPOINT = 'http://127.0.0.1:8000/solutions/'
@@ -278,3 +283,66 @@ class TestSolutionDetailSolutionBooking:
         )
         response = admin_client.get(solution_detail_url)
         assert len(response.data['last_solution_booking']) == 0
+
+
+class TestSolutionListViewerState:
+    @staticmethod
+    def _create_solution_with_viewer_state(slug: str, user) -> Solution:
+        solution = Solution.objects.create(slug=slug, title=slug, type='I')
+        SolutionVote.objects.create(solution=solution, user=user, is_upvote=True)
+        SolutionBookmark.objects.create(solution=solution, user=user)
+        SolutionReview.objects.create(
+            solution=solution, user=user, type=SolutionReview.Type.HAPPY
+        )
+        SolutionBooking.objects.create(booked_by=user, solution=solution)
+        return solution
+
+    @staticmethod
+    def _count_queries(client, url) -> int:
+        with CaptureQueriesContext(connection) as captured_queries:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(captured_queries)
+
+    def test_logged_in_list_queries_do_not_grow_with_page_size(
+        self, admin_client, admin_user, mocker
+    ):
+        for i in range(3):
+            self._create_solution_with_viewer_state('solution-{}'.format(i), admin_user)
+        patch_elasticsearch(mocker)
+
+        queries_for_one = self._count_queries(
+            admin_client, '{}?q=test&limit=1'.format(SOLUTIONS_BASE_ENDPOINT)
+        )
+        queries_for_three = self._count_queries(
+            admin_client, '{}?q=test&limit=3'.format(SOLUTIONS_BASE_ENDPOINT)
+        )
+
+        assert queries_for_one == queries_for_three
+
+    def test_logged_in_list_viewer_state(self, admin_client, admin_user, mocker):
+        solutions = [
+            self._create_solution_with_viewer_state('solution-{}'.format(i), admin_user)
+            for i in range(2)
+        ]
+        patch_elasticsearch(mocker)
+
+        response = admin_client.get('{}?q=test'.format(SOLUTIONS_BASE_ENDPOINT))
+
+        assert response.status_code == 200
+        results_by_id = {
+            solution_data['id']: solution_data
+            for solution_data in response.data['results']
+        }
+        for solution in solutions:
+            solution_data = results_by_id[solution.id]
+            assert solution_data['my_solution_vote'] == solution.solution_votes.get().id
+            assert (
+                solution_data['my_solution_bookmark']
+                == SolutionBookmark.objects.get(solution=solution).id
+            )
+            assert solution_data['my_solution_review'] == SolutionReview.Type.HAPPY
+            assert (
+                solution_data['last_solution_booking'][0]['id']
+                == solution.bookings.get().id
+            )